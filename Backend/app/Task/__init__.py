@@ -1,17 +1,29 @@
 # Backend/app/tasks/__init__.py
 
-from .trading_task import place_order_task, check_order_status_task
+from .trading_task import place_order_task, check_order_status_task, reconcile_open_orders_task
 from .market_task import fetch_market_data_task, analyze_market_task
 from .notification_task import send_notification_task
-from .maintenance import cleanup_expired_tokens_task, sync_portfolio_task
+from .maintenance import (
+    cleanup_expired_tokens_task, sync_portfolio_task, rebuild_trade_daily_stats_task,
+    refresh_platform_benchmark_task, capture_portfolio_snapshots_task, compact_portfolio_snapshots_task,
+    check_query_plans_task, archive_trades_task, mark_positions_task
+)
 
 # List of all tasks for easier registration if needed
 __all__ = [
     'place_order_task',
     'check_order_status_task',
+    'reconcile_open_orders_task',
     'fetch_market_data_task',
     'analyze_market_task',
     'send_notification_task',
     'cleanup_expired_tokens_task',
-    'sync_portfolio_task'
+    'sync_portfolio_task',
+    'rebuild_trade_daily_stats_task',
+    'refresh_platform_benchmark_task',
+    'capture_portfolio_snapshots_task',
+    'compact_portfolio_snapshots_task',
+    'check_query_plans_task',
+    'archive_trades_task',
+    'mark_positions_task'
 ]
\ No newline at end of file
@@ -24,4 +24,123 @@ def sync_portfolio_task(user_id):
     Re-calculates portfolio stats by syncing DB with Exchange balances.
     """
     print(f"[Maintenance] Syncing portfolio for User {user_id}")
-    return {"user_id": user_id, "status": "synced"}
\ No newline at end of file
+    return {"user_id": user_id, "status": "synced"}
+
+
+@shared_task
+def rebuild_trade_daily_stats_task(days=3, user_id=None):
+    """
+    Recomputes the trade_daily_stats rollup from the trades table.
+    Trades are rolled up as they fill; this nightly pass repairs drift from
+    writes that bypassed the ORM. Pass days=None for a full backfill.
+    Recommended to run daily via Celery Beat.
+    """
+    from datetime import datetime, timedelta
+    from app.models.trade_daily_stat import TradeDailyStat
+
+    since = datetime.utcnow().date() - timedelta(days=days) if days is not None else None
+    print(f"[Maintenance] Rebuilding trade daily stats since {since or 'the beginning'}")
+    try:
+        rows = TradeDailyStat.rebuild(user_id=user_id, since=since)
+        return {"rows": rows, "since": since.isoformat() if since else None}
+    except Exception as e:
+        print(f"[Maintenance] Error rebuilding trade daily stats: {e}")
+        raise
+
+@shared_task
+def refresh_platform_benchmark_task():
+    """
+    Recomputes platform-wide averages and percentiles from trade_daily_stats
+    and stores them with per-user summaries in Redis for comparison requests.
+    Recommended to run every 15 minutes via Celery Beat.
+    """
+    from app.services.platform_benchmark import platform_benchmark
+
+    print("[Maintenance] Refreshing platform benchmark...")
+    try:
+        snapshot = platform_benchmark.refresh()
+        return {"users": snapshot["users"], "generated_at": snapshot["generated_at"]}
+    except Exception as e:
+        print(f"[Maintenance] Error refreshing platform benchmark: {e}")
+        raise
+
+@shared_task
+def capture_portfolio_snapshots_task():
+    """
+    Records each user's equity (quote balance plus marked positions) for
+    the equity curve. Recommended to run every PORTFOLIO_SNAPSHOT_INTERVAL
+    seconds (default 5 minutes) via Celery Beat.
+    """
+    from app.services.portfolio_snapshots import PortfolioSnapshotService
+
+    print("[Maintenance] Capturing portfolio snapshots...")
+    try:
+        return {"snapshots": PortfolioSnapshotService().capture()}
+    except Exception as e:
+        print(f"[Maintenance] Error capturing portfolio snapshots: {e}")
+        raise
+
+@shared_task
+def compact_portfolio_snapshots_task():
+    """
+    Thins portfolio snapshots older than a week to hourly and older than
+    90 days to daily resolution. Recommended to run daily via Celery Beat.
+    """
+    from app.services.portfolio_snapshots import PortfolioSnapshotService
+
+    print("[Maintenance] Compacting portfolio snapshots...")
+    try:
+        return {"deleted": PortfolioSnapshotService().compact()}
+    except Exception as e:
+        print(f"[Maintenance] Error compacting portfolio snapshots: {e}")
+        raise
+
+@shared_task
+def check_query_plans_task():
+    """
+    EXPLAINs the hot trade, position, notification and workflow execution
+    queries and fails if any of them regressed to a full table scan, e.g.
+    after an index was dropped or a query changed shape. Run after
+    migrations or deploys.
+    """
+    from app.services.query_plans import check_query_plans
+
+    print("[Maintenance] Checking query plans...")
+    result = check_query_plans()
+    if result["regressions"]:
+        names = ", ".join(r["query"] for r in result["regressions"])
+        print(f"[Maintenance] Query plan regressions: {names}")
+        raise RuntimeError(f"Queries scan their table: {names}")
+    return {"checked": result["checked"], "dialect": result["dialect"]}
+
+@shared_task
+def archive_trades_task():
+    """
+    Moves closed trades older than TRADE_HOT_RETENTION_DAYS (default 180)
+    from the trades table to trades_archive, keeping the hot table and its
+    indexes small. Recommended to run daily via Celery Beat.
+    """
+    from app.services.trade_archive import TradeArchiver
+
+    print("[Maintenance] Archiving old trades...")
+    try:
+        return {"archived": TradeArchiver().archive()}
+    except Exception as e:
+        print(f"[Maintenance] Error archiving trades: {e}")
+        raise
+
+@shared_task
+def mark_positions_task():
+    """
+    Marks every position to the latest cached market price, updating
+    current_price and unrealized_pnl in set-based batches. Recommended to
+    run every minute via Celery Beat.
+    """
+    from app.services.mark_to_market import MarkToMarketService
+
+    print("[Maintenance] Marking positions to market...")
+    try:
+        return {"updated": MarkToMarketService().run()}
+    except Exception as e:
+        print(f"[Maintenance] Error marking positions to market: {e}")
+        raise
@@ -1,23 +1,31 @@
 # Backend/app/tasks/market_task.py
-from celery import shared_task
+import logging
 import random
+from celery import shared_task
+from datetime import datetime
+from app.services.market_feed import market_data_cache
+
+logger = logging.getLogger(__name__)
 
 @shared_task
 def fetch_market_data_task(symbol, timeframe='1h'):
     """
-    Fetches OHLCV data for a specific symbol.
+    Returns the latest streamed market data for a symbol.
+    Reads the shared cache filled by the market feed service.
     """
-    print(f"[Market] Fetching {timeframe} data for {symbol}")
+    logger.debug(f"Fetching {timeframe} data for {symbol}")
     
-    # TODO: Fetch from Binance/Coinbase/AlphaVantage
-    # Mock data
-    current_price = 45000 + random.randint(-100, 100)
+    ticker = market_data_cache.get_ticker(symbol)
+    if not ticker:
+        market_data_cache.request_symbol(symbol)
+        return {"symbol": symbol, "price": None, "volume": None, "timestamp": None}
     
     return {
         "symbol": symbol,
-        "price": current_price,
-        "volume": 1200.5,
-        "timestamp": "2025-12-21T09:30:00Z"
+        "price": ticker.get("price"),
+        "volume": ticker.get("volume_24h"),
+        "exchange": ticker.get("exchange"),
+        "timestamp": datetime.utcfromtimestamp(ticker["timestamp"] / 1000).isoformat() + "Z"
     }
 
 @shared_task
@@ -25,7 +33,7 @@ def analyze_market_task(symbol, strategy_params):
     """
     Runs technical indicators (RSI, MACD) on fetched data.
     """
-    print(f"[Market] Analyzing {symbol} with params: {strategy_params}")
+    logger.debug(f"Analyzing {symbol} with params: {strategy_params}")
     
 
     rsi_value = random.randint(30, 70)
@@ -5,32 +5,64 @@ from app import db
 # from app.models import Trade, User (Import your models here)
 
 @shared_task(bind=True, max_retries=3)
-def place_order_task(self, user_id, symbol, side, quantity, order_type='MARKET', price=None):
+def place_order_task(self, user_id, symbol, side, quantity, order_type='MARKET', price=None,
+                     trade_id=None, exchange_name='binance'):
     """
     Executes a trade order on the exchange.
+    Safe to retry: the order carries a client order id derived from the
+    Trade (or this task's id), so a retry after an ambiguous failure finds
+    the order already placed instead of submitting a duplicate.
     """
+    from app.models.trade import Trade
+    from app.services.exchangeservice import ExchangeService
+    from app.services.order_tracker import OrderTracker
+
     try:
         print(f"[Trading] Placing {side} order for {quantity} {symbol} (User: {user_id})")
-     
-        time.sleep(1)
-        
-        # Mock Result
-        trade_id = f"ord_{int(time.time())}"
-        fill_price = price if price else 45000.00  # Mock price
-        
-        # TODO: Save Trade to Database
-        # trade = Trade(user_id=user_id, symbol=symbol, ...)
-        # db.session.add(trade)
-        # db.session.commit()
-        
+
+        trade = Trade.query.get(trade_id) if trade_id else None
+        if trade:
+            exchange_name = trade.exchange or exchange_name
+            client_order_id = ExchangeService.client_order_id('trade', trade.id)
+        else:
+            client_order_id = ExchangeService.client_order_id('task', self.request.id)
+
+        order = ExchangeService(user_id).place_order(
+            symbol, side.lower(), order_type.lower(), quantity, price,
+            exchange_name=exchange_name, client_order_id=client_order_id
+        )
+
+        filled = order.get('filled') or 0
+        status = OrderTracker.STATUS_MAP.get(order.get('status'))
+        if status is None:
+            status = 'partially_filled' if filled > 0 else 'pending'
+
+        if trade is None:
+            trade = Trade(
+                user_id=user_id, symbol=symbol, side=side.lower(), type=order_type.lower(),
+                quantity=quantity, exchange=exchange_name
+            )
+            db.session.add(trade)
+
+        trade.price = order.get('price') or order.get('average') or price or 0
+        trade.exchange_order_id = order.get('id')
+        trade.filled_quantity = filled
+        trade.average_price = order.get('average')
+        trade.status = status
+        trade.fee = (order.get('fee') or {}).get('cost') or 0
+        db.session.commit()
+
         return {
-            "status": "filled",
-            "trade_id": trade_id,
-            "price": fill_price,
+            "status": status,
+            "trade_id": trade.id,
+            "order_id": order.get('id'),
+            "client_order_id": client_order_id,
+            "price": trade.average_price or trade.price,
             "symbol": symbol
         }
 
     except Exception as e:
+        db.session.rollback()
         print(f"[Trading] Order failed: {e}")
         
         raise self.retry(exc=e, countdown=5)
@@ -42,4 +74,16 @@ def check_order_status_task(order_id):
     """
     print(f"[Trading] Checking status for Order ID: {order_id}")
 
-    return {"order_id": order_id, "status": "closed", "filled": True}
\ No newline at end of file
+    return {"order_id": order_id, "status": "closed", "filled": True}
+
+@shared_task
+def reconcile_open_orders_task(user_id=None, exchange_name=None):
+    """
+    Reconciles all open trades with the exchange in one pass.
+    Recommended to run every few seconds via Celery Beat.
+    """
+    from app.services.order_tracker import OrderTracker
+
+    result = OrderTracker().reconcile(user_id=user_id, exchange_name=exchange_name)
+    print(f"[Trading] Reconciled open orders: {result}")
+    return result
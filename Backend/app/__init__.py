@@ -0,0 +1,14 @@
+# Backend/app/__init__.py
+"""
+Shared extensions imported across the backend as `from app import db, redis_client`
+
+db routes reads inside read_replica() through RoutingSession; redis_client
+connects lazily to REDIS_URL, so importing the package needs no running Redis.
+"""
+import os
+import redis
+from flask_sqlalchemy import SQLAlchemy
+from app.utils.database import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+redis_client = redis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0'), decode_responses=True)
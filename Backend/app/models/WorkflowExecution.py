@@ -4,6 +4,9 @@ from datetime import datetime
 
 class WorkflowExecution(db.Model):
     __tablename__ = 'workflow_executions'
+    __table_args__ = (
+        db.Index('ix_workflow_executions_workflow_started', 'workflow_id', 'started_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     workflow_id = db.Column(db.Integer, db.ForeignKey('workflows.id'), nullable=False)
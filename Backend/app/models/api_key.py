@@ -1,5 +1,15 @@
 from datetime import datetime
+import threading
+import time
+from sqlalchemy import event
 from app import db
+from app.utils.encryption import decrypt_value
+
+# Decrypted credentials per ApiKey.id: (ciphertexts, plaintexts, expires_at)
+_credential_cache = {}
+_credential_lock = threading.Lock()
+CREDENTIAL_CACHE_TTL = 300  # seconds
+
 class ApiKey(db.Model):
     __tablename__ = 'api_keys'
     
@@ -12,6 +22,37 @@ class ApiKey(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    def get_credentials(self):
+        """
+        Get the decrypted (api_key, api_secret) pair
+
+        Decrypted values are kept in memory for a few minutes and only
+        reused while the stored ciphertexts are unchanged, so a key updated
+        by another process is never served stale.
+        """
+        ciphertexts = (self.api_key, self.api_secret)
+        now = time.monotonic()
+
+        with _credential_lock:
+            cached = _credential_cache.get(self.id)
+        if cached and cached[0] == ciphertexts and cached[2] > now:
+            return cached[1]
+
+        credentials = (decrypt_value(self.api_key), decrypt_value(self.api_secret))
+        if self.id is not None:
+            with _credential_lock:
+                _credential_cache[self.id] = (ciphertexts, credentials, now + CREDENTIAL_CACHE_TTL)
+        return credentials
+
+    @staticmethod
+    def clear_credential_cache(api_key_id=None):
+        """Forget decrypted credentials for one key, or all keys"""
+        with _credential_lock:
+            if api_key_id is None:
+                _credential_cache.clear()
+            else:
+                _credential_cache.pop(api_key_id, None)
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -20,3 +61,17 @@ class ApiKey(db.Model):
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat()
         }
+
+
+@event.listens_for(ApiKey, 'after_insert')
+@event.listens_for(ApiKey, 'after_update')
+@event.listens_for(ApiKey, 'after_delete')
+def _clear_cached_credentials(mapper, connection, target):
+    """Drop decrypted credentials and exchange clients when a key is added, changed, deactivated or removed"""
+    from app.services.exchangeservice import ExchangeService
+
+    ApiKey.clear_credential_cache(target.id)
+
+    # Both modes, since the key may have been switched between testnet and live
+    for use_testnet in (True, False):
+        ExchangeService.evict_clients(target.user_id, target.exchange, use_testnet)
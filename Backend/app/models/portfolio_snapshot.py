@@ -0,0 +1,27 @@
+from app import db
+from datetime import datetime
+
+class PortfolioSnapshot(db.Model):
+    """Point-in-time account equity: quote cash plus marked positions"""
+    __tablename__ = 'portfolio_snapshots'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'timestamp', name='uq_portfolio_snapshots_user_timestamp'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    cash = db.Column(db.Float, nullable=False, default=0)
+    positions_value = db.Column(db.Float, nullable=False, default=0)
+    unrealized_pnl = db.Column(db.Float, nullable=False, default=0)
+    equity = db.Column(db.Float, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'timestamp': self.timestamp.isoformat(),
+            'cash': self.cash,
+            'positions_value': self.positions_value,
+            'unrealized_pnl': self.unrealized_pnl,
+            'equity': self.equity
+        }
@@ -3,6 +3,9 @@ from datetime import datetime
 
 class Position(db.Model):
     __tablename__ = 'positions'
+    __table_args__ = (
+        db.Index('ix_positions_user_symbol', 'user_id', 'symbol'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -2,6 +2,18 @@ from app import db
 from datetime import datetime
 class Trade(db.Model):
     __tablename__ = 'trades'
+    __table_args__ = (
+        db.Index('ix_trades_workflow_status', 'workflow_id', 'status'),
+        db.Index('ix_trades_user_timestamp', 'user_id', 'timestamp', 'id'),
+        db.Index('ix_trades_user_status_timestamp', 'user_id', 'status', 'timestamp'),
+        db.Index('ix_trades_user_symbol_timestamp', 'user_id', 'symbol', 'timestamp'),
+        # Open orders polled by OrderTracker: a small fraction of all trades
+        db.Index(
+            'ix_trades_open_orders', 'user_id', 'exchange',
+            postgresql_where=db.text("status IN ('pending', 'partially_filled')"),
+            sqlite_where=db.text("status IN ('pending', 'partially_filled')")
+        ),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -41,3 +53,9 @@ class Trade(db.Model):
             'timestamp': self.timestamp.isoformat() if self.timestamp else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+
+
+# Registers the flush listeners that maintain trade_daily_stats and
+# invalidate cached analytics
+from app.models import trade_daily_stat  # noqa: E402,F401
+from app.services import analytics_cache  # noqa: E402,F401
@@ -0,0 +1,58 @@
+from app import db
+from datetime import datetime
+
+class ArchivedTrade(db.Model):
+    """
+    Cold copy of a closed trade moved out of the trades table
+
+    On PostgreSQL the table is range-partitioned by month of the trade
+    timestamp (partitions are created by TradeArchiver), so old months
+    can be detached or dropped without touching the rest.
+    """
+    __tablename__ = 'trades_archive'
+    __table_args__ = (
+        db.Index('ix_trades_archive_user_timestamp', 'user_id', 'timestamp', 'id'),
+        {'postgresql_partition_by': 'RANGE (timestamp)'},
+    )
+
+    # Same columns as Trade; the partition key has to be part of the primary key
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    timestamp = db.Column(db.DateTime, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    workflow_id = db.Column(db.Integer)
+    symbol = db.Column(db.String(20), nullable=False)
+    side = db.Column(db.String(10), nullable=False)
+    type = db.Column(db.String(20))
+    quantity = db.Column(db.Float, nullable=False)
+    price = db.Column(db.Float, nullable=False)
+    filled_quantity = db.Column(db.Float)
+    average_price = db.Column(db.Float)
+    status = db.Column(db.String(20))
+    exchange = db.Column(db.String(50))
+    exchange_order_id = db.Column(db.String(100))
+    fee = db.Column(db.Float)
+    profit_loss = db.Column(db.Float)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        """Same shape as Trade.to_dict"""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'workflow_id': self.workflow_id,
+            'symbol': self.symbol,
+            'side': self.side,
+            'type': self.type,
+            'quantity': self.quantity,
+            'price': self.price,
+            'filled_quantity': self.filled_quantity,
+            'average_price': self.average_price,
+            'status': self.status,
+            'exchange': self.exchange,
+            'exchange_order_id': self.exchange_order_id,
+            'fee': self.fee,
+            'profit_loss': self.profit_loss,
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
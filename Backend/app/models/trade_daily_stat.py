@@ -0,0 +1,313 @@
+from app import db
+from app.models.trade import Trade
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+
+# Trade attributes a rollup row depends on
+ROLLUP_FIELDS = ['user_id', 'symbol', 'workflow_id', 'timestamp', 'status', 'profit_loss', 'quantity', 'price', 'fee']
+
+# Counters that can be added to and subtracted from
+ADDITIVE_FIELDS = ['trades', 'wins', 'losses', 'gross_profit', 'gross_loss', 'volume', 'fees']
+
+class TradeDailyStat(db.Model):
+    """Filled trades rolled up per user, symbol, workflow and day"""
+    __tablename__ = 'trade_daily_stats'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'symbol', 'workflow_id', 'day', name='uq_trade_daily_stats_key'),
+        db.Index('ix_trade_daily_stats_user_day', 'user_id', 'day'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    symbol = db.Column(db.String(20), nullable=False)
+    workflow_id = db.Column(db.Integer, nullable=False, default=0)  # 0 = manual trades
+    day = db.Column(db.Date, nullable=False)
+    trades = db.Column(db.Integer, nullable=False, default=0)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    losses = db.Column(db.Integer, nullable=False, default=0)
+    gross_profit = db.Column(db.Float, nullable=False, default=0)
+    gross_loss = db.Column(db.Float, nullable=False, default=0)  # sum of losing P&L (<= 0)
+    volume = db.Column(db.Float, nullable=False, default=0)
+    fees = db.Column(db.Float, nullable=False, default=0)
+    largest_win = db.Column(db.Float)
+    largest_loss = db.Column(db.Float)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'symbol': self.symbol,
+            'workflow_id': self.workflow_id or None,
+            'day': self.day.isoformat(),
+            'trades': self.trades,
+            'wins': self.wins,
+            'losses': self.losses,
+            'gross_profit': self.gross_profit,
+            'gross_loss': self.gross_loss,
+            'net_pnl': self.gross_profit + self.gross_loss,
+            'volume': self.volume,
+            'fees': self.fees,
+            'largest_win': self.largest_win,
+            'largest_loss': self.largest_loss
+        }
+
+    @staticmethod
+    def contribution(state):
+        """
+        Rollup key and counters of one trade state
+
+        Args:
+            state: Dict of ROLLUP_FIELDS values (or None)
+
+        Returns:
+            (key, counters) tuple, or None if the trade is not filled
+        """
+        if not state or state.get('status') != 'filled':
+            return None
+
+        timestamp = state.get('timestamp') or datetime.utcnow()
+        key = (state['user_id'], state['symbol'], state.get('workflow_id') or 0, timestamp.date())
+        pnl = state.get('profit_loss') or 0
+
+        return key, {
+            'trades': 1,
+            'wins': 1 if pnl > 0 else 0,
+            'losses': 1 if pnl < 0 else 0,
+            'gross_profit': pnl if pnl > 0 else 0,
+            'gross_loss': pnl if pnl < 0 else 0,
+            'volume': (state.get('quantity') or 0) * (state.get('price') or 0),
+            'fees': state.get('fee') or 0,
+            'largest_win': pnl if pnl > 0 else None,
+            'largest_loss': pnl if pnl < 0 else None
+        }
+
+    @classmethod
+    def record_changes(cls, connection, changes):
+        """
+        Apply trade changes to the rollup in the caller's transaction
+
+        Used by the flush listener and by bulk writers that bypass ORM
+        events (e.g. OrderTracker's bulk_update_mappings).
+
+        Args:
+            connection: Connection of the transaction writing the trades
+            changes: Iterable of (old_state, new_state) dicts; None for
+                inserted or deleted trades
+        """
+        deltas = {}
+        recompute = set()
+
+        for old, new in changes:
+            before = cls.contribution(old)
+            after = cls.contribution(new)
+            if before == after:
+                continue
+
+            if before:
+                key, counters = before
+                delta = deltas.setdefault(key, {'largest_win': None, 'largest_loss': None})
+                for field in ADDITIVE_FIELDS:
+                    delta[field] = delta.get(field, 0) - counters[field]
+                # Extremes cannot be subtracted: recompute them from trades
+                if counters['largest_win'] is not None or counters['largest_loss'] is not None:
+                    recompute.add(key)
+
+            if after:
+                key, counters = after
+                delta = deltas.setdefault(key, {'largest_win': None, 'largest_loss': None})
+                for field in ADDITIVE_FIELDS:
+                    delta[field] = delta.get(field, 0) + counters[field]
+                delta['largest_win'] = _extreme(max, delta['largest_win'], counters['largest_win'])
+                delta['largest_loss'] = _extreme(min, delta['largest_loss'], counters['largest_loss'])
+
+        if not deltas:
+            return
+
+        for key, delta in deltas.items():
+            _upsert(connection, key, delta)
+        for key in recompute:
+            _recompute_extremes(connection, key)
+
+    @classmethod
+    def rebuild(cls, user_id=None, since=None):
+        """
+        Recompute rollup rows from hot and archived trades
+
+        Args:
+            user_id: Restrict to one user (optional)
+            since: First day to rebuild (optional, all days if None)
+
+        Returns:
+            Number of rollup rows written
+        """
+        from app.services.trade_archive import trade_history
+
+        start = datetime.combine(since, datetime.min.time()) if since is not None else None
+        trades = trade_history(start)
+        delete = cls.__table__.delete()
+        filters = [trades.c.status == 'filled']
+        if user_id is not None:
+            delete = delete.where(cls.user_id == user_id)
+            filters.append(trades.c.user_id == user_id)
+        if since is not None:
+            delete = delete.where(cls.day >= since)
+            filters.append(trades.c.timestamp >= start)
+
+        rows = db.session.query(
+            trades.c.user_id, trades.c.symbol, trades.c.workflow_id, trades.c.timestamp,
+            trades.c.profit_loss, trades.c.quantity, trades.c.price, trades.c.fee
+        ).filter(*filters).yield_per(5000)
+
+        stats = {}
+        for row in rows:
+            key, counters = cls.contribution({**row._asdict(), 'status': 'filled'})
+            stat = stats.setdefault(key, {'largest_win': None, 'largest_loss': None})
+            for field in ADDITIVE_FIELDS:
+                stat[field] = stat.get(field, 0) + counters[field]
+            stat['largest_win'] = _extreme(max, stat['largest_win'], counters['largest_win'])
+            stat['largest_loss'] = _extreme(min, stat['largest_loss'], counters['largest_loss'])
+
+        now = datetime.utcnow()
+        mappings = [
+            {'user_id': k[0], 'symbol': k[1], 'workflow_id': k[2], 'day': k[3], 'updated_at': now, **v}
+            for k, v in stats.items()
+        ]
+
+        try:
+            db.session.execute(delete)
+            for i in range(0, len(mappings), 1000):
+                db.session.execute(cls.__table__.insert(), mappings[i:i + 1000])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return len(mappings)
+
+
+def _extreme(pick, a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return pick(a, b)
+
+
+def _upsert(connection, key, delta):
+    """Add a delta to one rollup row, creating it if needed"""
+    table = TradeDailyStat.__table__
+    user_id, symbol, workflow_id, day = key
+    values = {
+        'user_id': user_id, 'symbol': symbol, 'workflow_id': workflow_id, 'day': day,
+        'updated_at': datetime.utcnow(), **delta
+    }
+    dialect = connection.dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+            greatest, least = func.greatest, func.least
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+            greatest, least = func.max, func.min
+
+        stmt = insert(table).values(**values)
+        excluded = stmt.excluded
+        updates = {field: table.c[field] + excluded[field] for field in ADDITIVE_FIELDS}
+        updates['largest_win'] = greatest(
+            func.coalesce(table.c.largest_win, excluded.largest_win),
+            func.coalesce(excluded.largest_win, table.c.largest_win)
+        )
+        updates['largest_loss'] = least(
+            func.coalesce(table.c.largest_loss, excluded.largest_loss),
+            func.coalesce(excluded.largest_loss, table.c.largest_loss)
+        )
+        updates['updated_at'] = excluded.updated_at
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=['user_id', 'symbol', 'workflow_id', 'day'], set_=updates
+        ))
+        return
+
+    # Other databases: update, then insert if the row did not exist
+    match = (
+        (table.c.user_id == user_id) & (table.c.symbol == symbol) &
+        (table.c.workflow_id == workflow_id) & (table.c.day == day)
+    )
+    updates = {field: table.c[field] + delta[field] for field in ADDITIVE_FIELDS}
+    if delta['largest_win'] is not None:
+        updates['largest_win'] = func.coalesce(func.greatest(table.c.largest_win, delta['largest_win']), delta['largest_win'])
+    if delta['largest_loss'] is not None:
+        updates['largest_loss'] = func.coalesce(func.least(table.c.largest_loss, delta['largest_loss']), delta['largest_loss'])
+    result = connection.execute(table.update().where(match).values(**updates, updated_at=values['updated_at']))
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(**values))
+
+
+def _recompute_extremes(connection, key):
+    """Recompute largest win/loss of one rollup row from its trades"""
+    from app.services.trade_archive import trade_history
+
+    table = TradeDailyStat.__table__
+    user_id, symbol, workflow_id, day = key
+    start = datetime.combine(day, datetime.min.time())
+    trades = trade_history(start)
+
+    workflow_match = trades.c.workflow_id.is_(None) | (trades.c.workflow_id == 0) if workflow_id == 0 \
+        else trades.c.workflow_id == workflow_id
+    source = db.select(
+        func.max(db.case((trades.c.profit_loss > 0, trades.c.profit_loss))),
+        func.min(db.case((trades.c.profit_loss < 0, trades.c.profit_loss)))
+    ).where(
+        trades.c.user_id == user_id,
+        trades.c.symbol == symbol,
+        workflow_match,
+        trades.c.status == 'filled',
+        trades.c.timestamp >= start,
+        trades.c.timestamp < start + timedelta(days=1)
+    )
+    largest_win, largest_loss = connection.execute(source).one()
+
+    connection.execute(table.update().where(
+        (table.c.user_id == user_id) & (table.c.symbol == symbol) &
+        (table.c.workflow_id == workflow_id) & (table.c.day == day)
+    ).values(largest_win=largest_win, largest_loss=largest_loss))
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+# Load the previous value when an expired attribute is assigned, so the
+# flush listener can always subtract a trade's old contribution
+for _field in ROLLUP_FIELDS:
+    event.listen(getattr(Trade, _field), 'set', _keep_old_value, active_history=True, retval=True)
+
+
+def _trade_state(trade, committed=False):
+    """Current or last-committed ROLLUP_FIELDS values of a Trade"""
+    state = inspect(trade)
+    values = {}
+    for field in ROLLUP_FIELDS:
+        attr = state.attrs[field]
+        history = attr.history if committed else None
+        values[field] = history.deleted[0] if history and history.deleted else attr.value
+    return values
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_trade_rollup(session, flush_context):
+    """Keep trade_daily_stats in step with Trade inserts, updates and deletes"""
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, Trade):
+            changes.append((None, _trade_state(obj)))
+    for obj in session.dirty:
+        if isinstance(obj, Trade) and session.is_modified(obj, include_collections=False):
+            changes.append((_trade_state(obj, committed=True), _trade_state(obj)))
+    for obj in session.deleted:
+        if isinstance(obj, Trade):
+            changes.append((_trade_state(obj, committed=True), None))
+
+    if changes:
+        TradeDailyStat.record_changes(session.connection(), changes)
@@ -2,6 +2,9 @@ from app import db
 from datetime import datetime
 class Workflow(db.Model):
     __tablename__ = "workflows"
+    __table_args__ = (
+        db.Index('ix_workflows_user_created', 'user_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
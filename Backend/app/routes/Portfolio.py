@@ -1,16 +1,16 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
-from Backend.app.models.position import Position
-from ..models import Portfolio
-from .. import db
-import random
+from app.models.position import Position
+from app.services.portfolio_snapshots import PortfolioSnapshotService
+from app.utils.database import read_replica
+from app import db
 portfolio_bp = Blueprint('portfolio', __name__)
 
 @portfolio_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_portfolios():
-   user_id = get_jwt_identity()
+    user_id = get_jwt_identity()
     positions = Position.query.filter_by(user_id=user_id).all()
     
     total_value = sum(p.quantity * (p.current_price or p.avg_price) for p in positions)
@@ -58,17 +58,15 @@ def get_position(symbol):
 
 @portfolio_bp.route('/performance', methods=['GET'])
 @jwt_required()
+@read_replica()
 def get_performance():
     user_id = get_jwt_identity()
+    days = int(request.args.get('days', 30))
     
-    # Mock performance data
-    performance = {
-        'daily_return': round(random.uniform(-2, 3), 2),
-        'weekly_return': round(random.uniform(-5, 8), 2),
-        'monthly_return': round(random.uniform(-8, 15), 2),
-        'ytd_return': round(random.uniform(5, 35), 2),
-        'total_return': round(random.uniform(10, 50), 2)
-    }
+    # Returns and equity curve from portfolio snapshots
+    service = PortfolioSnapshotService()
+    performance = service.get_returns(user_id)
+    performance['equity_curve'] = service.get_equity_curve(user_id, days)
     
     return jsonify(performance), 200
 
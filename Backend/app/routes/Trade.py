@@ -1,9 +1,16 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.trade import Trade
 from app.models.user import User
 from app.services.trading_engine import TradingEngine
+from app.services.order_router import SmartOrderRouter
+from app.services.trade_export import TradeExporter
+from app.services.analytics import AnalyticsService
+from app.services.trade_archive import trade_history, history_row_to_dict, find_trade
+from app.utils.exception import ExchangeException, ValidationError
+from app.utils.pagination import keyset_page, approximate_count
+from app.utils.database import read_replica
 from datetime import datetime, timedelta
 
 bp = Blueprint('trades', __name__)
@@ -12,34 +19,39 @@ bp = Blueprint('trades', __name__)
 @jwt_required()
 def get_trades():
     """
-    Get all trades for current user
+    Get all trades for current user, newest first, archived trades included
     GET /api/trades
-    Query params: page, per_page, symbol, status, start_date, end_date
+    Query params: cursor, per_page, symbol, status, include_total
     """
     try:
         user_id = get_jwt_identity()
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 50, type=int)
+        cursor = request.args.get('cursor')
+        per_page = min(request.args.get('per_page', 50, type=int), 200)
         symbol = request.args.get('symbol')
         status = request.args.get('status')
         
-        query = Trade.query.filter_by(user_id=user_id)
+        source = trade_history()
+        query = db.session.query(source).filter(source.c.user_id == user_id)
         
         if symbol:
-            query = query.filter_by(symbol=symbol)
+            query = query.filter(source.c.symbol == symbol)
         if status:
-            query = query.filter_by(status=status)
+            query = query.filter(source.c.status == status)
         
-        trades = query.order_by(Trade.timestamp.desc())\
-            .paginate(page=page, per_page=per_page, error_out=False)
+        trades, next_cursor = keyset_page(query, (source.c.timestamp, source.c.id), cursor, per_page)
         
-        return jsonify({
-            'trades': [t.to_dict() for t in trades.items],
-            'total': trades.total,
-            'pages': trades.pages,
-            'current_page': trades.page
-        }), 200
+        result = {
+            'trades': [history_row_to_dict(t) for t in trades],
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }
+        if request.args.get('include_total') == 'true':
+            result['total'], result['total_exact'] = approximate_count(query)
         
+        return jsonify(result), 200
+        
+    except ValidationError as e:
+        return jsonify({'error': e.message}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -101,16 +113,67 @@ def create_trade():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/smart', methods=['POST'])
+@jwt_required()
+def create_smart_trade():
+    """
+    Route an order across connected exchanges by best price after fees
+    POST /api/trades/smart
+    Body: {symbol, side, quantity, type, price, exchanges, workflow_id, client_order_id}
+    """
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json()
+        
+        # Validate required fields
+        required = ['symbol', 'side', 'quantity']
+        if not all(field in data for field in required):
+            return jsonify({'error': 'Missing required fields'}), 400
+        
+        if data['side'] not in ['buy', 'sell']:
+            return jsonify({'error': 'Side must be buy or sell'}), 400
+        
+        exchanges = data.get('exchanges')
+        if exchanges is not None and (not isinstance(exchanges, list)
+                                      or not all(isinstance(e, str) for e in exchanges)):
+            return jsonify({'error': 'Exchanges must be a list of exchange names'}), 400
+        
+        router = SmartOrderRouter(user_id, exchanges=exchanges)
+        report = router.execute(
+            symbol=data['symbol'],
+            side=data['side'],
+            quantity=data['quantity'],
+            order_type=data.get('type', 'market'),
+            price=data.get('price'),
+            workflow_id=data.get('workflow_id'),
+            route_id=data.get('client_order_id')
+        )
+        
+        return jsonify({
+            'message': 'Order routed successfully',
+            'report': report
+        }), 201
+        
+    except ValidationError as e:
+        db.session.rollback()
+        return jsonify({'error': e.message}), 400
+    except ExchangeException as e:
+        db.session.rollback()
+        return jsonify({'error': e.message}), e.status_code
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @bp.route('/<int:trade_id>', methods=['GET'])
 @jwt_required()
 def get_trade(trade_id):
     """
-    Get trade by ID
+    Get trade by ID, archived trades included
     GET /api/trades/:id
     """
     try:
         user_id = get_jwt_identity()
-        trade = Trade.query.filter_by(id=trade_id, user_id=user_id).first()
+        trade = find_trade(trade_id, user_id)
         
         if not trade:
             return jsonify({'error': 'Trade not found'}), 404
@@ -152,6 +215,7 @@ def cancel_trade(trade_id):
 
 @bp.route('/history', methods=['GET'])
 @jwt_required()
+@read_replica()
 def get_trade_history():
     """
     Get trade history with filters
@@ -165,13 +229,14 @@ def get_trade_history():
         
         start_date = datetime.utcnow() - timedelta(days=days)
         
-        query = Trade.query.filter_by(user_id=user_id)\
-            .filter(Trade.timestamp >= start_date)
+        # Long ranges also read archived trades
+        source = trade_history(start_date)
+        query = db.select(source).where(source.c.user_id == user_id, source.c.timestamp >= start_date)
         
         if symbol:
-            query = query.filter_by(symbol=symbol)
+            query = query.where(source.c.symbol == symbol)
         
-        trades = query.order_by(Trade.timestamp.desc()).all()
+        trades = db.session.execute(query.order_by(source.c.timestamp.desc(), source.c.id.desc())).all()
         
         # Calculate statistics
         total_trades = len(trades)
@@ -179,7 +244,7 @@ def get_trade_history():
         total_pnl = sum(t.profit_loss or 0 for t in trades)
         
         return jsonify({
-            'trades': [t.to_dict() for t in trades],
+            'trades': [history_row_to_dict(t) for t in trades],
             'statistics': {
                 'total_trades': total_trades,
                 'winning_trades': winning_trades,
@@ -191,45 +256,77 @@ def get_trade_history():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_trades():
+    """
+    Stream trade history as CSV or NDJSON
+    GET /api/trades/export
+    Query params: format (csv, ndjson), days, symbol, status
+    """
+    try:
+        user_id = get_jwt_identity()
+        fmt = request.args.get('format', 'csv')
+        days = request.args.get('days', type=int)
+        
+        if fmt not in TradeExporter.FORMATS:
+            return jsonify({'error': 'Format must be csv or ndjson'}), 400
+        
+        exporter = TradeExporter(
+            user_id,
+            symbol=request.args.get('symbol'),
+            status=request.args.get('status'),
+            start_date=datetime.utcnow() - timedelta(days=days) if days else None
+        )
+        compress = request.accept_encodings['gzip'] > 0
+        
+        headers = {
+            'Content-Disposition': f'attachment; filename=trades.{fmt}',
+            'Vary': 'Accept-Encoding'
+        }
+        if compress:
+            headers['Content-Encoding'] = 'gzip'
+        
+        return Response(
+            stream_with_context(exporter.stream(fmt, compress=compress)),
+            mimetype=TradeExporter.FORMATS[fmt],
+            headers=headers
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @bp.route('/stats', methods=['GET'])
 @jwt_required()
 def get_trade_stats():
     """
     Get trading statistics
     GET /api/trades/stats
+    Query params: symbol, start_date, end_date (YYYY-MM-DD, inclusive)
     """
     try:
         user_id = get_jwt_identity()
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        
+        for value in (start_date, end_date):
+            if value:
+                try:
+                    datetime.strptime(value, '%Y-%m-%d')
+                except ValueError:
+                    raise ValidationError("Dates must be formatted as YYYY-MM-DD")
+        
+        # One aggregate over the daily rollup, cached until the user's trades change
+        stats = AnalyticsService(user_id).get_trade_stats(
+            symbol=request.args.get('symbol'),
+            start_date=start_date,
+            end_date=end_date
+        )
         
-        # Get all filled trades
-        trades = Trade.query.filter_by(user_id=user_id, status='filled').all()
-        
-        if not trades:
-            return jsonify({
-                'total_trades': 0,
-                'winning_trades': 0,
-                'losing_trades': 0,
-                'win_rate': 0,
-                'total_profit': 0,
-                'total_loss': 0,
-                'net_pnl': 0
-            }), 200
-        
-        winning_trades = [t for t in trades if t.profit_loss and t.profit_loss > 0]
-        losing_trades = [t for t in trades if t.profit_loss and t.profit_loss < 0]
-        
-        return jsonify({
-            'total_trades': len(trades),
-            'winning_trades': len(winning_trades),
-            'losing_trades': len(losing_trades),
-            'win_rate': len(winning_trades) / len(trades) * 100,
-            'total_profit': sum(t.profit_loss for t in winning_trades),
-            'total_loss': sum(t.profit_loss for t in losing_trades),
-            'net_pnl': sum(t.profit_loss or 0 for t in trades),
-            'average_win': sum(t.profit_loss for t in winning_trades) / len(winning_trades) if winning_trades else 0,
-            'average_loss': sum(t.profit_loss for t in losing_trades) / len(losing_trades) if losing_trades else 0
-        }), 200
+        return jsonify(stats), 200
         
+    except ValidationError as e:
+        return jsonify({'error': e.message}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -55,6 +55,13 @@ def register_routes(app: Flask, socketio: Optional[object] = None) -> None:
     except Exception:
         pass
 
+    try:
+        from .metrics import metrics_bp
+
+        app.register_blueprint(metrics_bp)
+    except Exception:
+        pass
+
     # Optional: socketio event registration
     if socketio is not None:
         try:
@@ -1,13 +1,16 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
-from ..models import Trade
+from app.models.trade import Trade
+from app.services.portfolio_snapshots import PortfolioSnapshotService
+from app.utils.database import read_replica
 import random
 
 analytics_bp = Blueprint('analytics', __name__)
 
 @analytics_bp.route('/performance', methods=['GET'])
 @jwt_required()
+@read_replica()
 def get_analytics():
     user_id = get_jwt_identity()
     
@@ -31,18 +34,13 @@ def get_analytics():
 
 @analytics_bp.route('/equity-curve', methods=['GET'])
 @jwt_required()
+@read_replica()
 def get_equity_curve():
+    user_id = get_jwt_identity()
     days = int(request.args.get('days', 30))
     
-    curve = []
-    value = 10000
-    
-    for i in range(days):
-        value *= (1 + random.uniform(-0.02, 0.03))
-        curve.append({
-            'date': (datetime.utcnow() - timedelta(days=days-i)).isoformat(),
-            'value': round(value, 2)
-        })
+    # Snapshot series downsampled to at most ~500 points
+    curve = PortfolioSnapshotService().get_equity_curve(user_id, days)
     
     return jsonify(curve), 200
 
@@ -1,24 +1,33 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from datetime import datetime, timedelta
+from app.services.market_feed import market_data_cache, normalize_symbol, DEFAULT_SYMBOLS
 import random
 
 market_bp = Blueprint('market', __name__)
 
+def _quote(symbol, ticker):
+    """Shape a cached ticker as a price quote"""
+    return {
+        'symbol': symbol.upper(),
+        'price': round(ticker['price'], 2),
+        'change': round(ticker.get('change') or 0, 2),
+        'change_percent': round(ticker.get('change_percent') or 0, 2),
+        'volume': round(ticker.get('volume_24h') or 0, 2),
+        'exchange': ticker.get('exchange'),
+        'timestamp': datetime.utcfromtimestamp(ticker['timestamp'] / 1000).isoformat()
+    }
+
 @market_bp.route('/price/<symbol>', methods=['GET'])
 @jwt_required()
 def get_price(symbol):
-    base_price = random.uniform(100, 500)
-    change = random.uniform(-10, 10)
+    ticker = market_data_cache.get_ticker(symbol, request.args.get('exchange'))
+    if not ticker or ticker.get('price') is None:
+        if market_data_cache.request_symbol(symbol) is None:
+            return jsonify({'error': f'Unknown symbol {symbol.upper()}'}), 404
+        return jsonify({'error': f'No market data for {symbol.upper()}'}), 404
     
-    return jsonify({
-        'symbol': symbol.upper(),
-        'price': round(base_price, 2),
-        'change': round(change, 2),
-        'change_percent': round((change / base_price * 100), 2),
-        'volume': round(random.uniform(100000, 1000000), 2),
-        'timestamp': datetime.utcnow().isoformat()
-    }), 200
+    return jsonify(_quote(symbol, ticker)), 200
 
 @market_bp.route('/quotes', methods=['POST'])
 @jwt_required()
@@ -28,31 +37,30 @@ def get_quotes():
     
     quotes = []
     for symbol in symbols:
-        base_price = random.uniform(100, 500)
-        change = random.uniform(-10, 10)
-        quotes.append({
-            'symbol': symbol.upper(),
-            'price': round(base_price, 2),
-            'change': round(change, 2),
-            'change_percent': round((change / base_price * 100), 2),
-            'volume': round(random.uniform(100000, 1000000), 2)
-        })
+        ticker = market_data_cache.get_ticker(symbol)
+        if ticker and ticker.get('price') is not None:
+            quotes.append(_quote(symbol, ticker))
+        else:
+            market_data_cache.request_symbol(symbol)
     
     return jsonify(quotes), 200
 
 @market_bp.route('/orderbook/<symbol>', methods=['GET'])
 @jwt_required()
 def get_orderbook(symbol):
-    base_price = random.uniform(100, 105)
-    
-    bids = [[round(base_price - i * 0.1, 2), round(random.uniform(10, 100), 2)] for i in range(10)]
-    asks = [[round(base_price + i * 0.1, 2), round(random.uniform(10, 100), 2)] for i in range(10)]
+    depth = request.args.get('depth', 10, type=int)
+    book = market_data_cache.get_order_book(symbol, request.args.get('exchange'), depth=depth)
+    if not book:
+        if market_data_cache.request_symbol(symbol) is None:
+            return jsonify({'error': f'Unknown symbol {symbol.upper()}'}), 404
+        return jsonify({'error': f'No order book for {symbol.upper()}'}), 404
     
     return jsonify({
         'symbol': symbol.upper(),
-        'bids': bids,
-        'asks': asks,
-        'timestamp': datetime.utcnow().isoformat()
+        'bids': book['bids'],
+        'asks': book['asks'],
+        'exchange': book.get('exchange'),
+        'timestamp': datetime.utcfromtimestamp(book['timestamp'] / 1000).isoformat()
     }), 200
 
 @market_bp.route('/candles/<symbol>', methods=['GET'])
@@ -90,20 +98,19 @@ def get_candles(symbol):
 @market_bp.route('/ticker', methods=['GET'])
 @jwt_required()
 def get_ticker():
-    symbols = ['BTCUSD', 'ETHUSD', 'BNBUSD', 'SOLUSD', 'ADAUSD']
-    
     tickers = []
-    for symbol in symbols:
-        base_price = random.uniform(100, 1000)
-        change = random.uniform(-50, 50)
+    for symbol in DEFAULT_SYMBOLS:
+        ticker = market_data_cache.get_ticker(symbol)
+        if not ticker or ticker.get('price') is None:
+            continue
         tickers.append({
-            'symbol': symbol,
-            'price': round(base_price, 2),
-            'change': round(change, 2),
-            'change_percent': round((change / base_price * 100), 2),
-            'high_24h': round(base_price + random.uniform(0, 20), 2),
-            'low_24h': round(base_price - random.uniform(0, 20), 2),
-            'volume_24h': round(random.uniform(1000000, 10000000), 2)
+            'symbol': normalize_symbol(symbol),
+            'price': round(ticker['price'], 2),
+            'change': round(ticker.get('change') or 0, 2),
+            'change_percent': round(ticker.get('change_percent') or 0, 2),
+            'high_24h': round(ticker.get('high_24h') or ticker['price'], 2),
+            'low_24h': round(ticker.get('low_24h') or ticker['price'], 2),
+            'volume_24h': round(ticker.get('volume_24h') or 0, 2)
         })
     
-    return jsonify(tickers), 200
\ No newline at end of file
+    return jsonify(tickers), 200
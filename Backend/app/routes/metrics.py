@@ -0,0 +1,12 @@
+from flask import Blueprint, Response
+from app.services.exchange_metrics import exchange_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Exchange call metrics in the Prometheus text format
+    GET /metrics
+    """
+    return Response(exchange_metrics.render(), mimetype='text/plain; version=0.0.4')
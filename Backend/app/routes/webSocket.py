@@ -1,10 +1,14 @@
 from flask_socketio import emit, join_room, leave_room
-import random
 import time
 from threading import Thread
+from app.services.market_feed import market_data_cache, DEFAULT_SYMBOLS
 
 def register_socketio_events(socketio):
     
+    # Symbols clients of this process have subscribed to
+    default_symbols = set(s.replace('/', '') for s in DEFAULT_SYMBOLS)
+    subscribed_symbols = set(default_symbols)
+    
     @socketio.on('connect')
     def handle_connect():
         print(f'Client connected')
@@ -21,7 +25,11 @@ def register_socketio_events(socketio):
     def handle_subscribe(data):
         symbol = data.get('symbol', '').upper()
         if symbol:
+            if market_data_cache.request_symbol(symbol) is None:
+                emit('error', {'message': f'Cannot subscribe to {symbol} market data'})
+                return
             join_room(f'market_{symbol}')
+            subscribed_symbols.add(symbol)
             emit('subscribed', {
                 'symbol': symbol,
                 'message': f'Subscribed to {symbol} market data'
@@ -55,40 +63,57 @@ def register_socketio_events(socketio):
                 'message': 'Subscribed to portfolio updates'
             })
     
+    def refresh_subscriptions():
+        # Keep feed subscriptions alive while a room has members, drop empty rooms
+        for symbol in list(subscribed_symbols - default_symbols):
+            if next(socketio.server.manager.get_participants('/', f'market_{symbol}'), None) is None:
+                subscribed_symbols.discard(symbol)
+            else:
+                market_data_cache.request_symbol(symbol)
+    
     def broadcast_market_data():
-        symbols = ['BTCUSD', 'ETHUSD', 'BNBUSD', 'SOLUSD', 'ADAUSD']
-        prices = {s: random.uniform(100, 1000) for s in symbols}
+        last_sent = {}
+        last_refresh = time.monotonic()
         
         while True:
-            for symbol in symbols:
-                # Simulate price movement
-                change = random.uniform(-5, 5)
-                prices[symbol] += change
-                prices[symbol] = max(prices[symbol], 50)  # Minimum price
+            if time.monotonic() - last_refresh >= market_data_cache.subscription_ttl / 2:
+                refresh_subscriptions()
+                last_refresh = time.monotonic()
+            
+            for symbol in list(subscribed_symbols):
+                ticker = market_data_cache.get_ticker(symbol)
+                if not ticker or ticker.get('price') is None:
+                    continue
+                if last_sent.get(symbol) == ticker.get('timestamp'):
+                    continue
+                last_sent[symbol] = ticker.get('timestamp')
                 
                 socketio.emit('market_update', {
                     'symbol': symbol,
-                    'price': round(prices[symbol], 2),
-                    'change': round(change, 2),
-                    'change_percent': round((change / prices[symbol] * 100), 2),
-                    'volume': round(random.uniform(1000, 10000), 2),
-                    'timestamp': time.time()
+                    'price': round(ticker['price'], 2),
+                    'change': round(ticker.get('change') or 0, 2),
+                    'change_percent': round(ticker.get('change_percent') or 0, 2),
+                    'volume': round(ticker.get('volume_24h') or 0, 2),
+                    'timestamp': ticker['timestamp'] / 1000
                 }, room=f'market_{symbol}')
             
             time.sleep(1)
     
     def broadcast_orderbook_updates():
-        symbols = ['BTCUSD', 'ETHUSD', 'BNBUSD']
+        last_sent = {}
         
         while True:
-            for symbol in symbols:
-                base_price = random.uniform(100, 200)
+            for symbol in list(subscribed_symbols):
+                book = market_data_cache.get_order_book(symbol, depth=5)
+                if not book or last_sent.get(symbol) == book.get('timestamp'):
+                    continue
+                last_sent[symbol] = book.get('timestamp')
                 
                 orderbook = {
                     'symbol': symbol,
-                    'bids': [[round(base_price - i * 0.1, 2), round(random.uniform(1, 10), 2)] for i in range(5)],
-                    'asks': [[round(base_price + i * 0.1, 2), round(random.uniform(1, 10), 2)] for i in range(5)],
-                    'timestamp': time.time()
+                    'bids': book['bids'],
+                    'asks': book['asks'],
+                    'timestamp': book['timestamp'] / 1000
                 }
                 
                 socketio.emit('orderbook_update', orderbook, room=f'market_{symbol}')
@@ -3,6 +3,8 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.workflow import Workflow, WorkflowExecution
 from app.services.workflow_executor import WorkflowExecutor
+from app.utils.exception import ValidationError
+from app.utils.pagination import keyset_page, approximate_count
 from datetime import datetime
 
 bp = Blueprint('workflows', __name__)
@@ -11,26 +13,30 @@ bp = Blueprint('workflows', __name__)
 @jwt_required()
 def get_workflows():
     """
-    Get all workflows for current user
+    Get all workflows for current user, newest first
     GET /api/workflows
-    Query params: page, per_page
+    Query params: cursor, per_page, include_total
     """
     try:
         user_id = get_jwt_identity()
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        cursor = request.args.get('cursor')
+        per_page = min(request.args.get('per_page', 20, type=int), 100)
         
-        workflows = Workflow.query.filter_by(user_id=user_id)\
-            .order_by(Workflow.created_at.desc())\
-            .paginate(page=page, per_page=per_page, error_out=False)
+        query = Workflow.query.filter_by(user_id=user_id)
+        workflows, next_cursor = keyset_page(query, (Workflow.created_at, Workflow.id), cursor, per_page)
         
-        return jsonify({
-            'workflows': [w.to_dict() for w in workflows.items],
-            'total': workflows.total,
-            'pages': workflows.pages,
-            'current_page': workflows.page
-        }), 200
+        result = {
+            'workflows': [w.to_dict() for w in workflows],
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }
+        if request.args.get('include_total') == 'true':
+            result['total'], result['total_exact'] = approximate_count(query)
+        
+        return jsonify(result), 200
         
+    except ValidationError as e:
+        return jsonify({'error': e.message}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
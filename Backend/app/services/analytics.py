@@ -1,8 +1,12 @@
-from app.models.trade import Trade
+from app.models.trade_daily_stat import TradeDailyStat
 from app.models.position import Position
 from app.models.user import User
 from app.models.workflow import Workflow
-from sqlalchemy import func, extract
+from app.services.analytics_cache import cached_analytics
+from app.services.platform_benchmark import platform_benchmark
+from app.services.trade_archive import trade_history
+from app import db
+from sqlalchemy import func, extract, case, cast, Integer
 from datetime import datetime, timedelta
 import logging
 
@@ -24,6 +28,7 @@ class AnalyticsService:
         if not self.user:
             raise ValueError("User not found")
     
+    @cached_analytics('performance')
     def get_trading_performance(self, timeframe='1M'):
         """
         Get comprehensive trading performance
@@ -50,49 +55,58 @@ class AnalyticsService:
         else:  # ALL
             start_date = datetime(2020, 1, 1)
         
-        # Get trades in timeframe
-        trades = Trade.query.filter(
-            Trade.user_id == self.user_id,
-            Trade.timestamp >= start_date,
-            Trade.status == 'filled'
-        ).all()
-        
-        if not trades:
+        # Aggregate trades in timeframe in the database (hot and archived)
+        trades = trade_history(start_date)
+        filters = self._filled_filters(trades, start_date)
+        is_win = trades.c.profit_loss > 0
+        is_loss = trades.c.profit_loss < 0
+        
+        row = db.session.query(
+            func.count(trades.c.id).label('trades'),
+            func.sum(case((is_win, 1), else_=0)).label('winning'),
+            func.sum(case((is_loss, 1), else_=0)).label('losing'),
+            func.sum(case((is_win, trades.c.profit_loss), else_=0)).label('profit'),
+            func.sum(case((is_loss, trades.c.profit_loss), else_=0)).label('loss'),
+            func.max(case((is_win, trades.c.profit_loss))).label('largest_win'),
+            func.min(case((is_loss, trades.c.profit_loss))).label('largest_loss')
+        ).filter(*filters).one()
+        
+        if not row.trades:
             return self._empty_performance()
         
         # Calculate metrics
-        winning_trades = [t for t in trades if t.profit_loss and t.profit_loss > 0]
-        losing_trades = [t for t in trades if t.profit_loss and t.profit_loss < 0]
+        winning_count = row.winning or 0
+        losing_count = row.losing or 0
         
-        total_profit = sum(t.profit_loss for t in winning_trades)
-        total_loss = abs(sum(t.profit_loss for t in losing_trades))
+        total_profit = row.profit or 0
+        total_loss = abs(row.loss or 0)
         net_pnl = total_profit - total_loss
         
         # Calculate consecutive wins/losses
-        max_consecutive_wins = self._calculate_consecutive(trades, 'wins')
-        max_consecutive_losses = self._calculate_consecutive(trades, 'losses')
+        max_consecutive_wins, max_consecutive_losses = self._calculate_consecutive(trades, filters)
         
         return {
             'timeframe': timeframe,
             'start_date': start_date.isoformat(),
             'end_date': end_date.isoformat(),
-            'total_trades': len(trades),
-            'winning_trades': len(winning_trades),
-            'losing_trades': len(losing_trades),
-            'win_rate': (len(winning_trades) / len(trades) * 100) if trades else 0,
+            'total_trades': row.trades,
+            'winning_trades': winning_count,
+            'losing_trades': losing_count,
+            'win_rate': winning_count / row.trades * 100,
             'total_profit': total_profit,
             'total_loss': total_loss,
             'net_pnl': net_pnl,
-            'avg_win': total_profit / len(winning_trades) if winning_trades else 0,
-            'avg_loss': total_loss / len(losing_trades) if losing_trades else 0,
+            'avg_win': total_profit / winning_count if winning_count else 0,
+            'avg_loss': total_loss / losing_count if losing_count else 0,
             'profit_factor': total_profit / total_loss if total_loss > 0 else 0,
-            'largest_win': max([t.profit_loss for t in winning_trades]) if winning_trades else 0,
-            'largest_loss': min([t.profit_loss for t in losing_trades]) if losing_trades else 0,
+            'largest_win': row.largest_win if winning_count else 0,
+            'largest_loss': row.largest_loss if losing_count else 0,
             'max_consecutive_wins': max_consecutive_wins,
             'max_consecutive_losses': max_consecutive_losses,
-            'avg_trade_duration': self._calculate_avg_trade_duration(trades)
+            'avg_trade_duration': self._calculate_avg_trade_duration(row.trades)
         }
     
+    @cached_analytics('symbols')
     def get_symbol_performance(self):
         """
         Get performance breakdown by trading symbol
@@ -100,49 +114,31 @@ class AnalyticsService:
         Returns:
             List of symbol performance dicts
         """
-        trades = Trade.query.filter_by(
-            user_id=self.user_id,
-            status='filled'
-        ).all()
-        
-        symbol_stats = {}
-        
-        for trade in trades:
-            if trade.symbol not in symbol_stats:
-                symbol_stats[trade.symbol] = {
-                    'trades': 0,
-                    'winning': 0,
-                    'losing': 0,
-                    'profit': 0,
-                    'volume': 0
-                }
-            
-            symbol_stats[trade.symbol]['trades'] += 1
-            symbol_stats[trade.symbol]['volume'] += trade.quantity * trade.price
-            
-            if trade.profit_loss:
-                symbol_stats[trade.symbol]['profit'] += trade.profit_loss
-                if trade.profit_loss > 0:
-                    symbol_stats[trade.symbol]['winning'] += 1
-                else:
-                    symbol_stats[trade.symbol]['losing'] += 1
+        rows = db.session.query(
+            TradeDailyStat.symbol,
+            *self._rollup_columns(),
+            func.sum(TradeDailyStat.volume).label('volume')
+        ).filter(
+            TradeDailyStat.user_id == self.user_id
+        ).group_by(TradeDailyStat.symbol).having(func.sum(TradeDailyStat.trades) > 0).all()
         
         # Convert to list with calculated metrics
         result = []
-        for symbol, stats in symbol_stats.items():
+        for row in rows:
             result.append({
-                'symbol': symbol,
-                'trades': stats['trades'],
-                'winning_trades': stats['winning'],
-                'losing_trades': stats['losing'],
-                'win_rate': (stats['winning'] / stats['trades'] * 100) if stats['trades'] > 0 else 0,
-                'total_profit': stats['profit'],
-                'total_volume': stats['volume']
+                'symbol': row.symbol,
+                'trades': row.trades,
+                'winning_trades': row.winning,
+                'losing_trades': row.losing,
+                'win_rate': (row.winning / row.trades * 100) if row.trades > 0 else 0,
+                'total_profit': row.profit,
+                'total_volume': row.volume
             })
         
         # Sort by profit
         return sorted(result, key=lambda x: x['total_profit'], reverse=True)
     
+    @cached_analytics('monthly')
     def get_monthly_performance(self):
         """
         Get monthly performance breakdown
@@ -150,47 +146,30 @@ class AnalyticsService:
         Returns:
             List of monthly performance dicts
         """
-        trades = Trade.query.filter_by(
-            user_id=self.user_id,
-            status='filled'
-        ).all()
+        month = self._month_bucket(TradeDailyStat.day).label('month')
         
-        monthly_stats = {}
-        
-        for trade in trades:
-            month_key = trade.timestamp.strftime('%Y-%m')
-            
-            if month_key not in monthly_stats:
-                monthly_stats[month_key] = {
-                    'trades': 0,
-                    'profit': 0,
-                    'winning': 0,
-                    'losing': 0
-                }
-            
-            monthly_stats[month_key]['trades'] += 1
-            
-            if trade.profit_loss:
-                monthly_stats[month_key]['profit'] += trade.profit_loss
-                if trade.profit_loss > 0:
-                    monthly_stats[month_key]['winning'] += 1
-                else:
-                    monthly_stats[month_key]['losing'] += 1
+        rows = db.session.query(
+            month,
+            *self._rollup_columns()
+        ).filter(
+            TradeDailyStat.user_id == self.user_id
+        ).group_by(month).having(func.sum(TradeDailyStat.trades) > 0).order_by(month).all()
         
         # Convert to list
         result = []
-        for month, stats in sorted(monthly_stats.items()):
+        for row in rows:
             result.append({
-                'month': month,
-                'trades': stats['trades'],
-                'winning_trades': stats['winning'],
-                'losing_trades': stats['losing'],
-                'win_rate': (stats['winning'] / stats['trades'] * 100) if stats['trades'] > 0 else 0,
-                'profit': stats['profit']
+                'month': row.month,
+                'trades': row.trades,
+                'winning_trades': row.winning,
+                'losing_trades': row.losing,
+                'win_rate': (row.winning / row.trades * 100) if row.trades > 0 else 0,
+                'profit': row.profit
             })
         
         return result
     
+    @cached_analytics('time')
     def get_time_analysis(self):
         """
         Analyze trading performance by time of day and day of week
@@ -198,30 +177,41 @@ class AnalyticsService:
         Returns:
             Dict with hourly and daily breakdowns
         """
-        trades = Trade.query.filter_by(
-            user_id=self.user_id,
-            status='filled'
-        ).all()
+        trades = trade_history()
+        hour = extract('hour', trades.c.timestamp).label('hour')
+        weekday = self._weekday(TradeDailyStat.day).label('weekday')
+        
+        # The rollup is daily, so hours still come from trades (24 rows)
+        hour_rows = db.session.query(
+            hour,
+            func.count(trades.c.id).label('trades'),
+            func.coalesce(func.sum(trades.c.profit_loss), 0).label('profit'),
+            func.sum(case((trades.c.profit_loss > 0, 1), else_=0)).label('winning')
+        ).filter(*self._filled_filters(trades)).group_by(hour).all()
+        
+        day_rows = db.session.query(
+            weekday,
+            *self._rollup_columns()
+        ).filter(
+            TradeDailyStat.user_id == self.user_id
+        ).group_by(weekday).having(func.sum(TradeDailyStat.trades) > 0).all()
         
         # Initialize stats
         hour_stats = {i: {'trades': 0, 'profit': 0, 'winning': 0} for i in range(24)}
         day_stats = {i: {'trades': 0, 'profit': 0, 'winning': 0} for i in range(7)}
         
         # Aggregate data
-        for trade in trades:
-            hour = trade.timestamp.hour
-            day = trade.timestamp.weekday()
-            
-            hour_stats[hour]['trades'] += 1
-            day_stats[day]['trades'] += 1
-            
-            if trade.profit_loss:
-                hour_stats[hour]['profit'] += trade.profit_loss
-                day_stats[day]['profit'] += trade.profit_loss
-                
-                if trade.profit_loss > 0:
-                    hour_stats[hour]['winning'] += 1
-                    day_stats[day]['winning'] += 1
+        for row in hour_rows:
+            stats = hour_stats[int(row.hour)]
+            stats['trades'] += row.trades
+            stats['profit'] += row.profit
+            stats['winning'] += row.winning
+        
+        for row in day_rows:
+            stats = day_stats[int(row.weekday)]
+            stats['trades'] += row.trades
+            stats['profit'] += row.profit
+            stats['winning'] += row.winning
         
         # Calculate win rates
         for hour in hour_stats:
@@ -246,8 +236,8 @@ class AnalyticsService:
                 {'day': day_names[d], 'day_number': d, **stats} 
                 for d, stats in day_stats.items()
             ],
-            'best_trading_hour': max(hour_stats.items(), key=lambda x: x[1]['profit'])[0] if trades else None,
-            'best_trading_day': day_names[max(day_stats.items(), key=lambda x: x[1]['profit'])[0]] if trades else None
+            'best_trading_hour': max(hour_stats.items(), key=lambda x: x[1]['profit'])[0] if hour_rows else None,
+            'best_trading_day': day_names[max(day_stats.items(), key=lambda x: x[1]['profit'])[0]] if day_rows else None
         }
     
     def get_risk_metrics(self):
@@ -261,6 +251,7 @@ class AnalyticsService:
         risk_manager = RiskManager(self.user_id)
         return risk_manager.get_risk_metrics()
     
+    @cached_analytics('workflows')
     def get_workflow_analytics(self):
         """
         Get workflow performance analytics
@@ -268,37 +259,103 @@ class AnalyticsService:
         Returns:
             Workflow analytics dict
         """
-        workflows = Workflow.query.filter_by(user_id=self.user_id).all()
+        # One row per workflow with its filled trades aggregated (ix_trades_workflow_status)
+        trades = trade_history()
+        rows = db.session.query(
+            Workflow.id,
+            Workflow.name,
+            Workflow.is_active,
+            func.count(trades.c.id).label('trades'),
+            func.sum(case((trades.c.profit_loss > 0, 1), else_=0)).label('winning'),
+            func.coalesce(func.sum(trades.c.profit_loss), 0).label('pnl')
+        ).outerjoin(
+            trades, (trades.c.workflow_id == Workflow.id) & (trades.c.status == 'filled')
+        ).filter(
+            Workflow.user_id == self.user_id
+        ).group_by(Workflow.id, Workflow.name, Workflow.is_active).order_by(Workflow.id).all()
         
         analytics = {
-            'total_workflows': len(workflows),
-            'active_workflows': len([w for w in workflows if w.is_active]),
+            'total_workflows': len(rows),
+            'active_workflows': len([r for r in rows if r.is_active]),
             'workflows': []
         }
         
-        for workflow in workflows:
-            # Get trades generated by this workflow
-            workflow_trades = Trade.query.filter_by(
-                workflow_id=workflow.id,
-                status='filled'
-            ).all()
-            
-            if workflow_trades:
-                winning = [t for t in workflow_trades if t.profit_loss and t.profit_loss > 0]
-                total_pnl = sum(t.profit_loss or 0 for t in workflow_trades)
-                
+        for row in rows:
+            if row.trades:
                 analytics['workflows'].append({
-                    'id': workflow.id,
-                    'name': workflow.name,
-                    'is_active': workflow.is_active,
-                    'total_trades': len(workflow_trades),
-                    'winning_trades': len(winning),
-                    'win_rate': (len(winning) / len(workflow_trades) * 100) if workflow_trades else 0,
-                    'total_pnl': total_pnl
+                    'id': row.id,
+                    'name': row.name,
+                    'is_active': row.is_active,
+                    'total_trades': row.trades,
+                    'winning_trades': row.winning,
+                    'win_rate': row.winning / row.trades * 100,
+                    'total_pnl': row.pnl
                 })
         
         return analytics
-    
+
+    @cached_analytics('trade_stats')
+    def get_trade_stats(self, symbol=None, start_date=None, end_date=None):
+        """
+        Get win/loss statistics of filled trades in one aggregate query
+
+        Args:
+            symbol: Only this symbol (optional)
+            start_date: First day included, 'YYYY-MM-DD' (optional)
+            end_date: Last day included, 'YYYY-MM-DD' (optional)
+
+        Returns:
+            Trade statistics dict
+        """
+        filters = [TradeDailyStat.user_id == self.user_id]
+        if symbol:
+            filters.append(TradeDailyStat.symbol == symbol)
+        if start_date:
+            filters.append(TradeDailyStat.day >= datetime.strptime(start_date, '%Y-%m-%d').date())
+        if end_date:
+            filters.append(TradeDailyStat.day <= datetime.strptime(end_date, '%Y-%m-%d').date())
+
+        stats = db.session.query(
+            func.sum(TradeDailyStat.trades).label('trades'),
+            func.sum(TradeDailyStat.wins).label('wins'),
+            func.sum(TradeDailyStat.losses).label('losses'),
+            func.sum(TradeDailyStat.gross_profit).label('profit'),
+            func.sum(TradeDailyStat.gross_loss).label('loss'),
+            func.max(TradeDailyStat.largest_win).label('largest_win'),
+            func.min(TradeDailyStat.largest_loss).label('largest_loss')
+        ).filter(*filters).one()
+
+        if not stats.trades:
+            return {
+                'total_trades': 0,
+                'winning_trades': 0,
+                'losing_trades': 0,
+                'win_rate': 0,
+                'total_profit': 0,
+                'total_loss': 0,
+                'net_pnl': 0,
+                'average_win': 0,
+                'average_loss': 0,
+                'average_pnl': 0,
+                'largest_win': 0,
+                'largest_loss': 0
+            }
+
+        return {
+            'total_trades': stats.trades,
+            'winning_trades': stats.wins,
+            'losing_trades': stats.losses,
+            'win_rate': stats.wins / stats.trades * 100,
+            'total_profit': stats.profit,
+            'total_loss': stats.loss,
+            'net_pnl': stats.profit + stats.loss,
+            'average_win': stats.profit / stats.wins if stats.wins else 0,
+            'average_loss': stats.loss / stats.losses if stats.losses else 0,
+            'average_pnl': (stats.profit + stats.loss) / stats.trades,
+            'largest_win': stats.largest_win or 0,
+            'largest_loss': stats.largest_loss or 0
+        }
+
     def get_comparison_metrics(self, compare_user_id=None):
         """
         Get comparison metrics (self vs average or vs specific user)
@@ -313,9 +370,12 @@ class AnalyticsService:
         own_performance = self.get_trading_performance('ALL')
         
         if compare_user_id:
-            # Compare with specific user
-            compare_service = AnalyticsService(compare_user_id)
-            compare_performance = compare_service.get_trading_performance('ALL')
+            # Compare with the specific user's summary from the benchmark run
+            compare_performance = platform_benchmark.get_user_summary(compare_user_id)
+            if compare_performance is None:
+                if not User.query.get(compare_user_id):
+                    raise ValueError("User not found")
+                compare_performance = self._empty_performance()
             comparison_label = f"User {compare_user_id}"
         else:
             # Compare with platform average
@@ -350,47 +410,83 @@ class AnalyticsService:
             'largest_loss': 0
         }
     
-    def _calculate_consecutive(self, trades, type='wins'):
-        """Calculate maximum consecutive wins or losses"""
-        if not trades:
-            return 0
-        
-        sorted_trades = sorted(trades, key=lambda t: t.timestamp)
-        max_consecutive = 0
-        current_consecutive = 0
-        
-        for trade in sorted_trades:
-            if not trade.profit_loss:
-                continue
-            
-            if type == 'wins':
-                is_match = trade.profit_loss > 0
-            else:
-                is_match = trade.profit_loss < 0
-            
-            if is_match:
-                current_consecutive += 1
-                max_consecutive = max(max_consecutive, current_consecutive)
-            else:
-                current_consecutive = 0
+    def _filled_filters(self, trades, start_date=None):
+        """Filters selecting the user's filled trades from a trade_history() source"""
+        filters = [trades.c.user_id == self.user_id, trades.c.status == 'filled']
+        if start_date is not None:
+            filters.append(trades.c.timestamp >= start_date)
+        return filters
+    
+    def _rollup_columns(self):
+        """Summed trade counters of trade_daily_stats rows"""
+        return (
+            func.sum(TradeDailyStat.trades).label('trades'),
+            func.sum(TradeDailyStat.wins).label('winning'),
+            func.sum(TradeDailyStat.losses).label('losing'),
+            func.sum(TradeDailyStat.gross_profit + TradeDailyStat.gross_loss).label('profit')
+        )
+    
+    def _dialect(self):
+        return db.session.get_bind().dialect.name
+    
+    def _month_bucket(self, column):
+        """'YYYY-MM' label of a date or timestamp in the database's dialect"""
+        dialect = self._dialect()
+        if dialect == 'postgresql':
+            return func.to_char(func.date_trunc('month', column), 'YYYY-MM')
+        if dialect in ('mysql', 'mariadb'):
+            return func.date_format(column, '%Y-%m')
+        return func.strftime('%Y-%m', column)
+    
+    def _weekday(self, column):
+        """Day of week of a date or timestamp with Monday = 0, like datetime.weekday()"""
+        if self._dialect() in ('mysql', 'mariadb'):
+            return func.weekday(column)
+        # dow counts from Sunday = 0
+        return (cast(extract('dow', column), Integer) + 6) % 7
+    
+    def _calculate_consecutive(self, trades, filters):
+        """
+        Calculate maximum consecutive wins and losses
+        
+        Runs of equal outcome are found with window functions (gaps and
+        islands); trades without profit or loss neither extend nor break a
+        streak.
         
-        return max_consecutive
+        Returns:
+            Tuple of (max consecutive wins, max consecutive losses)
+        """
+        outcome = case((trades.c.profit_loss > 0, 1), else_=-1)
+        ordering = (trades.c.timestamp, trades.c.id)
+        
+        outcomes = db.session.query(
+            outcome.label('outcome'),
+            (
+                func.row_number().over(order_by=ordering) -
+                func.row_number().over(partition_by=outcome, order_by=ordering)
+            ).label('run')
+        ).filter(
+            *filters,
+            trades.c.profit_loss.isnot(None),
+            trades.c.profit_loss != 0
+        ).subquery()
+        
+        runs = db.session.query(
+            outcomes.c.outcome,
+            func.count().label('length')
+        ).group_by(outcomes.c.outcome, outcomes.c.run).subquery()
+        
+        longest = dict(
+            db.session.query(runs.c.outcome, func.max(runs.c.length)).group_by(runs.c.outcome).all()
+        )
+        return longest.get(1, 0), longest.get(-1, 0)
     
-    def _calculate_avg_trade_duration(self, trades):
+    def _calculate_avg_trade_duration(self, trade_count):
         """Calculate average trade duration in hours"""
         
         return 2.5  # Default 2.5 hours
     
     def _get_platform_average(self):
-        """Get platform-wide average performance"""
-      
-        return {
-            'total_trades': 100,
-            'winning_trades': 55,
-            'losing_trades': 45,
-            'win_rate': 55.0,
-            'total_profit': 5500,
-            'total_loss': 4500,
-            'net_pnl': 1000,
-            'profit_factor': 1.22
-        }
\ No newline at end of file
+        """Get platform-wide average performance from the latest benchmark snapshot"""
+        
+        return platform_benchmark.get_snapshot()['average']
\ No newline at end of file
@@ -0,0 +1,151 @@
+import functools
+import json
+import logging
+import math
+import os
+import redis
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app import redis_client
+from app.models.position import Position
+from app.models.trade import Trade
+from app.models.workflow import Workflow
+from app.utils.cache import SingleFlightCache
+from app.utils.database import read_replica, replica_monitor
+
+logger = logging.getLogger(__name__)
+
+# Attributes whose change alters a user's analytics, per model (None = any)
+TRACKED_FIELDS = {
+    Trade: ['status', 'profit_loss', 'symbol', 'workflow_id', 'timestamp', 'quantity', 'price'],
+    Workflow: ['name', 'is_active'],
+    Position: None,
+}
+
+# session.info key collecting users whose analytics changed in the transaction
+PENDING_KEY = 'analytics_dirty_users'
+
+
+class AnalyticsCache:
+    """
+    Per-user analytics cache with versioned keys
+
+    Every cache key embeds the user's version counter. Writes that change a
+    user's analytics bump the counter after commit, so later reads miss and
+    recompute while entries under old versions simply expire.
+    """
+
+    def __init__(self, client=None, ttl=None):
+        """
+        Initialize analytics cache
+
+        Args:
+            client: Redis client (defaults to the app client)
+            ttl: Seconds a result is reused; bounds drift of rolling timeframes
+        """
+        self.client = client or redis_client
+        self.ttl = ttl or int(os.getenv('ANALYTICS_CACHE_TTL', 300))
+        self.cache = SingleFlightCache(self.client, stale_ttl=30)
+
+    def version(self, user_id):
+        """Current analytics version of a user, or None if Redis is unavailable"""
+        try:
+            return int(self.client.get(f'analytics_version:{user_id}') or 0)
+        except redis.RedisError as e:
+            logger.warning(f"Analytics cache unavailable: {str(e)}")
+            return None
+
+    def bump(self, *user_ids):
+        """Invalidate every cached result of these users"""
+        user_ids = {u for u in user_ids if u is not None}
+        if not user_ids:
+            return
+        try:
+            # Recomputes read the primary until replicas have the write
+            fresh_for = math.ceil(replica_monitor.max_lag) + 1
+            pipe = self.client.pipeline(transaction=False)
+            for user_id in user_ids:
+                pipe.incr(f'analytics_version:{user_id}')
+                pipe.set(f'analytics_changed:{user_id}', 1, ex=fresh_for)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Failed to invalidate analytics for users {sorted(user_ids)}: {str(e)}")
+
+    def recently_changed(self, user_id):
+        """Whether the user's analytics changed too recently for a lagging replica"""
+        try:
+            return bool(self.client.exists(f'analytics_changed:{user_id}'))
+        except redis.RedisError:
+            return True
+
+    def get_or_compute(self, user_id, name, compute, *args):
+        """
+        Cached result of an analytics computation
+
+        Args:
+            user_id: User the result belongs to
+            name: Computation name
+            compute: Callable producing a JSON-serializable result
+            args: Arguments the result depends on (part of the key)
+        """
+        version = self.version(user_id)
+        if version is None:
+            return compute()
+
+        key = f'analytics:{user_id}:v{version}:{name}'
+        if args:
+            key += ':' + json.dumps(args, separators=(',', ':'))
+        return self.cache.get_or_load(key, compute, self.ttl)
+
+
+analytics_cache = AnalyticsCache()
+
+
+def cached_analytics(name):
+    """
+    Cache an AnalyticsService method per user, version and arguments;
+    misses are computed on the read replica
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            def compute():
+                with read_replica(enabled=not analytics_cache.recently_changed(self.user_id)):
+                    return method(self, *args, **kwargs)
+            return analytics_cache.get_or_compute(
+                self.user_id, name, compute, *args, *sorted(kwargs.items())
+            )
+        return wrapper
+    return decorator
+
+
+def _changed(obj, fields):
+    if fields is None:
+        return True
+    state = inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_dirty_users(session, flush_context):
+    """Remember users whose analytics inputs were written in this transaction"""
+    users = session.info.setdefault(PENDING_KEY, set())
+    for obj in session.new | session.deleted:
+        if type(obj) in TRACKED_FIELDS:
+            users.add(obj.user_id)
+    for obj in session.dirty:
+        fields = TRACKED_FIELDS.get(type(obj), False)
+        if fields is not False and session.is_modified(obj, include_collections=False) and _changed(obj, fields):
+            users.add(obj.user_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_dirty_users(session):
+    users = session.info.pop(PENDING_KEY, None)
+    if users:
+        analytics_cache.bump(*users)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_dirty_users(session):
+    session.info.pop(PENDING_KEY, None)
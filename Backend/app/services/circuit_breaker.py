@@ -0,0 +1,143 @@
+import ccxt
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+from app.utils.exception import CircuitOpenException
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the endpoint is unhealthy (not that the request was bad)
+FAILURE_ERRORS = (ccxt.NetworkError, concurrent.futures.TimeoutError, TimeoutError)
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over a rolling error-rate window"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=0.5, min_requests=10, window=30,
+                 reset_timeout=15, half_open_max_calls=1):
+        """
+        Initialize circuit breaker
+
+        Args:
+            name: Label used in logs and errors
+            failure_threshold: Error rate within the window that opens the circuit
+            min_requests: Calls needed in the window before it can open
+            window: Rolling window in seconds
+            reset_timeout: Seconds the circuit stays open before probing
+            half_open_max_calls: Concurrent probe calls while half-open
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.min_requests = min_requests
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = self.CLOSED
+        self._lock = threading.Lock()
+        self._buckets = {}  # second -> [calls, failures]
+        self._opened_at = 0
+        self._probes = 0
+
+    def before_call(self):
+        """
+        Admit or reject a call
+
+        Raises:
+            CircuitOpenException: If the circuit is open
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenException(f"Circuit open for {self.name}")
+                self.state = self.HALF_OPEN
+                self._probes = 0
+            if self._probes >= self.half_open_max_calls:
+                raise CircuitOpenException(f"Circuit half-open for {self.name}, probe in flight")
+            self._probes += 1
+
+    def release(self):
+        """Give back an admitted call that never reached the exchange"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probes = max(self._probes - 1, 0)
+
+    def record(self, error=None):
+        """Record a call outcome; only endpoint-health errors count as failures"""
+        failed = error is not None and isinstance(error, FAILURE_ERRORS)
+        now = time.monotonic()
+
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probes = max(self._probes - 1, 0)
+                if failed:
+                    self._open(now)
+                else:
+                    logger.info(f"Circuit closed for {self.name}")
+                    self.state = self.CLOSED
+                    self._buckets = {}
+                return
+
+            second = int(now)
+            bucket = self._buckets.get(second)
+            if bucket is None:
+                bucket = self._buckets[second] = [0, 0]
+                if len(self._buckets) > self.window:
+                    horizon = second - self.window
+                    self._buckets = {s: b for s, b in self._buckets.items() if s > horizon}
+            bucket[0] += 1
+            if not failed:
+                return
+            bucket[1] += 1
+            if self.state != self.CLOSED:
+                return
+
+            horizon = second - self.window
+            calls = failures = 0
+            for s, (c, f) in self._buckets.items():
+                if s > horizon:
+                    calls += c
+                    failures += f
+            if calls >= self.min_requests and failures / calls >= self.failure_threshold:
+                self._open(now)
+
+    def _open(self, now):
+        if self.state != self.OPEN:
+            logger.warning(f"Circuit opened for {self.name}")
+        self.state = self.OPEN
+        self._opened_at = now
+        self._buckets = {}
+
+
+class CircuitBreakerRegistry:
+    """One breaker per (exchange, endpoint), created on first use"""
+
+    def __init__(self, **options):
+        self.enabled = os.getenv('EXCHANGE_CIRCUIT_BREAKER_ENABLED', 'true').lower() == 'true'
+        self.options = options
+        self._lock = threading.Lock()
+        self._breakers = {}
+
+    def get(self, exchange_name, endpoint):
+        key = (exchange_name, endpoint)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    key, CircuitBreaker(f'{exchange_name}:{endpoint}', **self.options)
+                )
+        return breaker
+
+    def states(self):
+        """Current state of every breaker"""
+        return {f'{e}:{m}': b.state for (e, m), b in self._breakers.items()}
+
+
+circuit_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,231 @@
+import asyncio
+import ccxt.async_support as ccxt_async
+import logging
+import os
+import threading
+import time
+from app.services.exchange_metrics import exchange_metrics
+from app.services.exchange_simulator import AsyncSimulatedExchange
+
+logger = logging.getLogger(__name__)
+
+# Route ExchangeService calls through the shared event loop when enabled
+GATEWAY_ENABLED = os.getenv('EXCHANGE_GATEWAY_ENABLED', 'false').lower() == 'true'
+
+
+class ExchangeGateway:
+    """Asyncio exchange gateway multiplexing ccxt calls on one event loop"""
+
+    def __init__(self, max_in_flight=None, call_timeout=None, client_ttl=None):
+        """
+        Initialize exchange gateway
+
+        Args:
+            max_in_flight: Maximum concurrent requests across all exchanges
+            call_timeout: Seconds a synchronous caller waits for a result
+            client_ttl: Seconds a client is reused before it is rebuilt with
+                fresh credentials
+        """
+        self.max_in_flight = max_in_flight or int(os.getenv('EXCHANGE_GATEWAY_MAX_IN_FLIGHT', 2000))
+        self.call_timeout = call_timeout or float(os.getenv('EXCHANGE_GATEWAY_CALL_TIMEOUT', 35))
+        self.client_ttl = client_ttl or float(os.getenv('EXCHANGE_GATEWAY_CLIENT_TTL', 300))
+        self._lock = threading.Lock()
+        self._loop = None
+        self._pid = None
+        self._semaphore = None
+        self._clients = {}
+        self._created_at = {}
+
+    def _ensure_loop(self):
+        """Start the event loop thread (again after a fork) and return the loop"""
+        pid = os.getpid()
+        if self._loop is not None and self._pid == pid:
+            return self._loop
+
+        with self._lock:
+            if self._loop is None or self._pid != pid:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    self._semaphore = asyncio.Semaphore(self.max_in_flight)
+                    ready.set()
+                    loop.run_forever()
+
+                threading.Thread(target=run, name='exchange-gateway', daemon=True).start()
+                ready.wait()
+
+                # Clients created before a fork belong to the parent's loop
+                self._clients = {}
+                self._created_at = {}
+                self._loop = loop
+                self._pid = pid
+
+        return self._loop
+
+    def has_client(self, client_key):
+        """Check whether a current (not expired) client exists for the key"""
+        return self._pid == os.getpid() and client_key in self._clients and not self._expired(client_key)
+
+    def _expired(self, client_key):
+        created_at = self._created_at.get(client_key)
+        return created_at is None or time.monotonic() - created_at >= self.client_ttl
+
+    async def _create_client(self, exchange_name, config):
+        """Create an async ccxt client and load its markets"""
+        if exchange_name == 'simulator':
+            client = AsyncSimulatedExchange(config)
+        else:
+            client = getattr(ccxt_async, exchange_name)(config)
+        try:
+            await self._timed(exchange_name, 'load_markets', client.load_markets)
+        except Exception:
+            await client.close()
+            raise
+        return client
+
+    async def _timed(self, exchange_name, method, fn, *args):
+        """Await fn and record its latency and any error"""
+        started = time.perf_counter()
+        try:
+            result = await fn(*args)
+        except Exception as e:
+            exchange_metrics.observe(exchange_name, method, time.perf_counter() - started, e)
+            raise
+        exchange_metrics.observe(exchange_name, method, time.perf_counter() - started)
+        return result
+
+    async def _get_client(self, client_key, exchange_name, config):
+        """Get or create the client for a key, sharing in-progress creation"""
+        task = self._clients.get(client_key)
+        if task is not None and config is not None and self._expired(client_key):
+            # Rebuild periodically so keys rotated by other processes take effect
+            self._close_later(self._clients.pop(client_key))
+            task = None
+        if task is None:
+            if config is None:
+                raise ValueError(f"No exchange config for {client_key}")
+            task = asyncio.ensure_future(self._create_client(exchange_name, config))
+            self._clients[client_key] = task
+            self._created_at[client_key] = time.monotonic()
+        try:
+            return await task
+        except Exception:
+            if self._clients.get(client_key) is task:
+                self._clients.pop(client_key, None)
+            raise
+
+    async def request(self, client_key, exchange_name, config, method, *args):
+        """
+        Execute a ccxt method on the gateway loop
+
+        Args:
+            client_key: Hashable key identifying the client (exchange, testnet, user)
+            exchange_name: Exchange name
+            config: CCXT config used if the client must be created
+            method: CCXT method name (e.g. 'create_order')
+            *args: Positional arguments for the method
+
+        Returns:
+            The ccxt method result
+        """
+        async with self._semaphore:
+            client = await self._get_client(client_key, exchange_name, config)
+            return await self._timed(exchange_name, method, getattr(client, method), *args)
+
+    def submit(self, client_key, exchange_name, method, *args, config_factory=None):
+        """
+        Schedule a ccxt call without blocking
+
+        Args:
+            client_key: Client key
+            exchange_name: Exchange name
+            method: CCXT method name
+            *args: Positional arguments for the method
+            config_factory: Callable returning the CCXT config, only invoked
+                in the calling thread when no client exists yet
+
+        Returns:
+            concurrent.futures.Future resolving to the method result
+        """
+        loop = self._ensure_loop()
+        config = None
+        if config_factory is not None and not self.has_client(client_key):
+            config = config_factory()
+        return asyncio.run_coroutine_threadsafe(
+            self.request(client_key, exchange_name, config, method, *args), loop
+        )
+
+    def call(self, client_key, exchange_name, method, *args, config_factory=None):
+        """Synchronous facade: run a ccxt call on the gateway and wait for it"""
+        future = self.submit(client_key, exchange_name, method, *args, config_factory=config_factory)
+        return future.result(timeout=self.call_timeout)
+
+    def call_many(self, calls):
+        """
+        Run many ccxt calls concurrently and wait for all of them
+
+        Args:
+            calls: Iterable of dicts with client_key, exchange_name, method,
+                args and optional config_factory
+
+        Returns:
+            List of results in input order; failed calls yield the exception
+        """
+        futures = [
+            self.submit(
+                c['client_key'], c['exchange_name'], c['method'], *c.get('args', ()),
+                config_factory=c.get('config_factory')
+            )
+            for c in calls
+        ]
+
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(timeout=self.call_timeout))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def evict(self, client_key):
+        """Drop and close a cached client (e.g. after credentials change)"""
+        if self._pid != os.getpid():
+            return
+        task = self._clients.pop(client_key, None)
+        if task is not None:
+            self._loop.call_soon_threadsafe(self._close_later, task)
+
+    def _close_later(self, task):
+        """Close a replaced client once requests still using it have finished"""
+        async def close():
+            await asyncio.sleep(self.call_timeout)
+            try:
+                client = await task
+                await client.close()
+            except Exception:
+                pass
+
+        asyncio.ensure_future(close())
+
+    def close(self):
+        """Close all clients and stop the event loop"""
+        if self._loop is None or self._pid != os.getpid():
+            return
+
+        async def close_all():
+            for task in list(self._clients.values()):
+                try:
+                    client = await task
+                    await client.close()
+                except Exception as e:
+                    logger.warning(f"Failed to close exchange client: {str(e)}")
+            self._clients = {}
+
+        asyncio.run_coroutine_threadsafe(close_all(), self._loop).result(timeout=self.call_timeout)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+
+exchange_gateway = ExchangeGateway()
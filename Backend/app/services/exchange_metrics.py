@@ -0,0 +1,212 @@
+import bisect
+import logging
+import os
+import threading
+import time
+import redis
+from app import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Histogram upper bounds in seconds: 0.5 ms doubling up to ~65 s
+LATENCY_BUCKETS = [0.0005 * 2 ** i for i in range(18)]
+
+# Redis hash holding counters summed across all processes
+METRICS_KEY = 'exchange_metrics'
+
+
+class ExchangeMetrics:
+    """Per-exchange, per-method latency histograms, error and retry counters"""
+
+    def __init__(self, client=None, flush_interval=None):
+        """
+        Initialize exchange metrics
+
+        Args:
+            client: Redis client counters are pushed to (defaults to the app client)
+            flush_interval: Seconds between pushes of this process's counters
+        """
+        self.client = client or redis_client
+        self.flush_interval = flush_interval or float(os.getenv('EXCHANGE_METRICS_FLUSH_INTERVAL', 10))
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._latency = {}
+        self._errors = {}
+        self._retries = {}
+        self._flushed = {}
+        self._next_flush = time.monotonic() + self.flush_interval
+
+    def observe(self, exchange_name, method, seconds, error=None):
+        """
+        Record one exchange call
+
+        Args:
+            exchange_name: Exchange name
+            method: CCXT method name
+            seconds: Call duration
+            error: Exception raised by the call, if any
+        """
+        index = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        key = (exchange_name, method)
+
+        with self._lock:
+            series = self._latency.get(key)
+            if series is None:
+                series = self._latency[key] = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+            if error is not None:
+                error_key = (exchange_name, method, type(error).__name__)
+                self._errors[error_key] = self._errors.get(error_key, 0) + 1
+
+        if time.monotonic() >= self._next_flush:
+            self.flush()
+
+    def record_retry(self, exchange_name, method):
+        """Count a retried exchange call"""
+        key = (exchange_name, method)
+        with self._lock:
+            self._retries[key] = self._retries.get(key, 0) + 1
+
+    def quantile(self, exchange_name, method, q, minimum_samples=20):
+        """
+        Estimate a latency quantile from this process's histogram
+
+        Returns:
+            Seconds, interpolated within the bucket, or None without enough samples
+        """
+        with self._lock:
+            series = self._latency.get((exchange_name, method))
+            if series is None or series[2] < minimum_samples:
+                return None
+            counts, total = list(series[0]), series[2]
+
+        target = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if count and cumulative + count >= target:
+                if index >= len(LATENCY_BUCKETS):
+                    return LATENCY_BUCKETS[-1]
+                lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+                return lower + (LATENCY_BUCKETS[index] - lower) * (target - cumulative) / count
+            cumulative += count
+        return LATENCY_BUCKETS[-1]
+
+    def _snapshot(self):
+        """Flatten counters into hash fields"""
+        fields = {}
+        with self._lock:
+            for (exchange_name, method), (counts, total, count) in self._latency.items():
+                for index, bucket_count in enumerate(counts):
+                    if bucket_count:
+                        fields[f'h|{exchange_name}|{method}|{index}'] = bucket_count
+                fields[f's|{exchange_name}|{method}'] = total
+                fields[f'c|{exchange_name}|{method}'] = count
+            for (exchange_name, method, error), count in self._errors.items():
+                fields[f'e|{exchange_name}|{method}|{error}'] = count
+            for (exchange_name, method), count in self._retries.items():
+                fields[f'r|{exchange_name}|{method}'] = count
+        return fields
+
+    def flush(self):
+        """Push counter increments since the last flush to Redis"""
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self._push()
+        finally:
+            self._flush_lock.release()
+
+    def _push(self):
+        self._next_flush = time.monotonic() + self.flush_interval
+        fields = self._snapshot()
+
+        pipe = self.client.pipeline(transaction=False)
+        pending = 0
+        for field, value in fields.items():
+            delta = value - self._flushed.get(field, 0)
+            if not delta:
+                continue
+            if field.startswith('s|'):
+                pipe.hincrbyfloat(METRICS_KEY, field, delta)
+            else:
+                pipe.hincrby(METRICS_KEY, field, delta)
+            pending += 1
+
+        if not pending:
+            return
+        try:
+            pipe.execute()
+            self._flushed = fields
+        except redis.RedisError as e:
+            logger.warning(f"Failed to push exchange metrics: {str(e)}")
+
+    def render(self):
+        """
+        Render all processes' counters in the Prometheus text format
+
+        Falls back to this process's counters when Redis is unavailable.
+        """
+        self.flush()
+        try:
+            fields = {
+                (k.decode() if isinstance(k, bytes) else k): float(v)
+                for k, v in self.client.hgetall(METRICS_KEY).items()
+            }
+        except redis.RedisError as e:
+            logger.warning(f"Failed to read exchange metrics: {str(e)}")
+            fields = self._snapshot()
+
+        histograms = {}
+        errors = []
+        retries = []
+        for field, value in fields.items():
+            kind, exchange_name, method, *extra = field.split('|')
+            if kind in ('h', 's', 'c'):
+                series = histograms.setdefault((exchange_name, method), [[0] * (len(LATENCY_BUCKETS) + 1), 0.0, 0])
+                if kind == 'h':
+                    series[0][int(extra[0])] = value
+                elif kind == 's':
+                    series[1] = value
+                else:
+                    series[2] = value
+            elif kind == 'e':
+                errors.append((exchange_name, method, extra[0], value))
+            elif kind == 'r':
+                retries.append((exchange_name, method, value))
+
+        lines = [
+            '# HELP exchange_request_duration_seconds Exchange API call latency',
+            '# TYPE exchange_request_duration_seconds histogram',
+        ]
+        for (exchange_name, method), (counts, total, count) in sorted(histograms.items()):
+            labels = f'exchange="{exchange_name}",method="{method}"'
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, counts):
+                cumulative += bucket_count
+                lines.append(f'exchange_request_duration_seconds_bucket{{{labels},le="{bound:g}"}} {cumulative:g}')
+            lines.append(f'exchange_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count:g}')
+            lines.append(f'exchange_request_duration_seconds_sum{{{labels}}} {total:.6f}')
+            lines.append(f'exchange_request_duration_seconds_count{{{labels}}} {count:g}')
+
+        lines += [
+            '# HELP exchange_request_errors_total Failed exchange API calls by CCXT exception class',
+            '# TYPE exchange_request_errors_total counter',
+        ]
+        for exchange_name, method, error, count in sorted(errors):
+            lines.append(
+                f'exchange_request_errors_total{{exchange="{exchange_name}",method="{method}",error="{error}"}} {count:g}'
+            )
+
+        lines += [
+            '# HELP exchange_request_retries_total Retried exchange API calls',
+            '# TYPE exchange_request_retries_total counter',
+        ]
+        for exchange_name, method, count in sorted(retries):
+            lines.append(f'exchange_request_retries_total{{exchange="{exchange_name}",method="{method}"}} {count:g}')
+
+        return '\n'.join(lines) + '\n'
+
+
+exchange_metrics = ExchangeMetrics()
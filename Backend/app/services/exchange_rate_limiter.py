@@ -0,0 +1,170 @@
+import logging
+import os
+import time
+import redis
+from app import redis_client
+from app.utils.exception import ExchangeException
+
+logger = logging.getLogger(__name__)
+
+# Atomically refill and take tokens from every bucket in KEYS, or none of them.
+# ARGV per bucket: cost, capacity, refill per ms, reserve.
+# Returns 0 when granted, otherwise the milliseconds to wait before retrying.
+TOKEN_BUCKET_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local wait = 0
+local state = {}
+
+for i, key in ipairs(KEYS) do
+    local base = (i - 1) * 4
+    local cost = tonumber(ARGV[base + 1])
+    local capacity = tonumber(ARGV[base + 2])
+    local rate = tonumber(ARGV[base + 3])
+    local reserve = tonumber(ARGV[base + 4])
+
+    local data = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(data[1]) or capacity
+    local ts = tonumber(data[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    state[i] = {tokens, cost, capacity, rate}
+
+    -- A request larger than the bucket runs once it is full and leaves it in debt
+    local missing = math.min(cost + reserve, capacity) - tokens
+    if missing > 0 then
+        wait = math.max(wait, math.ceil(missing / rate))
+    end
+end
+
+if wait > 0 then
+    return wait
+end
+
+for i, key in ipairs(KEYS) do
+    local s = state[i]
+    redis.call('HSET', key, 'tokens', tostring(s[1] - s[2]), 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(s[3] / s[4]) + 1000)
+end
+return 0
+"""
+
+
+class ExchangeRateLimiter:
+    """Cluster-wide exchange rate-limit budget shared through Redis"""
+
+    # Endpoint weight class and request weight per CCXT method
+    METHOD_WEIGHTS = {
+        'create_order': ('order', 1),
+        'create_orders': ('order', 5),
+        'cancel_order': ('order', 1),
+        'cancel_orders': ('order', 1),
+        'fetch_order': ('account', 2),
+        'fetch_orders': ('account', 10),
+        'fetch_open_orders': ('account', 10),
+        'fetch_closed_orders': ('account', 10),
+        'fetch_balance': ('account', 10),
+        'fetch_positions': ('account', 5),
+        'fetch_ticker': ('market', 1),
+        'fetch_tickers': ('market', 40),
+        'fetch_order_book': ('market', 5),
+        'fetch_ohlcv': ('market', 2),
+        'load_markets': ('market', 20),
+    }
+
+    # Share of the request-weight bucket a class must leave untouched, so
+    # order placement and cancellation always find budget before polling
+    CLASS_RESERVE = {'order': 0.0, 'account': 0.2, 'market': 0.4}
+
+    # Bucket sizes as (capacity, refill per second). 'weight' is the request
+    # weight budget shared by every endpoint of an API key.
+    EXCHANGE_LIMITS = {
+        'binance': {'weight': (1200, 20), 'order': (50, 5), 'account': (600, 10), 'market': (600, 10)},
+        'bybit': {'weight': (600, 10), 'order': (20, 10), 'account': (300, 5), 'market': (300, 5)},
+        'okx': {'weight': (300, 10), 'order': (60, 30), 'account': (100, 5), 'market': (100, 5)},
+        'kraken': {'weight': (15, 0.33), 'order': (60, 1), 'account': (15, 0.33), 'market': (15, 1)},
+        'coinbase': {'weight': (30, 10), 'order': (30, 15), 'account': (15, 5), 'market': (15, 5)},
+        # Local simulator: effectively unlimited so benchmarks measure our own path
+        'simulator': {'weight': (1e9, 1e9), 'order': (1e9, 1e9), 'account': (1e9, 1e9), 'market': (1e9, 1e9)},
+    }
+    DEFAULT_LIMITS = {'weight': (300, 10), 'order': (50, 5), 'account': (100, 5), 'market': (100, 5)}
+
+    def __init__(self, client=None, enabled=None, max_wait=None):
+        """
+        Initialize rate limiter
+
+        Args:
+            client: Redis client (defaults to the app client)
+            enabled: Enforce limits (defaults to EXCHANGE_RATE_LIMIT_ENABLED)
+            max_wait: Seconds a call may wait for budget before failing
+        """
+        self.client = client or redis_client
+        self.enabled = (
+            os.getenv('EXCHANGE_RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+            if enabled is None else enabled
+        )
+        self.max_wait = max_wait or float(os.getenv('EXCHANGE_RATE_LIMIT_MAX_WAIT', 10))
+        self._script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def classify(self, method):
+        """Return (weight_class, weight) for a CCXT method"""
+        if method in self.METHOD_WEIGHTS:
+            return self.METHOD_WEIGHTS[method]
+        if method.startswith(('create_', 'cancel_', 'edit_')):
+            return 'order', 1
+        if method.startswith('fetch_my_') or 'balance' in method:
+            return 'account', 10
+        return 'market', 1
+
+    def acquire(self, exchange_name, method, account='public', count=1, max_wait=None):
+        """
+        Block until the call fits the shared budget
+
+        Args:
+            exchange_name: Exchange name
+            method: CCXT method name
+            account: API key identity the budget belongs to
+            count: Number of orders carried by the request (batch calls)
+            max_wait: Seconds to wait for budget (defaults to self.max_wait)
+
+        Raises:
+            ExchangeException: If no budget frees up within max_wait
+        """
+        if not self.enabled:
+            return
+
+        weight_class, weight = self.classify(method)
+        limits = self.EXCHANGE_LIMITS.get(exchange_name, self.DEFAULT_LIMITS)
+        class_cost = count if weight_class == 'order' else weight
+
+        keys = [
+            f'exchange_rl:{exchange_name}:{weight_class}:{account}',
+            f'exchange_rl:{exchange_name}:weight:{account}',
+        ]
+        args = []
+        for bucket, cost, reserve in (
+            (weight_class, class_cost, 0),
+            ('weight', weight, self.CLASS_RESERVE[weight_class]),
+        ):
+            capacity, per_second = limits[bucket]
+            args.extend([cost, capacity, per_second / 1000.0, capacity * reserve])
+
+        deadline = time.monotonic() + (self.max_wait if max_wait is None else max_wait)
+        while True:
+            try:
+                wait_ms = int(self._script(keys=keys, args=args))
+            except redis.RedisError as e:
+                # If Redis fails, allow the call and rely on ccxt's own throttling
+                logger.warning(f"Exchange rate limiter unavailable: {str(e)}")
+                return
+
+            if wait_ms <= 0:
+                return
+
+            if time.monotonic() + wait_ms / 1000.0 > deadline:
+                raise ExchangeException(
+                    f"Rate limit budget exhausted for {exchange_name} ({weight_class})"
+                )
+            time.sleep(wait_ms / 1000.0)
+
+
+exchange_rate_limiter = ExchangeRateLimiter()
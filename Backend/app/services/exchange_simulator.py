@@ -0,0 +1,508 @@
+import asyncio
+import ccxt
+import itertools
+import os
+import random
+import threading
+import time
+from datetime import datetime
+
+# Starting mid prices for the simulated markets
+DEFAULT_PRICES = {
+    'BTC/USDT': 45000.0,
+    'ETH/USDT': 2500.0,
+    'BNB/USDT': 300.0,
+    'SOL/USDT': 100.0,
+    'ADA/USDT': 0.5,
+}
+
+# Protective order types paired as one-cancels-the-other exits
+OCO_TYPES = {'stop_loss': 'take_profit', 'take_profit': 'stop_loss'}
+
+# CCXT methods the simulator answers, shared by the sync and async clients
+API_METHODS = [
+    'load_markets', 'create_order', 'create_orders', 'create_market_buy_order',
+    'create_market_sell_order', 'create_limit_buy_order', 'create_limit_sell_order',
+    'cancel_order', 'cancel_orders', 'fetch_order', 'fetch_orders', 'fetch_open_orders',
+    'fetch_closed_orders', 'fetch_balance', 'fetch_positions', 'fetch_ticker',
+    'fetch_order_book',
+]
+
+# Methods that change venue state; post-commit failures only hit these
+WRITE_METHODS = {
+    'create_order', 'create_orders', 'create_market_buy_order', 'create_market_sell_order',
+    'create_limit_buy_order', 'create_limit_sell_order', 'cancel_order', 'cancel_orders',
+}
+
+
+class SimulatorVenue:
+    """Order book, balances and orders for one simulated account"""
+
+    def __init__(self, initial_balance=None, volatility=0.0005, fee_rate=0.001, fill_mode='book'):
+        """
+        Initialize simulated account
+
+        Args:
+            initial_balance: Dict of asset -> starting amount
+            volatility: Relative std-dev of the price random walk per request
+            fee_rate: Taker fee charged on fills
+            fill_mode: 'book' fills limit orders when the price crosses,
+                'immediate' fills every order at its limit price on arrival
+        """
+        self.lock = threading.Lock()
+        self.prices = dict(DEFAULT_PRICES)
+        self.volatility = volatility
+        self.fee_rate = fee_rate
+        self.fill_mode = fill_mode
+        self.balances = {asset: {'free': amount, 'used': 0.0} for asset, amount in
+                         (initial_balance or {'USDT': 1000000.0}).items()}
+        self.entries = {}
+        self.orders = {}
+        self.open_orders = {}
+        self.client_ids = {}
+        self._ids = itertools.count(1)
+
+    def _balance(self, asset):
+        return self.balances.setdefault(asset, {'free': 0.0, 'used': 0.0})
+
+    def _tick(self, symbol):
+        """Advance the symbol's price and match resting orders against it"""
+        price = self.prices[symbol] * (1 + random.gauss(0, self.volatility))
+        self.prices[symbol] = max(price, 1e-8)
+
+        for order in list(self.open_orders.get(symbol, {}).values()):
+            # An earlier fill in this loop may have cancelled its OCO partner
+            if order['status'] == 'open' and self._crossed(order, price):
+                self._fill(order, order['price'])
+
+    def _crossed(self, order, price):
+        """Whether a resting order executes at the given price"""
+        if order['type'] == 'stop_loss':
+            return price <= order['price'] if order['side'] == 'sell' else price >= order['price']
+        return price <= order['price'] if order['side'] == 'buy' else price >= order['price']
+
+    def _oco_partner(self, order):
+        partner = self.orders.get(order.get('_oco'))
+        return partner if partner and partner['status'] == 'open' else None
+
+    def _unlink_oco(self, order, cancel_partner):
+        """
+        Split an OCO pair when one leg leaves the book
+
+        The pair's shared reservation moves to the leg that needs it: the
+        filling leg (whose partner is then cancelled), or the partner left
+        resting after a cancel.
+        """
+        partner = self._oco_partner(order)
+        order.pop('_oco', None)
+        if partner is None:
+            return
+        partner.pop('_oco', None)
+
+        if cancel_partner:
+            order['_reserved'] = order.get('_reserved', 0.0) + partner.pop('_reserved', 0.0)
+            self.open_orders.get(partner['symbol'], {}).pop(partner['id'], None)
+            partner['status'] = 'canceled'
+        else:
+            partner['_reserved'] = partner.get('_reserved', 0.0) + order.pop('_reserved', 0.0)
+
+    def _fill(self, order, fill_price):
+        self._unlink_oco(order, cancel_partner=True)
+        base, quote = order['symbol'].split('/')
+        amount = order['amount']
+        cost = amount * fill_price
+        fee = cost * self.fee_rate
+
+        if order['side'] == 'buy':
+            quote_balance = self._balance(quote)
+            reserved = order.pop('_reserved', 0.0)
+            quote_balance['used'] -= reserved
+            quote_balance['free'] += reserved - cost - fee
+            base_balance = self._balance(base)
+            held = base_balance['free'] + base_balance['used']
+            entry = self.entries.get(order['symbol'], fill_price)
+            self.entries[order['symbol']] = (entry * held + cost) / (held + amount)
+            base_balance['free'] += amount
+        else:
+            base_balance = self._balance(base)
+            reserved = order.pop('_reserved', 0.0)
+            base_balance['used'] -= reserved
+            base_balance['free'] += reserved - amount
+            self._balance(quote)['free'] += cost - fee
+
+        self.open_orders.get(order['symbol'], {}).pop(order['id'], None)
+        order.update({
+            'status': 'closed',
+            'filled': amount,
+            'remaining': 0.0,
+            'cost': cost,
+            'average': fill_price,
+            'fee': {'cost': fee, 'currency': quote},
+            'lastTradeTimestamp': int(time.time() * 1000),
+        })
+
+    def create_order(self, symbol, order_type, side, amount, price=None, params=None):
+        params = params or {}
+        if symbol not in self.prices:
+            raise ccxt.BadSymbol(f"simulator does not have market symbol {symbol}")
+        if side not in ('buy', 'sell') or not amount or amount <= 0:
+            raise ccxt.InvalidOrder(f"simulator invalid order: {side} {amount}")
+
+        client_order_id = params.get('clientOrderId')
+        if client_order_id and client_order_id in self.client_ids:
+            raise getattr(ccxt, 'DuplicateOrderId', ccxt.InvalidOrder)(
+                f"simulator duplicate clientOrderId {client_order_id}"
+            )
+
+        self._tick(symbol)
+        market_price = self.prices[symbol]
+        limit_price = price if order_type != 'market' else None
+        base, quote = symbol.split('/')
+
+        # Reserve funds for the worst case fill
+        if side == 'buy':
+            reserve = amount * (limit_price or market_price) * (1 + self.fee_rate)
+            balance = self._balance(quote)
+        else:
+            reserve = amount
+            balance = self._balance(base)
+
+        # A stop loss and take profit closing the same amount are one OCO exit:
+        # the pair reserves once, on the resting leg
+        partner = None
+        if order_type in OCO_TYPES:
+            partner = next((
+                o for o in self.open_orders.get(symbol, {}).values()
+                if o['type'] == OCO_TYPES[order_type] and o['side'] == side
+                and o['amount'] == amount and '_oco' not in o
+            ), None)
+        extra = max(0.0, reserve - partner['_reserved']) if partner else reserve
+
+        if balance['free'] < extra:
+            raise ccxt.InsufficientFunds(f"simulator insufficient {quote if side == 'buy' else base} balance")
+        balance['free'] -= extra
+        balance['used'] += extra
+        if partner:
+            partner['_reserved'] += extra
+            reserve = 0.0
+
+        now = int(time.time() * 1000)
+        order = {
+            'id': str(next(self._ids)),
+            'clientOrderId': client_order_id,
+            'timestamp': now,
+            'datetime': datetime.utcfromtimestamp(now / 1000).isoformat() + 'Z',
+            'lastTradeTimestamp': None,
+            'symbol': symbol,
+            'type': order_type,
+            'side': side,
+            'price': limit_price,
+            'amount': amount,
+            'filled': 0.0,
+            'remaining': amount,
+            'cost': 0.0,
+            'average': None,
+            'status': 'open',
+            'fee': None,
+            'trades': [],
+            'info': {},
+            '_reserved': reserve,
+        }
+        self.orders[order['id']] = order
+        self.open_orders.setdefault(symbol, {})[order['id']] = order
+        if partner:
+            order['_oco'], partner['_oco'] = partner['id'], order['id']
+        if client_order_id:
+            self.client_ids[client_order_id] = order['id']
+
+        if order_type == 'market':
+            self._fill(order, market_price)
+        elif self.fill_mode == 'immediate':
+            self._fill(order, limit_price)
+        elif self._crossed(order, market_price):
+            self._fill(order, market_price)
+
+        return order
+
+    def cancel_order(self, order_id, symbol=None):
+        order = self.orders.get(str(order_id))
+        if not order or (symbol and order['symbol'] != symbol):
+            raise ccxt.OrderNotFound(f"simulator order {order_id} not found")
+        if order['status'] != 'open':
+            raise ccxt.OrderNotFound(f"simulator order {order_id} is {order['status']}")
+
+        self._unlink_oco(order, cancel_partner=False)
+        base, quote = order['symbol'].split('/')
+        balance = self._balance(quote if order['side'] == 'buy' else base)
+        reserved = order.pop('_reserved', 0.0)
+        balance['used'] -= reserved
+        balance['free'] += reserved
+        self.open_orders.get(order['symbol'], {}).pop(order['id'], None)
+        order['status'] = 'canceled'
+        return order
+
+
+def _venue_for(api_key, options):
+    """Shared venue per API key so sync and async clients see the same orders"""
+    with _venues_lock:
+        if api_key not in _venues:
+            _venues[api_key] = SimulatorVenue(
+                initial_balance=options.get('initial_balance'),
+                volatility=float(options.get('volatility', os.getenv('SIMULATOR_VOLATILITY', 0.0005))),
+                fee_rate=float(options.get('fee_rate', os.getenv('SIMULATOR_FEE_RATE', 0.001))),
+                fill_mode=options.get('fill_mode', os.getenv('SIMULATOR_FILL_MODE', 'book')),
+            )
+        return _venues[api_key]
+
+
+_venues = {}
+_venues_lock = threading.Lock()
+
+
+def reset_simulator():
+    """Drop all simulated accounts (between benchmark runs)"""
+    with _venues_lock:
+        _venues.clear()
+
+
+class _SimulatorCore:
+    """CCXT-compatible request handlers backed by a SimulatorVenue"""
+
+    id = 'simulator'
+    has = {
+        'createOrders': True,
+        'cancelOrders': True,
+        'fetchOrders': True,
+        'fetchOpenOrders': True,
+        'fetchClosedOrders': True,
+        'fetchPositions': True,
+        'ws': False,
+    }
+
+    def __init__(self, config=None):
+        """
+        Initialize simulated exchange client
+
+        Args:
+            config: CCXT-style config; config['options']['simulator'] may set
+                latency_ms, latency_jitter_ms, error_rate,
+                post_commit_error_rate, fill_mode, volatility, fee_rate and
+                initial_balance
+        """
+        config = config or {}
+        options = (config.get('options') or {}).get('simulator', {})
+        self.apiKey = config.get('apiKey') or 'default'
+        self.latency_ms = float(options.get('latency_ms', os.getenv('SIMULATOR_LATENCY_MS', 0)))
+        self.latency_jitter_ms = float(options.get('latency_jitter_ms', os.getenv('SIMULATOR_LATENCY_JITTER_MS', 0)))
+        self.error_rate = float(options.get('error_rate', os.getenv('SIMULATOR_ERROR_RATE', 0)))
+        self.post_commit_error_rate = float(
+            options.get('post_commit_error_rate', os.getenv('SIMULATOR_POST_COMMIT_ERROR_RATE', 0))
+        )
+        self.venue = _venue_for(self.apiKey, options)
+        self.markets = {}
+
+    def milliseconds(self):
+        return int(time.time() * 1000)
+
+    def _delay(self):
+        """Sampled round-trip latency in seconds"""
+        if not self.latency_ms and not self.latency_jitter_ms:
+            return 0
+        return max(0.0, random.gauss(self.latency_ms, self.latency_jitter_ms)) / 1000.0
+
+    def _maybe_fail(self):
+        if self.error_rate and random.random() < self.error_rate:
+            raise random.choice([ccxt.NetworkError, ccxt.ExchangeNotAvailable, ccxt.RequestTimeout])(
+                "simulator injected failure"
+            )
+
+    def _maybe_fail_after_commit(self, method):
+        """Fail a write the venue already applied, like a response lost in transit"""
+        if method in WRITE_METHODS and self.post_commit_error_rate and random.random() < self.post_commit_error_rate:
+            raise ccxt.RequestTimeout("simulator injected failure after commit")
+
+    @staticmethod
+    def _public(order):
+        return {k: v for k, v in order.items() if not k.startswith('_')}
+
+    def _load_markets(self, reload=False, params=None):
+        self.markets = {
+            symbol: {
+                'id': symbol.replace('/', ''), 'symbol': symbol,
+                'base': symbol.split('/')[0], 'quote': symbol.split('/')[1],
+                'spot': True, 'active': True,
+                'taker': self.venue.fee_rate, 'maker': self.venue.fee_rate,
+            }
+            for symbol in self.venue.prices
+        }
+        return self.markets
+
+    def _create_order(self, symbol, type, side, amount, price=None, params=None):
+        with self.venue.lock:
+            return self._public(self.venue.create_order(symbol, type, side, amount, price, params))
+
+    def _create_orders(self, orders, params=None):
+        results = []
+        for o in orders:
+            try:
+                results.append(self._create_order(
+                    o['symbol'], o['type'], o['side'], o['amount'], o.get('price'), o.get('params')
+                ))
+            except ccxt.BaseError as e:
+                results.append({'id': None, 'symbol': o['symbol'], 'status': 'rejected', 'info': {'error': str(e)}})
+        return results
+
+    def _create_market_buy_order(self, symbol, amount, params=None):
+        return self._create_order(symbol, 'market', 'buy', amount, None, params)
+
+    def _create_market_sell_order(self, symbol, amount, params=None):
+        return self._create_order(symbol, 'market', 'sell', amount, None, params)
+
+    def _create_limit_buy_order(self, symbol, amount, price, params=None):
+        return self._create_order(symbol, 'limit', 'buy', amount, price, params)
+
+    def _create_limit_sell_order(self, symbol, amount, price, params=None):
+        return self._create_order(symbol, 'limit', 'sell', amount, price, params)
+
+    def _cancel_order(self, id, symbol=None, params=None):
+        with self.venue.lock:
+            return self._public(self.venue.cancel_order(id, symbol))
+
+    def _cancel_orders(self, ids, symbol=None, params=None):
+        results = []
+        with self.venue.lock:
+            for i in ids:
+                try:
+                    results.append(self._public(self.venue.cancel_order(i, symbol)))
+                except ccxt.BaseError as e:
+                    results.append({'id': str(i), 'symbol': symbol, 'status': 'rejected', 'info': {'error': str(e)}})
+        return results
+
+    def _fetch_order(self, id, symbol=None, params=None):
+        with self.venue.lock:
+            order = self.venue.orders.get(str(id))
+            if order is None and params and params.get('clientOrderId'):
+                order = self.venue.orders.get(self.venue.client_ids.get(params['clientOrderId']))
+            if order is None:
+                raise ccxt.OrderNotFound(f"simulator order {id} not found")
+            self.venue._tick(order['symbol'])
+            return self._public(order)
+
+    def _select_orders(self, symbol, since, limit, statuses):
+        with self.venue.lock:
+            if symbol:
+                self.venue._tick(symbol)
+            if statuses == ('open',):
+                candidates = itertools.chain.from_iterable(
+                    book.values() for s, book in self.venue.open_orders.items() if not symbol or s == symbol
+                )
+            else:
+                candidates = self.venue.orders.values()
+            orders = [
+                self._public(o) for o in candidates
+                if (not symbol or o['symbol'] == symbol)
+                and (statuses is None or o['status'] in statuses)
+                and (not since or o['timestamp'] >= since)
+            ]
+        return orders[-limit:] if limit else orders
+
+    def _fetch_orders(self, symbol=None, since=None, limit=None, params=None):
+        return self._select_orders(symbol, since, limit, None)
+
+    def _fetch_open_orders(self, symbol=None, since=None, limit=None, params=None):
+        return self._select_orders(symbol, since, limit, ('open',))
+
+    def _fetch_closed_orders(self, symbol=None, since=None, limit=None, params=None):
+        return self._select_orders(symbol, since, limit, ('closed', 'canceled'))
+
+    def _fetch_balance(self, params=None):
+        with self.venue.lock:
+            balance = {'info': {}, 'free': {}, 'used': {}, 'total': {}}
+            for asset, b in self.venue.balances.items():
+                balance[asset] = {'free': b['free'], 'used': b['used'], 'total': b['free'] + b['used']}
+                balance['free'][asset] = b['free']
+                balance['used'][asset] = b['used']
+                balance['total'][asset] = b['free'] + b['used']
+            return balance
+
+    def _fetch_positions(self, symbols=None, params=None):
+        with self.venue.lock:
+            positions = []
+            for symbol, price in self.venue.prices.items():
+                held = self.venue.balances.get(symbol.split('/')[0])
+                if not held or (symbols and symbol not in symbols):
+                    continue
+                contracts = held['free'] + held['used']
+                entry = self.venue.entries.get(symbol, price)
+                positions.append({
+                    'symbol': symbol, 'side': 'long', 'contracts': contracts, 'contractSize': 1,
+                    'entryPrice': entry, 'markPrice': price,
+                    'unrealizedPnl': (price - entry) * contracts,
+                    'percentage': (price - entry) / entry * 100 if entry else 0,
+                    'leverage': 1, 'timestamp': self.milliseconds(),
+                })
+            return positions
+
+    def _fetch_ticker(self, symbol, params=None):
+        with self.venue.lock:
+            if symbol not in self.venue.prices:
+                raise ccxt.BadSymbol(f"simulator does not have market symbol {symbol}")
+            self.venue._tick(symbol)
+            price = self.venue.prices[symbol]
+        return {'symbol': symbol, 'last': price, 'bid': price * 0.9999, 'ask': price * 1.0001,
+                'timestamp': self.milliseconds()}
+
+    def _fetch_order_book(self, symbol, limit=None, params=None):
+        ticker = self._fetch_ticker(symbol)
+        levels = limit or 20
+        return {
+            'symbol': symbol,
+            'bids': [[ticker['bid'] * (1 - 0.0001 * i), 5.0] for i in range(levels)],
+            'asks': [[ticker['ask'] * (1 + 0.0001 * i), 5.0] for i in range(levels)],
+            'timestamp': ticker['timestamp'],
+        }
+
+
+class SimulatedExchange(_SimulatorCore):
+    """Synchronous simulated exchange (drop-in for a ccxt client)"""
+
+    def close(self):
+        pass
+
+
+class AsyncSimulatedExchange(_SimulatorCore):
+    """Asyncio simulated exchange (drop-in for a ccxt.async_support client)"""
+
+    async def close(self):
+        pass
+
+
+def _sync_method(name):
+    def method(self, *args, **kwargs):
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+        self._maybe_fail()
+        result = getattr(self, f'_{name}')(*args, **kwargs)
+        self._maybe_fail_after_commit(name)
+        return result
+    method.__name__ = name
+    return method
+
+
+def _async_method(name):
+    async def method(self, *args, **kwargs):
+        delay = self._delay()
+        if delay:
+            await asyncio.sleep(delay)
+        self._maybe_fail()
+        result = getattr(self, f'_{name}')(*args, **kwargs)
+        self._maybe_fail_after_commit(name)
+        return result
+    method.__name__ = name
+    return method
+
+
+for _name in API_METHODS:
+    setattr(SimulatedExchange, _name, _sync_method(_name))
+    setattr(AsyncSimulatedExchange, _name, _async_method(_name))
@@ -1,27 +1,86 @@
 import ccxt
+import hashlib
+import logging
+import os
+import redis
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from app.models.api_key import ApiKey
-from app.utils.encryption import encryption_service
-from app.utils.exceptions import ExchangeException
+from app.utils.cache import SingleFlightCache
+from app.utils.exception import ExchangeException
+from app.services.circuit_breaker import circuit_breakers
+from app.services.exchange_gateway import exchange_gateway, GATEWAY_ENABLED
+from app.services.exchange_metrics import exchange_metrics
+from app.services.exchange_rate_limiter import exchange_rate_limiter
+from app.services.exchange_simulator import SimulatedExchange
 from app import redis_client
 import json
 from datetime import timedelta
 
+logger = logging.getLogger(__name__)
+
+# Balance, position and open order snapshots shared by all workers
+account_cache = SingleFlightCache(redis_client)
+
 class ExchangeService:
     """Multi-exchange integration service using CCXT"""
     
     # Supported exchanges
-    SUPPORTED_EXCHANGES = ['binance', 'coinbase', 'kraken', 'bybit', 'okx']
+    SUPPORTED_EXCHANGES = ['binance', 'coinbase', 'kraken', 'bybit', 'okx', 'simulator']
+    
+    # Maximum orders per native createOrders request
+    BATCH_ORDER_LIMITS = {'binance': 5, 'bybit': 10, 'okx': 20}
+    
+    # Native batch endpoints CCXT restricts: contract markets only, and
+    # whether conditional orders are accepted; other orders go one by one
+    NATIVE_BATCH_RULES = {'binance': {'contracts_only': True, 'conditional': False}}
+    
+    # Order types placed with a trigger (stopPrice)
+    CONDITIONAL_ORDER_TYPES = ['stop_loss', 'take_profit']
+    
+    # CCXT capability flags, shared by all instances
+    _capabilities = {}
+    
+    # Idempotent reads that may be hedged with a second request
+    HEDGED_METHODS = ['fetch_order', 'fetch_ticker']
+    
+    # Worker threads for hedged requests on local clients
+    _hedge_executor = None
     
-    def __init__(self, user_id=None):
+    # Dedup cache entries for client order ids
+    CLIENT_ORDER_TTL = 86400  # seconds
+    PENDING_ORDER = 'pending'
+    
+    # Read-only calls retried on network errors
+    RETRYABLE_METHODS = [
+        'fetch_order', 'fetch_balance', 'fetch_positions', 'fetch_open_orders',
+        'fetch_closed_orders', 'fetch_orders', 'fetch_ticker', 'fetch_order_book'
+    ]
+    
+    def __init__(self, user_id=None, use_gateway=None, hedge_requests=None):
         """
         Initialize exchange service
         
         Args:
             user_id: User ID for API key lookup
+            use_gateway: Route calls through the asyncio exchange gateway
+                (defaults to EXCHANGE_GATEWAY_ENABLED)
+            hedge_requests: Send a second request for slow idempotent reads
+                (defaults to EXCHANGE_HEDGING_ENABLED)
         """
         self.user_id = user_id
         self.exchanges = {}
         self.cache_timeout = 30  # seconds
+        self.positions_cache_timeout = 10
+        self.orders_cache_timeout = 5
+        self.use_gateway = GATEWAY_ENABLED if use_gateway is None else use_gateway
+        self.batch_concurrency = int(os.getenv('EXCHANGE_BATCH_CONCURRENCY', 10))
+        self.max_retries = int(os.getenv('EXCHANGE_MAX_RETRIES', 2))
+        self.timeout = int(os.getenv('EXCHANGE_TIMEOUT_MS', 30000))
+        if hedge_requests is None:
+            hedge_requests = os.getenv('EXCHANGE_HEDGING_ENABLED', 'false').lower() == 'true'
+        self.hedge_requests = hedge_requests
+        self.hedge_delay = float(os.getenv('EXCHANGE_HEDGE_DELAY_MS', 250)) / 1000
     
     def get_exchange(self, exchange_name='binance', use_testnet=True):
         """
@@ -48,57 +107,12 @@ class ExchangeService:
             raise ExchangeException(f"Unsupported exchange: {exchange_name}")
         
         try:
-            # Get API keys from database if user_id provided
-            api_key = None
-            api_secret = None
-            
-            if self.user_id:
-                api_key_record = ApiKey.query.filter_by(
-                    user_id=self.user_id,
-                    exchange=exchange_name,
-                    is_active=True,
-                    is_testnet=use_testnet
-                ).first()
-                
-                if api_key_record:
-                    api_key = encryption_service.decrypt(api_key_record.api_key)
-                    api_secret = encryption_service.decrypt(api_key_record.api_secret)
-            
             # Create exchange instance
-            exchange_class = getattr(ccxt, exchange_name)
-            
-            config = {
-                'enableRateLimit': True,
-                'timeout': 30000,
-                'options': {'defaultType': 'spot'}
-            }
-            
-            # Add API credentials if available
-            if api_key and api_secret:
-                config['apiKey'] = api_key
-                config['secret'] = api_secret
-            
-            # Configure testnet/sandbox
-            if use_testnet:
-                if exchange_name == 'binance':
-                    config['urls'] = {
-                        'api': {
-                            'public': 'https://testnet.binance.vision/api',
-                            'private': 'https://testnet.binance.vision/api',
-                        }
-                    }
-                elif exchange_name == 'bybit':
-                    config['urls'] = {
-                        'api': {
-                            'public': 'https://api-testnet.bybit.com',
-                            'private': 'https://api-testnet.bybit.com',
-                        }
-                    }
-            
-            exchange = exchange_class(config)
+            exchange_class = self._exchange_class(exchange_name)
+            exchange = exchange_class(self._build_config(exchange_name, use_testnet))
             
             # Test connection by loading markets
-            exchange.load_markets()
+            self._timed(exchange_name, 'load_markets', exchange.load_markets)
             
             # Cache the instance
             self.exchanges[cache_key] = exchange
@@ -112,8 +126,208 @@ class ExchangeService:
         except Exception as e:
             raise ExchangeException(f"Failed to initialize exchange: {str(e)}")
     
+    def _get_credentials(self, exchange_name, use_testnet=True):
+        """Look up and decrypt the user's API credentials for an exchange"""
+        if not self.user_id:
+            return None, None
+        
+        api_key_record = ApiKey.query.filter_by(
+            user_id=self.user_id,
+            exchange=exchange_name,
+            is_active=True,
+            is_testnet=use_testnet
+        ).first()
+        
+        if not api_key_record:
+            return None, None
+        
+        return api_key_record.get_credentials()
+    
+    def _build_config(self, exchange_name, use_testnet=True):
+        """Build the CCXT client config for an exchange"""
+        api_key, api_secret = self._get_credentials(exchange_name, use_testnet)
+        
+        config = {
+            'enableRateLimit': True,
+            'timeout': self.timeout,
+            'options': {'defaultType': 'spot'}
+        }
+        
+        # Add API credentials if available
+        if api_key and api_secret:
+            config['apiKey'] = api_key
+            config['secret'] = api_secret
+        
+        # OrderTracker fetches all open orders of an account in one call;
+        # binance refuses that by default because it costs more weight
+        if exchange_name == 'binance':
+            config['options']['warnOnFetchOpenOrdersWithoutSymbol'] = False
+        
+        # Configure testnet/sandbox
+        if use_testnet:
+            if exchange_name == 'binance':
+                config['urls'] = {
+                    'api': {
+                        'public': 'https://testnet.binance.vision/api',
+                        'private': 'https://testnet.binance.vision/api',
+                    }
+                }
+            elif exchange_name == 'bybit':
+                config['urls'] = {
+                    'api': {
+                        'public': 'https://api-testnet.bybit.com',
+                        'private': 'https://api-testnet.bybit.com',
+                    }
+                }
+        
+        return config
+    
+    def _client_key(self, exchange_name, use_testnet=True):
+        """Key identifying a gateway client (one per user per exchange)"""
+        return (exchange_name, use_testnet, self.user_id)
+    
+    @staticmethod
+    def evict_clients(user_id, exchange_name, use_testnet=True):
+        """
+        Drop a user's cached gateway client after their API key changed
+        
+        The next call builds a client with the current key. Other processes
+        rebuild theirs within EXCHANGE_GATEWAY_CLIENT_TTL.
+        
+        Args:
+            user_id: User ID
+            exchange_name: Exchange name
+            use_testnet: Testnet/sandbox client
+        """
+        exchange_gateway.evict((exchange_name, use_testnet, user_id))
+    
+    def _call(self, exchange_name, method, *args, use_testnet=True):
+        """
+        Execute a CCXT method through the gateway or a local client
+        
+        Args:
+            exchange_name: Exchange name
+            method: CCXT method name (e.g. 'fetch_order')
+            *args: Positional arguments for the method
+            use_testnet: Use testnet/sandbox mode
+            
+        Returns:
+            The CCXT method result
+        """
+        breaker = circuit_breakers.get(exchange_name, method) if circuit_breakers.enabled else None
+        attempt = 0
+        while True:
+            # Fail fast while the endpoint is known to be down
+            if breaker:
+                breaker.before_call()
+            try:
+                self._acquire_budget(exchange_name, method, args, use_testnet)
+            except Exception:
+                if breaker:
+                    breaker.release()
+                raise
+            
+            try:
+                if self.hedge_requests and method in self.HEDGED_METHODS:
+                    result = self._hedged(exchange_name, method, args, use_testnet)
+                else:
+                    result = self._execute(exchange_name, method, args, use_testnet)
+            except Exception as e:
+                if breaker:
+                    breaker.record(e)
+                if not isinstance(e, ccxt.NetworkError) or method not in self.RETRYABLE_METHODS \
+                        or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                exchange_metrics.record_retry(exchange_name, method)
+                time.sleep(0.2 * 2 ** (attempt - 1))
+            else:
+                if breaker:
+                    breaker.record()
+                return result
+    
+    def _hedged(self, exchange_name, method, args, use_testnet=True):
+        """
+        Run an idempotent read, sending a second request if the first is
+        slower than this call's recent p95; the first response wins
+        """
+        delay = exchange_metrics.quantile(exchange_name, method, 0.95) or self.hedge_delay
+        primary = self._submit(exchange_name, method, args, use_testnet)
+        timeout = self.timeout / 1000 + 5
+        
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        
+        # Only hedge when the rate-limit budget allows it right now
+        try:
+            self._acquire_budget(exchange_name, method, args, use_testnet, max_wait=0)
+        except ExchangeException:
+            return primary.result(timeout=timeout)
+        
+        exchange_metrics.record_retry(exchange_name, method)
+        pending = {primary, self._submit(exchange_name, method, args, use_testnet)}
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                raise TimeoutError(f"{exchange_name} {method} timed out")
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+                error = future.exception()
+        raise error
+    
+    def _submit(self, exchange_name, method, args, use_testnet=True):
+        """Start one CCXT call without waiting; returns a concurrent future"""
+        if self.use_gateway:
+            if exchange_name not in self.SUPPORTED_EXCHANGES:
+                raise ExchangeException(f"Unsupported exchange: {exchange_name}")
+            return exchange_gateway.submit(
+                self._client_key(exchange_name, use_testnet), exchange_name, method, *args,
+                config_factory=lambda: self._build_config(exchange_name, use_testnet)
+            )
+        
+        exchange = self.get_exchange(exchange_name, use_testnet)
+        if ExchangeService._hedge_executor is None:
+            ExchangeService._hedge_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv('EXCHANGE_HEDGE_WORKERS', 32)), thread_name_prefix='exchange-hedge'
+            )
+        return ExchangeService._hedge_executor.submit(
+            self._timed, exchange_name, method, getattr(exchange, method), *args
+        )
+    
+    def _execute(self, exchange_name, method, args, use_testnet=True):
+        """Run one CCXT call on the gateway or the local client"""
+        if not self.use_gateway:
+            exchange = self.get_exchange(exchange_name, use_testnet)
+            return self._timed(exchange_name, method, getattr(exchange, method), *args)
+        
+        if exchange_name not in self.SUPPORTED_EXCHANGES:
+            raise ExchangeException(f"Unsupported exchange: {exchange_name}")
+        
+        # The gateway records its own latency
+        return exchange_gateway.call(
+            self._client_key(exchange_name, use_testnet), exchange_name, method, *args,
+            config_factory=lambda: self._build_config(exchange_name, use_testnet)
+        )
+    
+    def _timed(self, exchange_name, method, fn, *args):
+        """Call fn and record its latency and any error"""
+        started = time.perf_counter()
+        try:
+            result = fn(*args)
+        except Exception as e:
+            exchange_metrics.observe(exchange_name, method, time.perf_counter() - started, e)
+            raise
+        exchange_metrics.observe(exchange_name, method, time.perf_counter() - started)
+        return result
+    
     def place_order(self, symbol, side, order_type, quantity, price=None, 
-                   stop_loss=None, take_profit=None, exchange_name='binance'):
+                   stop_loss=None, take_profit=None, exchange_name='binance',
+                   client_order_id=None):
         """
         Place order on exchange
         
@@ -126,57 +340,58 @@ class ExchangeService:
             stop_loss: Stop loss price
             take_profit: Take profit price
             exchange_name: Exchange name
+            client_order_id: Idempotency key sent as the exchange's client
+                order id; repeating a call with the same id returns the
+                existing order instead of placing a new one
             
         Returns:
-            Order details dict
+            Order details dict; with stop_loss or take_profit it also holds
+            stop_orders, one batch result per protective order
             
         Raises:
             ExchangeException: If order placement fails
         """
         try:
-            exchange = self.get_exchange(exchange_name)
-            
-            # Validate parameters
-            if side not in ['buy', 'sell']:
-                raise ValueError("Side must be 'buy' or 'sell'")
-            
             if order_type not in ['market', 'limit', 'stop_loss']:
                 raise ValueError("Invalid order type")
             
-            if quantity <= 0:
-                raise ValueError("Quantity must be positive")
+            params = None
+            if client_order_id:
+                existing = self._find_client_order(exchange_name, symbol, client_order_id)
+                if existing:
+                    return existing
+                params = {'clientOrderId': client_order_id}
             
-            # Place order based on type
-            order = None
+            request = self._order_request(symbol, side, order_type, quantity, price, params)
+            try:
+                order = self._call(exchange_name, 'create_order', *request)
+            except (ccxt.NetworkError, getattr(ccxt, 'DuplicateOrderId', ccxt.InvalidOrder)):
+                # The exchange may have accepted the order before the error
+                existing = None
+                if client_order_id:
+                    try:
+                        existing = self._find_client_order(
+                            exchange_name, symbol, client_order_id, check_exchange=True
+                        )
+                    except Exception as e:
+                        logger.warning(f"Failed to look up order {client_order_id}: {str(e)}")
+                if existing:
+                    return existing
+                raise
+            self._invalidate_account(exchange_name, [symbol])
             
-            if order_type == 'market':
-                if side == 'buy':
-                    order = exchange.create_market_buy_order(symbol, quantity)
-                else:
-                    order = exchange.create_market_sell_order(symbol, quantity)
-                    
-            elif order_type == 'limit':
-                if not price:
-                    raise ValueError("Price required for limit orders")
-                if side == 'buy':
-                    order = exchange.create_limit_buy_order(symbol, quantity, price)
-                else:
-                    order = exchange.create_limit_sell_order(symbol, quantity, price)
-                    
-            elif order_type == 'stop_loss':
-                if not price:
-                    raise ValueError("Price required for stop loss orders")
-                params = {'stopPrice': price}
-                if side == 'buy':
-                    order = exchange.create_order(symbol, 'stop_loss', 'buy', quantity, price, params)
-                else:
-                    order = exchange.create_order(symbol, 'stop_loss', 'sell', quantity, price, params)
+            if client_order_id:
+                self._remember_client_order(exchange_name, client_order_id, self._format_order(order))
+            
+            result = self._format_order(order)
             
             # Add stop loss and take profit if provided
             if order and (stop_loss or take_profit):
-                self._add_stop_orders(exchange, order['id'], symbol, side, quantity, stop_loss, take_profit)
+                result['stop_orders'] = self._add_stop_orders(
+                    exchange_name, order['id'], symbol, side, quantity, stop_loss, take_profit
+                )
             
-            return self._format_order(order)
+            return result
             
         except ccxt.InsufficientFunds as e:
             raise ExchangeException("Insufficient funds")
@@ -200,8 +415,8 @@ class ExchangeService:
             Cancellation result
         """
         try:
-            exchange = self.get_exchange(exchange_name)
-            result = exchange.cancel_order(order_id, symbol)
+            result = self._call(exchange_name, 'cancel_order', order_id, symbol)
+            self._invalidate_account(exchange_name, [symbol])
             return self._format_order(result)
         except Exception as e:
             raise ExchangeException(f"Failed to cancel order: {str(e)}")
@@ -219,8 +434,7 @@ class ExchangeService:
             Order status dict
         """
         try:
-            exchange = self.get_exchange(exchange_name)
-            order = exchange.fetch_order(order_id, symbol)
+            order = self._call(exchange_name, 'fetch_order', order_id, symbol)
             return self._format_order(order)
         except Exception as e:
             raise ExchangeException(f"Failed to fetch order: {str(e)}")
@@ -235,29 +449,20 @@ class ExchangeService:
         Returns:
             Balance dict
         """
-        try:
-            # Check cache first
-            cache_key = f'balance:{self.user_id}:{exchange_name}'
-            cached = redis_client.get(cache_key)
-            if cached:
-                return json.loads(cached)
-            
-            exchange = self.get_exchange(exchange_name)
-            balance = exchange.fetch_balance()
-            
-            result = {
+        def load():
+            balance = self._call(exchange_name, 'fetch_balance')
+            return {
                 'exchange': exchange_name,
                 'total': balance['total'],
                 'free': balance['free'],
                 'used': balance['used'],
-                'timestamp': exchange.milliseconds()
+                'timestamp': int(time.time() * 1000)
             }
-            
-            # Cache for 30 seconds
-            redis_client.setex(cache_key, self.cache_timeout, json.dumps(result))
-            
-            return result
-            
+        
+        try:
+            return account_cache.get_or_load(
+                f'balance:{self.user_id}:{exchange_name}', load, self.cache_timeout
+            )
         except Exception as e:
             raise ExchangeException(f"Failed to fetch balance: {str(e)}")
     
@@ -271,49 +476,562 @@ class ExchangeService:
         Returns:
             List of positions
         """
-        try:
-            exchange = self.get_exchange(exchange_name)
-            positions = exchange.fetch_positions()
+        def load():
+            positions = self._call(exchange_name, 'fetch_positions')
             return [self._format_position(p) for p in positions if p['contracts'] > 0]
+        
+        try:
+            return account_cache.get_or_load(
+                f'positions:{self.user_id}:{exchange_name}', load, self.positions_cache_timeout
+            )
         except Exception as e:
             raise ExchangeException(f"Failed to fetch positions: {str(e)}")
     
-    def get_open_orders(self, symbol=None, exchange_name='binance'):
+    def get_open_orders(self, symbol=None, exchange_name='binance', use_cache=True):
         """
         Get open orders
         
         Args:
             symbol: Trading pair (optional, get all if None)
             exchange_name: Exchange name
+            use_cache: Serve from the short-lived account cache
             
         Returns:
             List of open orders
         """
-        try:
-            exchange = self.get_exchange(exchange_name)
-            orders = exchange.fetch_open_orders(symbol)
+        def load():
+            orders = self._call(exchange_name, 'fetch_open_orders', symbol)
             return [self._format_order(o) for o in orders]
+        
+        try:
+            if not use_cache:
+                return load()
+            return account_cache.get_or_load(
+                self._open_orders_key(exchange_name, symbol), load, self.orders_cache_timeout
+            )
         except Exception as e:
             raise ExchangeException(f"Failed to fetch open orders: {str(e)}")
     
-    def _add_stop_orders(self, exchange, order_id, symbol, side, quantity, stop_loss, take_profit):
-        """Add stop loss and take profit orders"""
+    def get_order_book(self, symbol, limit=20, exchange_name='binance'):
+        """
+        Get order book
+        
+        Args:
+            symbol: Trading pair
+            limit: Levels per side
+            exchange_name: Exchange name
+        
+        Returns:
+            Order book dict with bids and asks as [price, amount] levels
+        """
+        try:
+            book = self._call(exchange_name, 'fetch_order_book', symbol, limit)
+            return {
+                'exchange': exchange_name,
+                'symbol': symbol,
+                'bids': [level[:2] for level in book['bids'][:limit]],
+                'asks': [level[:2] for level in book['asks'][:limit]],
+                'timestamp': book.get('timestamp') or int(time.time() * 1000)
+            }
+        except Exception as e:
+            raise ExchangeException(f"Failed to fetch order book: {str(e)}")
+    
+    def get_closed_orders(self, symbol=None, since=None, exchange_name='binance'):
+        """
+        Get closed and canceled orders
+        
+        Uses fetchClosedOrders where supported, otherwise fetchOrders.
+        
+        Args:
+            symbol: Trading pair (optional, get all if None)
+            since: Only orders created at or after this timestamp (ms)
+            exchange_name: Exchange name
+            
+        Returns:
+            List of orders
+        """
         try:
-            opposite_side = 'sell' if side == 'buy' else 'buy'
+            method = 'fetch_closed_orders' if self._exchange_has(exchange_name, 'fetchClosedOrders') else 'fetch_orders'
+            orders = self._call(exchange_name, method, symbol, since)
+            return [self._format_order(o) for o in orders if o.get('status') != 'open']
+        except Exception as e:
+            raise ExchangeException(f"Failed to fetch closed orders: {str(e)}")
+    
+    def place_orders(self, batch, exchange_name='binance'):
+        """
+        Place a batch of orders
+        
+        Uses the exchange's native batch endpoint (createOrders) for the
+        orders CCXT accepts there, otherwise submits them concurrently with
+        bounded parallelism. A chunk the batch endpoint refuses as a whole is
+        resubmitted order by order. A failed order never aborts the rest of
+        the batch.
+        
+        Args:
+            batch: List of order dicts with symbol, side, type, quantity and
+                optional price, params, client_order_id and exchange_name
+            exchange_name: Default exchange for orders without exchange_name
             
-            if stop_loss:
-                exchange.create_order(
-                    symbol, 'stop_loss', opposite_side, quantity, stop_loss,
-                    {'stopPrice': stop_loss}
+        Returns:
+            List of result dicts in input order:
+            {'index', 'success', 'order', 'error'}
+        """
+        results = [None] * len(batch)
+        by_exchange = {}
+        
+        for index, item in enumerate(batch):
+            try:
+                params = item.get('params')
+                if item.get('client_order_id'):
+                    params = {**(params or {}), 'clientOrderId': item['client_order_id']}
+                request = self._order_request(
+                    item.get('symbol'), item.get('side'), item.get('type', 'market'),
+                    item.get('quantity'), item.get('price'), params
                 )
+            except Exception as e:
+                results[index] = self._batch_result(index, error=self._describe_order_error(e))
+                continue
+            name = item.get('exchange_name', exchange_name)
+            by_exchange.setdefault(name, []).append((index, request))
+        
+        for name, requests in by_exchange.items():
+            native, single = [], []
+            for entry in requests:
+                request = entry[1]
+                batchable = self._native_batch(name, 'createOrders', request[0], request[1])
+                (native if batchable else single).append(entry)
             
-            if take_profit:
-                exchange.create_order(
-                    symbol, 'take_profit', opposite_side, quantity, take_profit,
-                    {'stopPrice': take_profit}
+            chunk_size = self.BATCH_ORDER_LIMITS.get(name, 5)
+            chunks = [native[i:i + chunk_size] for i in range(0, len(native), chunk_size)]
+            calls = [
+                ('create_orders', ([
+                    {'symbol': r[0], 'type': r[1], 'side': r[2], 'amount': r[3], 'price': r[4], 'params': r[5]}
+                    for _, r in chunk
+                ],))
+                for chunk in chunks
+            ]
+            responses = self._call_many(name, calls)
+            
+            for chunk, response in zip(chunks, responses):
+                if isinstance(response, (ccxt.NotSupported, ccxt.BadRequest)):
+                    # Refused as a whole, so none of these orders was placed
+                    logger.warning(f"Batch order refused on {name}, placing orders one by one: {str(response)}")
+                    single.extend(chunk)
+                    continue
+                for offset, (index, _) in enumerate(chunk):
+                    if isinstance(response, Exception):
+                        results[index] = self._batch_result(index, error=self._describe_order_error(response))
+                    elif offset >= len(response) or response[offset].get('status') == 'rejected':
+                        order = response[offset] if offset < len(response) else None
+                        results[index] = self._batch_result(index, error=self._rejection_reason(order))
+                    else:
+                        results[index] = self._batch_result(index, order=response[offset])
+            
+            responses = self._call_many(name, [('create_order', r) for _, r in single])
+            for (index, _), response in zip(single, responses):
+                if isinstance(response, Exception):
+                    results[index] = self._batch_result(index, error=self._describe_order_error(response))
+                else:
+                    results[index] = self._batch_result(index, order=response)
+            
+            self._invalidate_account(name, {r[0] for _, r in requests})
+        
+        return results
+    
+    def cancel_orders(self, batch, exchange_name='binance'):
+        """
+        Cancel a batch of orders
+        
+        Orders on the same exchange and symbol are cancelled with one
+        cancelOrders request where CCXT accepts them, otherwise concurrently. When a
+        cancelOrders request fails its orders are retried one by one, and an
+        order the exchange no longer knows is looked up, so the results match
+        the exchange even if the batch was partly applied.
+        
+        Args:
+            batch: List of dicts with id, symbol and optional exchange_name
+            exchange_name: Default exchange for orders without exchange_name
+            
+        Returns:
+            List of result dicts in input order:
+            {'index', 'success', 'order', 'error'}
+        """
+        results = [None] * len(batch)
+        groups = {}
+        
+        for index, item in enumerate(batch):
+            if not isinstance(item, dict) or item.get('id') in (None, ''):
+                results[index] = self._batch_result(index, error="Order id required")
+                continue
+            name = item.get('exchange_name', exchange_name)
+            groups.setdefault((name, item.get('symbol')), []).append((index, item['id']))
+        
+        by_exchange = {}
+        for (name, symbol), orders in groups.items():
+            if self._native_batch(name, 'cancelOrders', symbol):
+                by_exchange.setdefault(name, []).append(
+                    (orders, ('cancel_orders', ([order_id for _, order_id in orders], symbol)))
+                )
+            else:
+                by_exchange.setdefault(name, []).extend(
+                    ([entry], ('cancel_order', (entry[1], symbol))) for entry in orders
                 )
+        
+        for name, entries in by_exchange.items():
+            responses = self._call_many(name, [call for _, call in entries])
+            retries = []
+            for (orders, (method, args)), response in zip(entries, responses):
+                if isinstance(response, Exception) and method == 'cancel_orders':
+                    logger.warning(f"Batch cancel failed on {name}, retrying per order: {str(response)}")
+                    retries.extend((index, order_id, args[1]) for index, order_id in orders)
+                elif isinstance(response, Exception):
+                    index = orders[0][0]
+                    results[index] = self._batch_result(index, error=f"Failed to cancel order: {str(response)}")
+                elif method == 'cancel_order':
+                    index = orders[0][0]
+                    results[index] = self._batch_result(index, order=response)
+                else:
+                    returned = {o.get('id'): o for o in (response or []) if isinstance(o, dict)}
+                    for index, order_id in orders:
+                        order = returned.get(order_id, {'id': order_id})
+                        if order.get('status') == 'rejected':
+                            results[index] = self._batch_result(index, error=self._rejection_reason(order))
+                        else:
+                            results[index] = self._batch_result(index, order=order)
+            
+            for index, result in self._cancel_one_by_one(name, retries).items():
+                results[index] = result
+        
+        for name, symbol in groups:
+            self._invalidate_account(name, [symbol])
+        
+        return results
+    
+    def _cancel_one_by_one(self, exchange_name, orders):
+        """
+        Cancel orders individually after a failed cancelOrders request
+        
+        An order reported as not found may have been cancelled by the failed
+        batch, so its current state is fetched instead.
+        
+        Args:
+            exchange_name: Exchange name
+            orders: List of (index, order_id, symbol)
+            
+        Returns:
+            Dict of batch results by index
+        """
+        results = {}
+        responses = self._call_many(exchange_name, [('cancel_order', (order_id, symbol)) for _, order_id, symbol in orders])
+        
+        lookups = []
+        for (index, order_id, symbol), response in zip(orders, responses):
+            if isinstance(response, ccxt.OrderNotFound):
+                lookups.append((index, order_id, symbol, response))
+            elif isinstance(response, Exception):
+                results[index] = self._batch_result(index, error=f"Failed to cancel order: {str(response)}")
+            else:
+                results[index] = self._batch_result(index, order=response)
+        
+        responses = self._call_many(exchange_name, [('fetch_order', (order_id, symbol)) for _, order_id, symbol, _ in lookups])
+        for (index, order_id, symbol, error), response in zip(lookups, responses):
+            if not isinstance(response, Exception) and response.get('status') == 'canceled':
+                results[index] = self._batch_result(index, order=response)
+            else:
+                results[index] = self._batch_result(index, error=f"Failed to cancel order: {str(error)}")
+        
+        return results
+    
+    def _open_orders_key(self, exchange_name, symbol=None):
+        return f'open_orders:{self.user_id}:{exchange_name}:{symbol or "*"}'
+    
+    def _invalidate_account(self, exchange_name, symbols=()):
+        """Drop cached balance, positions and open orders after an order change"""
+        account_cache.invalidate(
+            f'balance:{self.user_id}:{exchange_name}',
+            f'positions:{self.user_id}:{exchange_name}',
+            self._open_orders_key(exchange_name),
+            *(self._open_orders_key(exchange_name, s) for s in symbols if s)
+        )
+    
+    @staticmethod
+    def client_order_id(*parts):
+        """
+        Deterministic client order id for an idempotency key
+        
+        Example: ExchangeService.client_order_id('trade', trade.id)
+        
+        Returns:
+            22 alphanumeric characters, accepted by every supported exchange
+        """
+        digest = hashlib.sha1(':'.join(str(p) for p in parts).encode()).hexdigest()
+        return f'tb{digest[:20]}'
+    
+    def _client_order_key(self, exchange_name, client_order_id):
+        return f'client_order:{self.user_id}:{exchange_name}:{client_order_id}'
+    
+    def _find_client_order(self, exchange_name, symbol, client_order_id, check_exchange=False):
+        """
+        Look up an order already placed under a client order id
+        
+        The dedup cache is checked first. An earlier attempt that never
+        recorded its outcome leaves a pending marker, in which case (or when
+        check_exchange is set) the exchange is queried by client order id.
+        
+        Returns:
+            Formatted order dict or None
+        """
+        key = self._client_order_key(exchange_name, client_order_id)
+        try:
+            cached = redis_client.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Order dedup cache unavailable: {str(e)}")
+            cached, check_exchange = None, True
+        
+        if isinstance(cached, bytes):
+            cached = cached.decode()
+        if cached and cached != self.PENDING_ORDER:
+            return json.loads(cached)
+        
+        if cached or check_exchange:
+            try:
+                order = self._call(exchange_name, 'fetch_order', None, symbol, {'clientOrderId': client_order_id})
+            except ccxt.OrderNotFound:
+                order = None
+            if order:
+                order = self._format_order(order)
+                self._remember_client_order(exchange_name, client_order_id, order)
+                return order
+            return None
+        
+        # First attempt: mark it so a retry knows to ask the exchange
+        try:
+            redis_client.setex(key, self.CLIENT_ORDER_TTL, self.PENDING_ORDER)
+        except redis.RedisError:
+            pass
+        return None
+    
+    def _remember_client_order(self, exchange_name, client_order_id, order):
+        try:
+            redis_client.setex(
+                self._client_order_key(exchange_name, client_order_id), self.CLIENT_ORDER_TTL, json.dumps(order)
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Failed to record order {client_order_id}: {str(e)}")
+    
+    def _order_request(self, symbol, side, order_type, quantity, price=None, params=None):
+        """
+        Validate an order and build the create_order arguments
+        
+        Returns:
+            Tuple of (symbol, type, side, amount, price, params)
+            
+        Raises:
+            ValueError: If the order is invalid
+        """
+        if side not in ['buy', 'sell']:
+            raise ValueError("Side must be 'buy' or 'sell'")
+        
+        if order_type not in ['market', 'limit', 'stop_loss', 'take_profit']:
+            raise ValueError("Invalid order type")
+        
+        if not quantity or quantity <= 0:
+            raise ValueError("Quantity must be positive")
+        
+        params = dict(params or {})
+        
+        if order_type == 'market':
+            price = None
+        elif order_type == 'limit':
+            if not price:
+                raise ValueError("Price required for limit orders")
+        else:
+            if not price:
+                raise ValueError(f"Price required for {order_type.replace('_', ' ')} orders")
+            params['stopPrice'] = price
+        
+        return symbol, order_type, side, quantity, price, params
+    
+    def _call_many(self, exchange_name, calls, use_testnet=True):
+        """
+        Execute several CCXT calls on one exchange concurrently
+        
+        Args:
+            exchange_name: Exchange name
+            calls: List of (method, args) tuples
+            use_testnet: Use testnet/sandbox mode
+            
+        Returns:
+            List of results in input order; failed calls yield the exception
+        """
+        if not calls:
+            return []
+        
+        if self.use_gateway:
+            results = []
+            for i in range(0, len(calls), self.batch_concurrency):
+                chunk = calls[i:i + self.batch_concurrency]
+                chunk_results = [None] * len(chunk)
+                admitted = []
+                for offset, (method, args) in enumerate(chunk):
+                    breaker = circuit_breakers.get(exchange_name, method) if circuit_breakers.enabled else None
+                    try:
+                        if breaker:
+                            breaker.before_call()
+                    except ExchangeException as e:
+                        chunk_results[offset] = e
+                        continue
+                    try:
+                        self._acquire_budget(exchange_name, method, args, use_testnet)
+                    except ExchangeException as e:
+                        if breaker:
+                            breaker.release()
+                        chunk_results[offset] = e
+                        continue
+                    admitted.append((offset, method, args, breaker))
+                
+                responses = exchange_gateway.call_many([
+                    {
+                        'client_key': self._client_key(exchange_name, use_testnet),
+                        'exchange_name': exchange_name,
+                        'method': method,
+                        'args': args,
+                        'config_factory': lambda: self._build_config(exchange_name, use_testnet)
+                    }
+                    for _, method, args, _ in admitted
+                ])
+                for (offset, _, _, breaker), response in zip(admitted, responses):
+                    if breaker:
+                        breaker.record(response if isinstance(response, Exception) else None)
+                    chunk_results[offset] = response
+                results.extend(chunk_results)
+            return results
+        
+        def run(call):
+            try:
+                return self._call(exchange_name, call[0], *call[1], use_testnet=use_testnet)
+            except Exception as e:
+                return e
+        
+        # Create the client up front so workers share one instance
+        try:
+            self.get_exchange(exchange_name, use_testnet)
         except Exception as e:
-            print(f"Failed to add stop orders: {str(e)}")
+            return [e] * len(calls)
+        
+        if len(calls) == 1:
+            return [run(calls[0])]
+        
+        with ThreadPoolExecutor(max_workers=min(self.batch_concurrency, len(calls))) as pool:
+            return list(pool.map(run, calls))
+    
+    def _acquire_budget(self, exchange_name, method, args, use_testnet=True, max_wait=None):
+        """Wait for the cluster-wide rate-limit budget of the user's API key"""
+        account = f"{self.user_id}:{int(use_testnet)}" if self.user_id else 'public'
+        count = len(args[0]) if method in ('create_orders', 'cancel_orders') and args else 1
+        exchange_rate_limiter.acquire(exchange_name, method, account=account, count=count, max_wait=max_wait)
+    
+    def _exchange_class(self, exchange_name):
+        """CCXT client class for an exchange ('simulator' is the local stand-in)"""
+        if exchange_name == 'simulator':
+            return SimulatedExchange
+        return getattr(ccxt, exchange_name)
+    
+    def _exchange_has(self, exchange_name, feature):
+        """Check a CCXT capability flag for an exchange (cached per class)"""
+        key = (exchange_name, feature)
+        if key not in self._capabilities:
+            try:
+                exchange_class = self._exchange_class(exchange_name)
+                # CCXT fills in `has` per instance; the simulator declares it on
+                # the class, and building one would register a venue
+                has = exchange_class.has or exchange_class().has
+                self._capabilities[key] = bool(has.get(feature))
+            except Exception:
+                self._capabilities[key] = False
+        return self._capabilities[key]
+    
+    def _native_batch(self, exchange_name, feature, symbol, order_type=None):
+        """
+        Whether an order can go through a native batch endpoint
+        
+        CCXT's binance createOrders and cancelOrders accept contract markets
+        only (unified symbols such as 'BTC/USDT:USDT'), and createOrders
+        refuses conditional orders there.
+        """
+        if not self._exchange_has(exchange_name, feature):
+            return False
+        rules = self.NATIVE_BATCH_RULES.get(exchange_name, {})
+        if rules.get('contracts_only') and ':' not in (symbol or ''):
+            return False
+        if order_type in self.CONDITIONAL_ORDER_TYPES and not rules.get('conditional', True):
+            return False
+        return True
+    
+    def _batch_result(self, index, order=None, error=None):
+        """Build a per-order batch result"""
+        return {
+            'index': index,
+            'success': error is None,
+            'order': self._format_order(order) if order else None,
+            'error': error
+        }
+    
+    def _describe_order_error(self, error):
+        """Map an order placement error to a user-facing message"""
+        if isinstance(error, ccxt.InsufficientFunds):
+            return "Insufficient funds"
+        if isinstance(error, ccxt.InvalidOrder):
+            return f"Invalid order: {str(error)}"
+        if isinstance(error, ccxt.ExchangeError):
+            return f"Exchange error: {str(error)}"
+        if isinstance(error, ValueError):
+            return str(error)
+        return f"Failed to place order: {str(error)}"
+    
+    def _rejection_reason(self, order):
+        """Message for an order a batch endpoint rejected, with the exchange's own error"""
+        info = (order or {}).get('info') or {}
+        if not isinstance(info, dict):
+            return "Order rejected by exchange"
+        
+        message = next((info[k] for k in ('msg', 'sMsg', 'retMsg', 'message', 'error') if info.get(k)), None)
+        code = next((info[k] for k in ('code', 'sCode', 'retCode') if info.get(k) not in (None, '')), None)
+        if message is None:
+            return "Order rejected by exchange"
+        return f"Order rejected by exchange: {message}" + (f" (code {code})" if code is not None else "")
+    
+    def _add_stop_orders(self, exchange_name, order_id, symbol, side, quantity, stop_loss, take_profit):
+        """
+        Add stop loss and take profit orders in one batch
+        
+        Returns:
+            List of batch results with the order type; failures are
+            returned (and logged), not raised
+        """
+        opposite_side = 'sell' if side == 'buy' else 'buy'
+        batch = []
+        
+        if stop_loss:
+            batch.append({
+                'symbol': symbol, 'side': opposite_side, 'type': 'stop_loss',
+                'quantity': quantity, 'price': stop_loss
+            })
+        
+        if take_profit:
+            batch.append({
+                'symbol': symbol, 'side': opposite_side, 'type': 'take_profit',
+                'quantity': quantity, 'price': take_profit
+            })
+        
+        results = self.place_orders(batch, exchange_name=exchange_name)
+        for item, result in zip(batch, results):
+            result['type'] = item['type']
+            if not result['success']:
+                logger.warning(
+                    f"Failed to add stop order for {order_id} ({symbol}): {result['error']}"
+                )
+        return results
     
     def _format_order(self, order):
         """Format order data consistently"""
@@ -0,0 +1,77 @@
+import logging
+from datetime import datetime
+from sqlalchemy import Float, String, case, column, or_, values
+from app import db
+from app.models.position import Position
+from app.services.market_feed import market_data_cache
+
+logger = logging.getLogger(__name__)
+
+class MarkToMarketService:
+    """Marks open positions to the latest cached market prices in bulk"""
+
+    def __init__(self, batch_size=1000):
+        """
+        Initialize mark-to-market service
+
+        Args:
+            batch_size: Symbols repriced per UPDATE statement
+        """
+        self.batch_size = batch_size
+
+    def run(self, prices=None):
+        """
+        Update current_price and unrealized_pnl of every position
+
+        Each batch of symbols is applied with one set-based UPDATE, the
+        same (current_price - entry_price) * quantity as
+        Position.calculate_pnl, without loading positions. Rows whose price
+        did not move are left untouched.
+
+        Args:
+            prices: {symbol: price} (defaults to the market data cache)
+
+        Returns:
+            Number of positions updated
+        """
+        if prices is None:
+            symbols = [row.symbol for row in db.session.query(Position.symbol).distinct()]
+            prices = market_data_cache.get_prices(symbols)
+        prices = [(symbol, float(price)) for symbol, price in prices.items() if price is not None]
+        if not prices:
+            return 0
+
+        now = datetime.utcnow()
+        updated = 0
+        try:
+            for i in range(0, len(prices), self.batch_size):
+                result = db.session.execute(self._update(prices[i:i + self.batch_size], now))
+                updated += result.rowcount
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to mark positions to market: {str(e)}")
+            raise
+
+        logger.info(f"Marked {updated} positions across {len(prices)} symbols")
+        return updated
+
+    def _update(self, batch, now):
+        positions = Position.__table__
+
+        if db.session.get_bind().dialect.name == 'postgresql':
+            # UPDATE positions ... FROM (VALUES (symbol, price), ...) AS prices
+            marks = values(column('symbol', String), column('price', Float), name='prices').data(batch)
+            price = marks.c.price
+            symbol_match = positions.c.symbol == marks.c.symbol
+        else:
+            # Elsewhere: the same single statement with the prices inlined as a CASE
+            price = case(dict(batch), value=positions.c.symbol)
+            symbol_match = positions.c.symbol.in_([symbol for symbol, _ in batch])
+
+        pnl = (price - positions.c.entry_price) * positions.c.quantity
+        return positions.update().where(
+            symbol_match,
+            or_(positions.c.current_price.is_distinct_from(price), positions.c.unrealized_pnl.is_distinct_from(pnl))
+        ).values(current_price=price, unrealized_pnl=pnl, updated_at=now)
+
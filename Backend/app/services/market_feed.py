@@ -0,0 +1,419 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+import redis
+from app import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Symbols streamed even when no user is subscribed
+DEFAULT_SYMBOLS = ['BTC/USDT', 'ETH/USDT', 'BNB/USDT', 'SOL/USDT', 'ADA/USDT']
+
+# Redis sorted set of symbols requested by subscribers, scored by last request time
+SUBSCRIPTIONS_KEY = 'market:requested'
+
+# Redis hash of normalized symbol -> symbol for every market the feed's exchanges list
+MARKETS_KEY = 'market:markets'
+
+# Redis channel the feed publishes normalized ticks on
+TICKS_CHANNEL = 'market:ticks'
+
+
+def normalize_symbol(symbol):
+    """Map 'BTC/USDT', 'btc-usdt' and 'BTCUSDT' to one cache key"""
+    return symbol.upper().replace('/', '').replace('-', '').replace(':', '')
+
+
+class MarketDataCache:
+    """Latest price and order book cache shared by routes, risk checks and SocketIO"""
+
+    def __init__(self, client=None, ttl=60, local_ttl=0.25, book_depth=20,
+                 subscription_ttl=None, max_subscriptions=None):
+        """
+        Initialize market data cache
+
+        Args:
+            client: Redis client (defaults to the app client)
+            ttl: Seconds a tick stays in Redis without updates
+            local_ttl: Seconds a Redis read is reused in-process
+            book_depth: Order book levels kept per side
+            subscription_ttl: Seconds a requested symbol is streamed after
+                its last request
+            max_subscriptions: Maximum symbols streamed on request
+        """
+        self.client = client or redis_client
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.book_depth = book_depth
+        self.subscription_ttl = subscription_ttl or int(os.getenv('MARKET_SUBSCRIPTION_TTL', 600))
+        self.max_subscriptions = max_subscriptions or int(os.getenv('MARKET_MAX_SUBSCRIPTIONS', 200))
+        self._local = {}
+        self._dirty = set()
+
+    # Write path (ingestion process)
+
+    def update_ticker(self, exchange_name, symbol, ticker):
+        """Merge a normalized ticker update into the cache"""
+        key = f'market:ticker:{exchange_name}:{normalize_symbol(symbol)}'
+        current = self._local.get(key, (None, 0))[0] or {}
+        merged = {**current, **{k: v for k, v in ticker.items() if v is not None}}
+        merged['exchange'] = exchange_name
+        merged['symbol'] = symbol
+        self._store(key, merged)
+        self._store(f'market:ticker:{normalize_symbol(symbol)}', merged)
+
+    def update_trade(self, exchange_name, symbol, price, timestamp=None):
+        """Update the last traded price from a trade print"""
+        self.update_ticker(exchange_name, symbol, {
+            'price': price,
+            'timestamp': timestamp or int(time.time() * 1000)
+        })
+
+    def update_book(self, exchange_name, symbol, bids, asks, timestamp=None):
+        """Store the top of an order book maintained from deltas"""
+        book = {
+            'exchange': exchange_name,
+            'symbol': symbol,
+            'bids': [level[:2] for level in bids[:self.book_depth]],
+            'asks': [level[:2] for level in asks[:self.book_depth]],
+            'timestamp': timestamp or int(time.time() * 1000)
+        }
+        self._store(f'market:book:{exchange_name}:{normalize_symbol(symbol)}', book)
+        self._store(f'market:book:{normalize_symbol(symbol)}', book)
+
+    def _store(self, key, value):
+        self._local[key] = (value, float('inf'))
+        self._dirty.add(key)
+
+    def flush(self):
+        """Write pending updates to Redis in one pipeline and publish them"""
+        if not self._dirty:
+            return 0
+
+        keys, self._dirty = self._dirty, set()
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            payload = json.dumps(self._local[key][0])
+            pipe.setex(key, self.ttl, payload)
+            if key.startswith('market:ticker:') and key.count(':') == 2:
+                pipe.publish(TICKS_CHANNEL, payload)
+        pipe.execute()
+        return len(keys)
+
+    # Read path (web and worker processes)
+
+    def _read(self, key):
+        value, expires = self._local.get(key, (None, 0))
+        if expires > time.monotonic():
+            return value
+
+        try:
+            raw = self.client.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Market data cache unavailable: {str(e)}")
+            return value
+
+        value = json.loads(raw) if raw else None
+        self._local[key] = (value, time.monotonic() + self.local_ttl)
+        return value
+
+    def get_ticker(self, symbol, exchange_name=None):
+        """
+        Get the latest ticker for a symbol
+
+        Args:
+            symbol: Trading pair in any common notation
+            exchange_name: Exchange name (latest across exchanges if None)
+
+        Returns:
+            Ticker dict or None if the symbol is not streamed
+        """
+        if exchange_name:
+            return self._read(f'market:ticker:{exchange_name}:{normalize_symbol(symbol)}')
+        return self._read(f'market:ticker:{normalize_symbol(symbol)}')
+
+    def get_price(self, symbol, exchange_name=None, default=None):
+        """Get the latest price for a symbol"""
+        ticker = self.get_ticker(symbol, exchange_name)
+        if ticker and ticker.get('price') is not None:
+            return ticker['price']
+        return default
+
+    def get_prices(self, symbols, exchange_name=None):
+        """Get latest prices for many symbols as {symbol: price}"""
+        return {
+            symbol: price for symbol in symbols
+            if (price := self.get_price(symbol, exchange_name)) is not None
+        }
+
+    def get_order_book(self, symbol, exchange_name=None, depth=None):
+        """Get the cached top of book for a symbol"""
+        if exchange_name:
+            book = self._read(f'market:book:{exchange_name}:{normalize_symbol(symbol)}')
+        else:
+            book = self._read(f'market:book:{normalize_symbol(symbol)}')
+        if book and depth:
+            book = {**book, 'bids': book['bids'][:depth], 'asks': book['asks'][:depth]}
+        return book
+
+    def request_symbol(self, symbol):
+        """
+        Ask the ingestion service to stream a symbol
+
+        Only markets listed by the feed's exchanges are accepted. Each request
+        renews the subscription for subscription_ttl seconds; new symbols are
+        refused once max_subscriptions are active.
+
+        Args:
+            symbol: Trading pair in any common notation
+
+        Returns:
+            The market's symbol (e.g. 'BTC/USDT'), or None if it is unknown
+            or the subscription limit is reached
+        """
+        try:
+            market = self.client.hget(MARKETS_KEY, normalize_symbol(symbol))
+            if market is None:
+                return None
+            market = market.decode() if isinstance(market, bytes) else market
+
+            if self.client.zscore(SUBSCRIPTIONS_KEY, market) is None:
+                self.client.zremrangebyscore(SUBSCRIPTIONS_KEY, '-inf', time.time() - self.subscription_ttl)
+                if self.client.zcard(SUBSCRIPTIONS_KEY) >= self.max_subscriptions:
+                    logger.warning(f"Market subscription limit reached, not streaming {market}")
+                    return None
+
+            self.client.zadd(SUBSCRIPTIONS_KEY, {market: time.time()})
+            return market
+        except redis.RedisError as e:
+            logger.warning(f"Failed to register market subscription: {str(e)}")
+            return None
+
+    def requested_symbols(self):
+        """Symbols requested within subscription_ttl, newest first, expired ones removed"""
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zremrangebyscore(SUBSCRIPTIONS_KEY, '-inf', time.time() - self.subscription_ttl)
+        pipe.zrevrange(SUBSCRIPTIONS_KEY, 0, self.max_subscriptions - 1)
+        symbols = pipe.execute()[1]
+        return [s.decode() if isinstance(s, bytes) else s for s in symbols]
+
+    def publish_markets(self, symbols):
+        """Register symbols the feed can stream so request_symbol accepts them"""
+        if symbols:
+            self.client.hset(MARKETS_KEY, mapping={normalize_symbol(s): s for s in symbols})
+
+
+class LocalFeedExchange:
+    """Offline stand-in for a ccxt.pro exchange producing a random walk"""
+
+    def __init__(self, exchange_name='local', interval=0.5):
+        self.id = exchange_name
+        self.interval = interval
+        self._prices = {}
+        self._open = {}
+
+    async def load_markets(self):
+        return {symbol: {'symbol': symbol} for symbol in DEFAULT_SYMBOLS}
+
+    def _step(self, symbol):
+        price = self._prices.get(symbol) or random.uniform(100, 1000)
+        self._open.setdefault(symbol, price)
+        price = max(price * (1 + random.uniform(-0.001, 0.001)), 0.01)
+        self._prices[symbol] = price
+        return price
+
+    async def watch_ticker(self, symbol):
+        await asyncio.sleep(self.interval)
+        price = self._step(symbol)
+        open_price = self._open[symbol]
+        return {
+            'symbol': symbol,
+            'last': price,
+            'bid': price * 0.9999,
+            'ask': price * 1.0001,
+            'open': open_price,
+            'high': max(price, open_price),
+            'low': min(price, open_price),
+            'change': price - open_price,
+            'percentage': (price - open_price) / open_price * 100,
+            'baseVolume': random.uniform(1000, 10000),
+            'timestamp': int(time.time() * 1000)
+        }
+
+    async def watch_trades(self, symbol):
+        await asyncio.sleep(self.interval)
+        price = self._step(symbol)
+        return [{'symbol': symbol, 'price': price, 'amount': random.uniform(0.01, 1),
+                 'timestamp': int(time.time() * 1000)}]
+
+    async def watch_order_book(self, symbol, limit=None):
+        await asyncio.sleep(self.interval)
+        price = self._prices.get(symbol) or self._step(symbol)
+        levels = limit or 20
+        return {
+            'symbol': symbol,
+            'bids': [[price * (1 - 0.0001 * (i + 1)), random.uniform(0.1, 10)] for i in range(levels)],
+            'asks': [[price * (1 + 0.0001 * (i + 1)), random.uniform(0.1, 10)] for i in range(levels)],
+            'timestamp': int(time.time() * 1000)
+        }
+
+    async def close(self):
+        pass
+
+
+class MarketFeedService:
+    """Websocket market data ingestion: one stream per symbol per exchange"""
+
+    def __init__(self, exchanges=None, symbols=None, cache=None, source=None, flush_interval=0.1):
+        """
+        Initialize market feed
+
+        Args:
+            exchanges: Exchange names to stream from
+            symbols: Symbols always streamed (plus subscriber requests)
+            cache: MarketDataCache to write into
+            source: 'ccxtpro' or 'local' (defaults to MARKET_FEED_SOURCE)
+            flush_interval: Seconds between Redis flushes
+        """
+        self.exchanges = exchanges or os.getenv('MARKET_FEED_EXCHANGES', 'binance').split(',')
+        env_symbols = os.getenv('MARKET_FEED_SYMBOLS')
+        self.symbols = symbols or (env_symbols.split(',') if env_symbols else list(DEFAULT_SYMBOLS))
+        self.cache = cache or market_data_cache
+        self.source = source or os.getenv('MARKET_FEED_SOURCE', 'ccxtpro')
+        self.flush_interval = flush_interval
+        self._clients = {}
+        self._streams = {}
+        self._markets = {}
+
+    def _client(self, exchange_name):
+        if exchange_name not in self._clients:
+            if self.source == 'local':
+                self._clients[exchange_name] = LocalFeedExchange(exchange_name)
+            else:
+                try:
+                    import ccxt.pro as ccxtpro
+                except ImportError:
+                    logger.warning("ccxt.pro not available, using local stand-in feed")
+                    self._clients[exchange_name] = LocalFeedExchange(exchange_name)
+                else:
+                    self._clients[exchange_name] = getattr(ccxtpro, exchange_name)({'enableRateLimit': True})
+        return self._clients[exchange_name]
+
+    async def _watch(self, exchange_name, symbol, kind):
+        """Run one watch loop, reconnecting with backoff on errors"""
+        client = self._client(exchange_name)
+        backoff = 1
+
+        while True:
+            try:
+                if kind == 'ticker':
+                    ticker = await client.watch_ticker(symbol)
+                    self.cache.update_ticker(exchange_name, symbol, self._normalize_ticker(ticker))
+                elif kind == 'trades':
+                    trades = await client.watch_trades(symbol)
+                    if trades:
+                        last = trades[-1]
+                        self.cache.update_trade(exchange_name, symbol, last['price'], last.get('timestamp'))
+                else:
+                    book = await client.watch_order_book(symbol)
+                    self.cache.update_book(
+                        exchange_name, symbol, book['bids'], book['asks'], book.get('timestamp')
+                    )
+                backoff = 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Market stream {exchange_name} {symbol} {kind} failed: {str(e)}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def _normalize_ticker(self, ticker):
+        """Map a ccxt ticker to the cache's field names"""
+        return {
+            'price': ticker.get('last'),
+            'bid': ticker.get('bid'),
+            'ask': ticker.get('ask'),
+            'change': ticker.get('change'),
+            'change_percent': ticker.get('percentage'),
+            'high_24h': ticker.get('high'),
+            'low_24h': ticker.get('low'),
+            'volume_24h': ticker.get('baseVolume'),
+            'timestamp': ticker.get('timestamp') or int(time.time() * 1000)
+        }
+
+    async def _load_markets(self):
+        """Load each exchange's markets once and publish them for request validation"""
+        for exchange_name in self.exchanges:
+            if exchange_name in self._markets:
+                continue
+            try:
+                markets = await self._client(exchange_name).load_markets()
+                self._markets[exchange_name] = set(markets)
+                self.cache.publish_markets(markets)
+            except Exception as e:
+                logger.warning(f"Failed to load {exchange_name} markets: {str(e)}")
+
+    def _wanted(self):
+        """Symbols to stream: configured plus those requested recently by subscribers"""
+        wanted = set(self.symbols)
+        try:
+            wanted.update(self.cache.requested_symbols())
+        except redis.RedisError as e:
+            logger.warning(f"Failed to read market subscriptions: {str(e)}")
+        return wanted
+
+    def _sync_streams(self):
+        """Start streams for new symbols and stop those no longer wanted"""
+        # Exchanges whose markets are known only stream symbols they list
+        wanted = {
+            (e, s) for e in self.exchanges for s in self._wanted()
+            if e not in self._markets or s in self._markets[e]
+        }
+
+        for key in set(self._streams) - wanted:
+            for task in self._streams.pop(key):
+                task.cancel()
+
+        for exchange_name, symbol in wanted - set(self._streams):
+            self._streams[(exchange_name, symbol)] = [
+                asyncio.ensure_future(self._watch(exchange_name, symbol, kind))
+                for kind in ('ticker', 'trades', 'book')
+            ]
+
+    async def run(self, resync_interval=5):
+        """Run ingestion until cancelled"""
+        logger.info(f"Market feed starting ({self.source}) for {', '.join(self.exchanges)}")
+        last_sync = 0
+
+        try:
+            while True:
+                if time.monotonic() - last_sync >= resync_interval:
+                    await self._load_markets()
+                    self._sync_streams()
+                    last_sync = time.monotonic()
+                try:
+                    self.cache.flush()
+                except redis.RedisError as e:
+                    logger.warning(f"Failed to flush market data: {str(e)}")
+                await asyncio.sleep(self.flush_interval)
+        finally:
+            for tasks in self._streams.values():
+                for task in tasks:
+                    task.cancel()
+            for client in self._clients.values():
+                await client.close()
+
+
+market_data_cache = MarketDataCache()
+
+
+def run_market_feed():
+    """Entry point for the ingestion process"""
+    asyncio.run(MarketFeedService().run())
+
+
+if __name__ == '__main__':
+    run_market_feed()
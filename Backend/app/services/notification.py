@@ -1,5 +1,6 @@
 from app import db
 from app.models.notification import Notification
+from app.utils.pagination import keyset_page
 from datetime import datetime
 import logging
 
@@ -322,28 +323,33 @@ class NotificationService:
         )
     
     @staticmethod
-    def get_user_notifications(user_id, unread_only=False, limit=50):
+    def get_user_notifications(user_id, unread_only=False, limit=50, cursor=None):
         """
-        Get user notifications
+        Get one page of user notifications, newest first
         
         Args:
             user_id: User ID
             unread_only: Return only unread notifications
-            limit: Maximum number of notifications
+            limit: Page size
+            cursor: next_cursor of the previous page (optional)
             
         Returns:
-            List of notifications
+            Dict with notifications, next_cursor and has_more
         """
         query = Notification.query.filter_by(user_id=user_id)
         
         if unread_only:
             query = query.filter_by(is_read=False)
         
-        notifications = query.order_by(
-            Notification.created_at.desc()
-        ).limit(limit).all()
+        notifications, next_cursor = keyset_page(
+            query, (Notification.created_at, Notification.id), cursor, limit
+        )
         
-        return [n.to_dict() for n in notifications]
+        return {
+            'notifications': [n.to_dict() for n in notifications],
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }
     
     @staticmethod
     def mark_as_read(notification_id, user_id):
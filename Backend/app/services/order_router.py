@@ -0,0 +1,347 @@
+import heapq
+import logging
+import math
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_app_context
+from app import db
+from app.models.api_key import ApiKey
+from app.models.trade import Trade
+from app.services.exchangeservice import ExchangeService
+from app.services.market_feed import market_data_cache
+from app.services.order_tracker import OrderTracker
+from app.utils.exception import ExchangeException, ValidationError
+
+logger = logging.getLogger(__name__)
+
+class SmartOrderRouter:
+    """Routes an order to the best venue, or splits it, after taker fees"""
+
+    # Taker fee rates used when ranking venues
+    TAKER_FEES = {
+        'binance': 0.001,
+        'coinbase': 0.006,
+        'kraken': 0.0026,
+        'bybit': 0.001,
+        'okx': 0.001,
+        'simulator': 0.001,
+    }
+    DEFAULT_TAKER_FEE = 0.002
+
+    # Order books fetched by this process: (exchange, symbol) -> (book, fetched_at)
+    _books = {}
+    _books_lock = threading.Lock()
+
+    def __init__(self, user_id, exchanges=None, book_ttl=0.3, max_feed_age=2.0, depth=20):
+        """
+        Initialize smart order router
+
+        Args:
+            user_id: User whose API keys and balances are used
+            exchanges: Candidate venues, limited to those with an active API
+                key (defaults to all of them)
+            book_ttl: Seconds a fetched order book is reused
+            max_feed_age: Seconds a streamed order book is trusted
+            depth: Order book levels considered per side
+        """
+        self.user_id = user_id
+        self.exchanges = exchanges
+        self.book_ttl = book_ttl
+        self.max_feed_age = max_feed_age
+        self.depth = depth
+        self.service = ExchangeService(user_id)
+
+    def connected_exchanges(self):
+        """
+        Venues the user has an active API key for, narrowed to the requested
+        exchanges if any
+
+        Raises:
+            ValidationError: If a requested exchange has no active API key
+        """
+        rows = db.session.query(ApiKey.exchange).filter_by(
+            user_id=self.user_id, is_active=True
+        ).distinct().all()
+        connected = [r.exchange for r in rows if r.exchange in ExchangeService.SUPPORTED_EXCHANGES]
+        if not self.exchanges:
+            return connected
+
+        unknown = sorted(set(self.exchanges) - set(connected))
+        if unknown:
+            raise ValidationError(f"No active API key for exchanges: {', '.join(unknown)}")
+        return [e for e in connected if e in self.exchanges]
+
+    def get_books(self, symbol, exchanges):
+        """
+        Get top of book for a symbol on every venue
+
+        Streamed books from the market feed are used when fresh, then books
+        this process fetched within book_ttl; the rest are fetched
+        concurrently.
+
+        Returns:
+            Dict of exchange -> book ({'bids', 'asks', ...})
+        """
+        books = {}
+        missing = []
+        now = time.time()
+
+        for exchange_name in exchanges:
+            streamed = market_data_cache.get_order_book(symbol, exchange_name)
+            if streamed and now - streamed.get('timestamp', 0) / 1000 <= self.max_feed_age:
+                books[exchange_name] = streamed
+                continue
+
+            with self._books_lock:
+                book, fetched_at = self._books.get((exchange_name, symbol), (None, 0))
+            if book and now - fetched_at <= self.book_ttl:
+                books[exchange_name] = book
+            else:
+                missing.append(exchange_name)
+
+        fetched = self._fan_out(
+            lambda name: self.service.get_order_book(symbol, self.depth, exchange_name=name), missing
+        )
+        for exchange_name, book in zip(missing, fetched):
+            if isinstance(book, Exception):
+                logger.warning(f"Order book unavailable on {exchange_name} for {symbol}: {str(book)}")
+                continue
+            with self._books_lock:
+                self._books[(exchange_name, symbol)] = (book, time.time())
+            books[exchange_name] = book
+
+        return books
+
+    def route(self, symbol, side, quantity, books, limit_price=None):
+        """
+        Allocate an order across venues by fee-adjusted price
+
+        Levels from every book are walked best-first until the quantity is
+        covered, so a large order takes the cheapest liquidity wherever it
+        sits. Pure computation on cached books.
+
+        Args:
+            symbol: Trading pair
+            side: 'buy' or 'sell'
+            quantity: Total quantity
+            books: Dict of exchange -> order book
+            limit_price: Ignore levels worse than this price (optional)
+
+        Returns:
+            Dict with children [{exchange, quantity, expected_price}],
+            unallocated quantity and expected average price including fees
+        """
+        buy = side == 'buy'
+        book_side = 'asks' if buy else 'bids'
+
+        # Each venue's levels are already sorted best-first; merge them lazily
+        def levels(exchange_name, book):
+            fee = self.TAKER_FEES.get(exchange_name, self.DEFAULT_TAKER_FEE)
+            for price, amount in book.get(book_side) or []:
+                if limit_price is not None and (price > limit_price if buy else price < limit_price):
+                    return
+                effective = price * (1 + fee) if buy else price * (1 - fee)
+                yield (effective if buy else -effective, price, amount, exchange_name)
+
+        merged = heapq.merge(*(levels(name, book) for name, book in books.items()))
+
+        remaining = quantity
+        allocation = {}
+        total_effective = 0.0
+        for key, price, amount, exchange_name in merged:
+            if remaining <= 0:
+                break
+            take = min(amount, remaining)
+            child = allocation.setdefault(exchange_name, [0.0, 0.0])
+            child[0] += take
+            child[1] += take * price
+            total_effective += take * abs(key)
+            remaining -= take
+
+        children = [
+            {'exchange': name, 'quantity': qty, 'expected_price': notional / qty}
+            for name, (qty, notional) in allocation.items()
+        ]
+        children.sort(key=lambda c: c['quantity'], reverse=True)
+        filled = quantity - max(remaining, 0)
+
+        return {
+            'symbol': symbol,
+            'side': side,
+            'children': children,
+            'unallocated': max(remaining, 0),
+            'expected_average': total_effective / filled if filled else None
+        }
+
+    def execute(self, symbol, side, quantity, order_type='market', price=None, workflow_id=None, route_id=None):
+        """
+        Route and submit an order, recording one Trade per child order
+
+        Each child order is sent with a client order id derived from the
+        route id and its position, so retrying a child never duplicates it.
+        The consolidated report is returned, not stored: a parent Trade row
+        would be counted again by the daily rollups, analytics and order
+        reconciliation, so the child Trades are the only persisted record.
+
+        Args:
+            symbol: Trading pair
+            side: 'buy' or 'sell'
+            quantity: Total quantity
+            order_type: 'market' or 'limit'
+            price: Limit price (required for limit orders)
+            workflow_id: Workflow the order belongs to (optional)
+            route_id: Idempotency key for the whole route (generated if None)
+
+        Returns:
+            Consolidated fill report dict with each child's Trade
+
+        Raises:
+            ValidationError: If the quantity or requested venues are invalid
+            ExchangeException: If no venue has liquidity for the order
+        """
+        if isinstance(quantity, bool) or not isinstance(quantity, (int, float)) \
+                or not math.isfinite(quantity) or quantity <= 0:
+            raise ValidationError("Quantity must be a positive number")
+        if order_type not in ['market', 'limit']:
+            raise ExchangeException("Smart routing supports market and limit orders only")
+        if order_type == 'limit' and not price:
+            raise ExchangeException("Price required for limit orders")
+
+        exchanges = self.connected_exchanges()
+        if not exchanges:
+            raise ExchangeException("No connected exchanges")
+
+        books = self.get_books(symbol, exchanges)
+
+        started = time.perf_counter()
+        plan = self.route(symbol, side, quantity, books, limit_price=price)
+        routing_ms = (time.perf_counter() - started) * 1000
+
+        children = plan['children']
+        if not children and order_type == 'limit' and books:
+            # Nothing marketable: rest the order on the best-priced venue
+            children = [{'exchange': self._best_venue(side, books), 'quantity': quantity, 'expected_price': price}]
+            plan['unallocated'] = 0
+        if not children:
+            raise ExchangeException(f"No liquidity available for {symbol}")
+        if plan['unallocated'] > 0:
+            # Beyond visible depth: the rest goes to the best venue
+            children[0]['quantity'] += plan['unallocated']
+
+        route_id = route_id or uuid.uuid4().hex
+        for index, child in enumerate(children):
+            child['client_order_id'] = ExchangeService.client_order_id('route', route_id, index)
+
+        results = self._fan_out(
+            lambda child: self.service.place_order(
+                symbol, side, order_type, child['quantity'], price, exchange_name=child['exchange'],
+                client_order_id=child['client_order_id']
+            ),
+            children
+        )
+
+        trades = []
+        for child, order in zip(children, results):
+            trade = self._child_trade(symbol, side, order_type, price, workflow_id, child, order)
+            db.session.add(trade)
+            trades.append((child, trade, order))
+
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return self._report(plan, routing_ms, trades, route_id)
+
+    def _best_venue(self, side, books):
+        """Venue with the best fee-adjusted top of book"""
+        buy = side == 'buy'
+        quotes = {}
+        for exchange_name, book in books.items():
+            levels = book.get('asks' if buy else 'bids')
+            if levels:
+                fee = self.TAKER_FEES.get(exchange_name, self.DEFAULT_TAKER_FEE)
+                quotes[exchange_name] = levels[0][0] * (1 + fee) if buy else -levels[0][0] * (1 - fee)
+        return min(quotes, key=quotes.get) if quotes else next(iter(books))
+
+    def _fan_out(self, fn, items):
+        """Run fn for every item in parallel; failures are returned as exceptions"""
+        if not items:
+            return []
+
+        app = current_app._get_current_object() if has_app_context() else None
+
+        def run(item):
+            try:
+                if app is None:
+                    return fn(item)
+                with app.app_context():
+                    return fn(item)
+            except Exception as e:
+                return e
+
+        if len(items) == 1:
+            return [run(items[0])]
+
+        with ThreadPoolExecutor(max_workers=len(items)) as pool:
+            return list(pool.map(run, items))
+
+    def _child_trade(self, symbol, side, order_type, price, workflow_id, child, order):
+        """Build the Trade row for one child order"""
+        trade = Trade(
+            user_id=self.user_id,
+            workflow_id=workflow_id,
+            symbol=symbol,
+            side=side,
+            type=order_type,
+            quantity=child['quantity'],
+            exchange=child['exchange']
+        )
+
+        if isinstance(order, Exception):
+            trade.price = price or child['expected_price']
+            trade.status = 'failed'
+            return trade
+
+        filled = order.get('filled') or 0
+        status = OrderTracker.STATUS_MAP.get(order.get('status'))
+        if status is None:
+            status = 'partially_filled' if filled > 0 else 'pending'
+
+        trade.price = order.get('price') or price or child['expected_price']
+        trade.exchange_order_id = order.get('id')
+        trade.filled_quantity = filled
+        trade.average_price = order.get('average')
+        trade.status = status
+        trade.fee = (order.get('fee') or {}).get('cost') or 0
+        return trade
+
+    def _report(self, plan, routing_ms, trades, route_id):
+        """Consolidate child fills into one report (computed from the child Trades, not persisted)"""
+        filled = sum(t.filled_quantity or 0 for _, t, _ in trades)
+        notional = sum((t.filled_quantity or 0) * (t.average_price or t.price) for _, t, _ in trades)
+
+        return {
+            'route_id': route_id,
+            'symbol': plan['symbol'],
+            'side': plan['side'],
+            'quantity': sum(c['quantity'] for c, _, _ in trades),
+            'filled_quantity': filled,
+            'average_price': notional / filled if filled else None,
+            'fees': sum(t.fee or 0 for _, t, _ in trades),
+            'expected_average': plan['expected_average'],
+            'routing_ms': round(routing_ms, 3),
+            'children': [
+                {
+                    'exchange': child['exchange'],
+                    'client_order_id': child['client_order_id'],
+                    'expected_price': child['expected_price'],
+                    'trade': trade.to_dict(),
+                    'error': getattr(order, 'message', str(order)) if isinstance(order, Exception) else None
+                }
+                for child, trade, order in trades
+            ]
+        }
@@ -0,0 +1,162 @@
+from app import db
+from app.models.trade import Trade
+from app.models.trade_daily_stat import TradeDailyStat
+from app.services.analytics_cache import analytics_cache
+from app.services.exchangeservice import ExchangeService
+from app.utils.exception import ExchangeException
+from datetime import datetime, timedelta, timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+class OrderTracker:
+    """Reconciles open trades with their exchange orders in bulk"""
+
+    # Trade statuses still waiting on the exchange
+    OPEN_STATUSES = ['pending', 'partially_filled']
+
+    # CCXT order status -> Trade status
+    STATUS_MAP = {
+        'closed': 'filled',
+        'canceled': 'canceled',
+        'expired': 'canceled',
+        'rejected': 'failed',
+    }
+
+    def __init__(self, max_fallback_fetches=20):
+        """
+        Initialize order tracker
+
+        Args:
+            max_fallback_fetches: Orders per group looked up one by one when
+                they appear in neither the open nor the closed order lists
+        """
+        self.max_fallback_fetches = max_fallback_fetches
+
+    def reconcile(self, user_id=None, exchange_name=None):
+        """
+        Reconcile every open trade with the exchange
+
+        Open trades are grouped by (user, exchange); each group costs one
+        fetch_open_orders and one closed-orders call. All changes are
+        written in a single transaction.
+
+        Args:
+            user_id: Restrict to one user (optional)
+            exchange_name: Restrict to one exchange (optional)
+
+        Returns:
+            Summary dict with groups, checked and updated counts
+        """
+        query = db.session.query(
+            Trade.id, Trade.user_id, Trade.exchange, Trade.symbol, Trade.exchange_order_id,
+            Trade.status, Trade.filled_quantity, Trade.average_price, Trade.fee, Trade.timestamp,
+            Trade.workflow_id, Trade.quantity, Trade.price, Trade.profit_loss
+        ).filter(
+            Trade.status.in_(self.OPEN_STATUSES),
+            Trade.exchange_order_id.isnot(None)
+        )
+
+        if user_id:
+            query = query.filter(Trade.user_id == user_id)
+        if exchange_name:
+            query = query.filter(Trade.exchange == exchange_name)
+
+        groups = {}
+        for row in query.all():
+            groups.setdefault((row.user_id, row.exchange), []).append(row)
+
+        updates = []
+        changes = []
+        for (group_user_id, group_exchange), trades in groups.items():
+            try:
+                orders = self._fetch_group_orders(group_user_id, group_exchange, trades)
+            except ExchangeException as e:
+                logger.warning(f"Order reconcile failed for user {group_user_id} on {group_exchange}: {e.message}")
+                continue
+
+            for trade in trades:
+                order = orders.get(trade.exchange_order_id)
+                if order:
+                    update = self._build_update(trade, order)
+                    if update:
+                        updates.append(update)
+                        old = trade._asdict()
+                        changes.append((old, {**old, **update}))
+
+        if updates:
+            try:
+                db.session.bulk_update_mappings(Trade, updates)
+                # Bulk updates skip ORM events, so roll up newly filled trades here
+                TradeDailyStat.record_changes(db.session.connection(), changes)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            analytics_cache.bump(*{old['user_id'] for old, _ in changes})
+
+        logger.info(f"Reconciled {sum(len(t) for t in groups.values())} open trades, {len(updates)} updated")
+
+        return {
+            'groups': len(groups),
+            'checked': sum(len(t) for t in groups.values()),
+            'updated': len(updates)
+        }
+
+    def _fetch_group_orders(self, user_id, exchange_name, trades):
+        """Fetch current order state for one (user, exchange) group keyed by order id"""
+        service = ExchangeService(user_id)
+        wanted = {t.exchange_order_id for t in trades}
+
+        orders = {o['id']: o for o in service.get_open_orders(exchange_name=exchange_name, use_cache=False) if o['id'] in wanted}
+
+        missing = wanted - set(orders)
+        if missing:
+            # Orders may be created on the exchange just before their Trade row
+            oldest = min(t.timestamp for t in trades) - timedelta(minutes=1)
+            since = int(oldest.replace(tzinfo=timezone.utc).timestamp() * 1000)
+            try:
+                closed = service.get_closed_orders(since=since, exchange_name=exchange_name)
+            except ExchangeException:
+                # Some exchanges require a symbol for order history
+                closed = []
+                for symbol in {t.symbol for t in trades if t.exchange_order_id in missing}:
+                    closed.extend(service.get_closed_orders(symbol, since=since, exchange_name=exchange_name))
+
+            for order in closed:
+                if order['id'] in missing:
+                    orders[order['id']] = order
+                    missing.discard(order['id'])
+
+        # Orders older than the closed-orders window: look them up individually
+        symbols = {t.exchange_order_id: t.symbol for t in trades}
+        for order_id in list(missing)[:self.max_fallback_fetches]:
+            try:
+                orders[order_id] = service.get_order_status(order_id, symbols[order_id], exchange_name=exchange_name)
+            except ExchangeException as e:
+                logger.warning(f"Failed to fetch order {order_id}: {e.message}")
+
+        return orders
+
+    def _build_update(self, trade, order):
+        """Build a bulk update mapping, or None if nothing changed"""
+        filled = order.get('filled') or 0
+        status = self.STATUS_MAP.get(order.get('status'))
+        if status is None:
+            status = 'partially_filled' if filled > 0 else trade.status
+
+        fee = (order.get('fee') or {}).get('cost')
+        update = {
+            'id': trade.id,
+            'status': status,
+            'filled_quantity': filled,
+            'average_price': order.get('average') or trade.average_price,
+            'fee': fee if fee is not None else trade.fee
+        }
+
+        if (update['status'], update['filled_quantity'], update['average_price'], update['fee']) == \
+           (trade.status, trade.filled_quantity, trade.average_price, trade.fee):
+            return None
+
+        update['updated_at'] = datetime.utcnow()
+        return update
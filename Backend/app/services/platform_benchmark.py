@@ -0,0 +1,171 @@
+import json
+import logging
+import time
+import redis
+from datetime import datetime
+from sqlalchemy import func
+from app import db, redis_client
+from app.models.trade_daily_stat import TradeDailyStat
+
+logger = logging.getLogger(__name__)
+
+# Redis keys: platform snapshot and per-user summaries (user_id -> JSON)
+SNAPSHOT_KEY = 'platform_benchmark'
+USER_SUMMARIES_KEY = 'platform_benchmark:users'
+
+# Percentiles reported for each benchmarked metric
+PERCENTILES = [10, 25, 50, 75, 90]
+
+# Per-user metrics summarised across the platform
+BENCHMARK_METRICS = ['win_rate', 'profit_factor', 'net_pnl', 'total_trades']
+
+
+class PlatformBenchmark:
+    """Platform-wide performance benchmark built from trade_daily_stats"""
+
+    def __init__(self, client=None):
+        """
+        Initialize platform benchmark
+
+        Args:
+            client: Redis client snapshots are stored in (defaults to the app client)
+        """
+        self.client = client or redis_client
+
+    def compute(self):
+        """
+        Summarise every user's performance in one pass over the rollup
+
+        Returns:
+            Tuple of (snapshot dict, {user_id: summary dict})
+        """
+        started = time.perf_counter()
+
+        rows = self._user_totals().having(func.sum(TradeDailyStat.trades) > 0)
+
+        summaries = {row.user_id: self._summary(row) for row in rows}
+
+        values = {metric: sorted(s[metric] for s in summaries.values()) for metric in BENCHMARK_METRICS}
+        count = len(summaries)
+
+        average = {
+            field: sum(s[field] for s in summaries.values()) / count if count else 0
+            for field in ['total_trades', 'winning_trades', 'losing_trades', 'win_rate',
+                          'total_profit', 'total_loss', 'net_pnl', 'profit_factor']
+        }
+
+        snapshot = {
+            'generated_at': datetime.utcnow().isoformat(),
+            'users': count,
+            'average': average,
+            'percentiles': {
+                metric: {f'p{p}': _percentile(values[metric], p) for p in PERCENTILES}
+                for metric in BENCHMARK_METRICS
+            },
+            'profitable_users': len([s for s in summaries.values() if s['net_pnl'] > 0])
+        }
+
+        logger.info(f"Computed platform benchmark for {count} users in {time.perf_counter() - started:.2f}s")
+        return snapshot, summaries
+
+    def refresh(self):
+        """
+        Compute and store the snapshot and per-user summaries
+
+        Returns:
+            The new snapshot
+        """
+        snapshot, summaries = self.compute()
+
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(USER_SUMMARIES_KEY)
+        items = [(user_id, json.dumps(summary)) for user_id, summary in summaries.items()]
+        for i in range(0, len(items), 1000):
+            pipe.hset(USER_SUMMARIES_KEY, mapping=dict(items[i:i + 1000]))
+        pipe.set(SNAPSHOT_KEY, json.dumps(snapshot))
+        pipe.execute()
+
+        return snapshot
+
+    def get_snapshot(self):
+        """
+        Latest stored snapshot
+
+        Computed inline (and stored) only when no aggregator run has
+        stored one yet.
+        """
+        try:
+            cached = self.client.get(SNAPSHOT_KEY)
+            if cached:
+                return json.loads(cached)
+            return self.refresh()
+        except redis.RedisError as e:
+            logger.warning(f"Platform benchmark unavailable from Redis: {str(e)}")
+            return self.compute()[0]
+
+    def get_user_summary(self, user_id):
+        """
+        A user's all-time performance summary
+
+        Read from the last aggregator run; users who traded for the first
+        time since then are summarised from their own rollup rows.
+        """
+        try:
+            cached = self.client.hget(USER_SUMMARIES_KEY, user_id)
+            if cached:
+                return json.loads(cached)
+        except redis.RedisError as e:
+            logger.warning(f"Platform benchmark unavailable from Redis: {str(e)}")
+
+        row = self._user_totals().filter(TradeDailyStat.user_id == user_id).first()
+
+        return self._summary(row) if row and row.trades else None
+
+    def _user_totals(self):
+        """Rollup counters summed per user"""
+        return db.session.query(
+            TradeDailyStat.user_id,
+            func.sum(TradeDailyStat.trades).label('trades'),
+            func.sum(TradeDailyStat.wins).label('wins'),
+            func.sum(TradeDailyStat.losses).label('losses'),
+            func.sum(TradeDailyStat.gross_profit).label('profit'),
+            func.sum(TradeDailyStat.gross_loss).label('loss'),
+            func.max(TradeDailyStat.largest_win).label('largest_win'),
+            func.min(TradeDailyStat.largest_loss).label('largest_loss')
+        ).group_by(TradeDailyStat.user_id)
+
+    def _summary(self, row):
+        """Performance summary of one user's summed rollup row"""
+        wins = row.wins or 0
+        losses = row.losses or 0
+        total_profit = row.profit or 0
+        total_loss = abs(row.loss or 0)
+
+        return {
+            'timeframe': 'ALL',
+            'total_trades': row.trades,
+            'winning_trades': wins,
+            'losing_trades': losses,
+            'win_rate': wins / row.trades * 100,
+            'total_profit': total_profit,
+            'total_loss': total_loss,
+            'net_pnl': total_profit - total_loss,
+            'avg_win': total_profit / wins if wins else 0,
+            'avg_loss': total_loss / losses if losses else 0,
+            'profit_factor': total_profit / total_loss if total_loss > 0 else 0,
+            'largest_win': row.largest_win if wins else 0,
+            'largest_loss': row.largest_loss if losses else 0
+        }
+
+
+def _percentile(values, p):
+    """Linearly interpolated percentile of a sorted list"""
+    if not values:
+        return 0
+    position = (len(values) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+platform_benchmark = PlatformBenchmark()
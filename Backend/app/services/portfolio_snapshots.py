@@ -0,0 +1,257 @@
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func
+from app import db
+from app.models.api_key import ApiKey
+from app.models.portfolio_snapshot import PortfolioSnapshot
+from app.models.position import Position
+from app.services.exchangeservice import ExchangeService
+from app.services.market_feed import market_data_cache
+from app.utils.downsample import lttb
+from app.utils.exception import ExchangeException
+
+logger = logging.getLogger(__name__)
+
+class PortfolioSnapshotService:
+    """Records and serves per-user equity time series"""
+
+    # Balances counted as cash; other assets are valued through positions
+    QUOTE_ASSETS = ['USDT', 'USD', 'USDC', 'BUSD', 'DAI']
+
+    # Period -> lookback used by get_returns (None = since first snapshot)
+    RETURN_PERIODS = {
+        'daily_return': timedelta(days=1),
+        'weekly_return': timedelta(weeks=1),
+        'monthly_return': timedelta(days=30),
+        'ytd_return': 'ytd',
+        'total_return': None,
+    }
+
+    # (age in days, bucket): older snapshots are thinned to the first of
+    # each hour, then of each day
+    RETENTION = [
+        (7, 'hour'),
+        (90, 'day'),
+    ]
+
+    def __init__(self, interval=None, max_points=500):
+        """
+        Initialize portfolio snapshot service
+
+        Args:
+            interval: Seconds between snapshots; timestamps are aligned to it
+            max_points: Points returned per equity curve after downsampling
+        """
+        self.interval = interval or int(os.getenv('PORTFOLIO_SNAPSHOT_INTERVAL', 300))
+        self.max_points = max_points
+
+    def capture(self, user_ids=None, now=None):
+        """
+        Snapshot every user with an active API key or an open position
+
+        Timestamps are aligned to the interval, so a repeated run within the
+        same slot skips users that already have a snapshot.
+
+        Args:
+            user_ids: Restrict to these users (optional)
+            now: Snapshot time (defaults to now)
+
+        Returns:
+            Number of snapshots written
+        """
+        slot = self._align(now or datetime.utcnow())
+
+        exchanges = {}
+        query = db.session.query(ApiKey.user_id, ApiKey.exchange).filter_by(is_active=True).distinct()
+        if user_ids:
+            query = query.filter(ApiKey.user_id.in_(user_ids))
+        for row in query:
+            if row.exchange in ExchangeService.SUPPORTED_EXCHANGES:
+                exchanges.setdefault(row.user_id, []).append(row.exchange)
+
+        positions = {}
+        query = Position.query
+        if user_ids:
+            query = query.filter(Position.user_id.in_(user_ids))
+        for position in query:
+            positions.setdefault(position.user_id, []).append(position)
+
+        users = set(exchanges) | set(positions)
+        done = {
+            row.user_id for row in db.session.query(PortfolioSnapshot.user_id).filter(
+                PortfolioSnapshot.timestamp == slot
+            )
+        }
+        users -= done
+        if not users:
+            return 0
+
+        prices = market_data_cache.get_prices({p.symbol for user in users for p in positions.get(user, [])})
+        last_cash = None
+
+        mappings = []
+        for user_id in users:
+            cash = self._cash(user_id, exchanges.get(user_id, []))
+            if cash is None:
+                # Balance unavailable: carry the last known cash forward, or
+                # leave the slot empty rather than record zero cash
+                if last_cash is None:
+                    last_cash = self._last_cash(users)
+                if user_id not in last_cash:
+                    continue
+                cash = last_cash[user_id]
+
+            positions_value = unrealized_pnl = 0
+            for position in positions.get(user_id, []):
+                price = prices.get(position.symbol, position.current_price)
+                positions_value += position.quantity * price
+                unrealized_pnl += (price - position.entry_price) * position.quantity
+
+            mappings.append({
+                'user_id': user_id,
+                'timestamp': slot,
+                'cash': cash,
+                'positions_value': positions_value,
+                'unrealized_pnl': unrealized_pnl,
+                'equity': cash + positions_value
+            })
+
+        if not mappings:
+            return 0
+
+        try:
+            db.session.bulk_insert_mappings(PortfolioSnapshot, mappings)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        logger.info(f"Captured {len(mappings)} portfolio snapshots at {slot.isoformat()}")
+        return len(mappings)
+
+    def compact(self, now=None):
+        """
+        Thin old snapshots according to RETENTION
+
+        Each user keeps the earliest snapshot of every hour (or day) bucket,
+        whether or not one landed exactly on the boundary.
+
+        Returns:
+            Number of snapshots deleted
+        """
+        now = now or datetime.utcnow()
+        deleted = 0
+
+        try:
+            for age_days, unit in self.RETENTION:
+                ranked = db.select(
+                    PortfolioSnapshot.id,
+                    func.row_number().over(
+                        partition_by=(PortfolioSnapshot.user_id, self._bucket(unit, PortfolioSnapshot.timestamp)),
+                        order_by=(PortfolioSnapshot.timestamp, PortfolioSnapshot.id)
+                    ).label('position')
+                ).where(PortfolioSnapshot.timestamp < now - timedelta(days=age_days)).subquery()
+
+                deleted += PortfolioSnapshot.query.filter(
+                    PortfolioSnapshot.id.in_(db.select(ranked.c.id).where(ranked.c.position > 1))
+                ).delete(synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        logger.info(f"Compacted {deleted} portfolio snapshots")
+        return deleted
+
+    def get_equity_curve(self, user_id, days=30):
+        """
+        Equity curve over the last days, downsampled to max_points
+
+        Args:
+            user_id: User ID
+            days: Lookback in days
+
+        Returns:
+            List of {'date', 'value'} dicts in time order
+        """
+        since = datetime.utcnow() - timedelta(days=days)
+        rows = db.session.query(PortfolioSnapshot.timestamp, PortfolioSnapshot.equity).filter(
+            PortfolioSnapshot.user_id == user_id,
+            PortfolioSnapshot.timestamp >= since
+        ).order_by(PortfolioSnapshot.timestamp).all()
+
+        points = lttb([((row.timestamp - since).total_seconds(), row.equity, row.timestamp) for row in rows], self.max_points)
+        return [{'date': timestamp.isoformat(), 'value': round(equity, 2)} for _, equity, timestamp in points]
+
+    def get_returns(self, user_id):
+        """
+        Percentage equity change over standard periods
+
+        Returns:
+            Dict of RETURN_PERIODS keys -> percent return (0 without history)
+        """
+        latest = PortfolioSnapshot.query.filter_by(user_id=user_id).order_by(
+            PortfolioSnapshot.timestamp.desc()
+        ).first()
+        if latest is None:
+            return {period: 0 for period in self.RETURN_PERIODS}
+
+        returns = {}
+        for period, lookback in self.RETURN_PERIODS.items():
+            query = PortfolioSnapshot.query.filter(PortfolioSnapshot.user_id == user_id)
+            if lookback == 'ytd':
+                query = query.filter(PortfolioSnapshot.timestamp >= datetime(latest.timestamp.year, 1, 1))
+            elif lookback is not None:
+                query = query.filter(PortfolioSnapshot.timestamp >= latest.timestamp - lookback)
+            base = query.order_by(PortfolioSnapshot.timestamp).first()
+
+            if base and base.equity > 0:
+                returns[period] = round((latest.equity - base.equity) / base.equity * 100, 2)
+            else:
+                returns[period] = 0
+
+        return returns
+
+    def _bucket(self, unit, column):
+        """'hour' or 'day' bucket label of a timestamp in the database's dialect"""
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            return func.date_trunc(unit, column)
+        pattern = '%Y-%m-%d %H' if unit == 'hour' else '%Y-%m-%d'
+        if dialect in ('mysql', 'mariadb'):
+            return func.date_format(column, pattern)
+        return func.strftime(pattern, column)
+
+    def _align(self, moment):
+        seconds = int(moment.replace(tzinfo=timezone.utc).timestamp()) // self.interval * self.interval
+        return datetime.fromtimestamp(seconds, timezone.utc).replace(tzinfo=None)
+
+    def _cash(self, user_id, exchange_names):
+        """Quote-asset balance across the user's exchanges, or None if unavailable"""
+        if not exchange_names:
+            return 0
+
+        service = ExchangeService(user_id)
+        cash = 0
+        for exchange_name in exchange_names:
+            try:
+                totals = service.get_balance(exchange_name)['total']
+            except ExchangeException as e:
+                logger.warning(f"Snapshot balance unavailable for user {user_id} on {exchange_name}: {e.message}")
+                return None
+            cash += sum(totals.get(asset) or 0 for asset in self.QUOTE_ASSETS)
+        return cash
+
+    def _last_cash(self, user_ids):
+        """Cash of each user's latest snapshot"""
+        latest = db.session.query(
+            PortfolioSnapshot.user_id,
+            db.func.max(PortfolioSnapshot.timestamp).label('timestamp')
+        ).filter(PortfolioSnapshot.user_id.in_(user_ids)).group_by(PortfolioSnapshot.user_id).subquery()
+
+        rows = db.session.query(PortfolioSnapshot.user_id, PortfolioSnapshot.cash).join(
+            latest,
+            (PortfolioSnapshot.user_id == latest.c.user_id) & (PortfolioSnapshot.timestamp == latest.c.timestamp)
+        )
+        return {row.user_id: row.cash for row in rows}
@@ -0,0 +1,114 @@
+import json
+import logging
+from datetime import datetime, timedelta
+from app import db
+from app.models.notification import Notification
+from app.models.position import Position
+from app.models.trade import Trade
+from app.models.WorkflowExecution import WorkflowExecution
+
+logger = logging.getLogger(__name__)
+
+
+def hot_queries():
+    """
+    The application's hot queries as (name, table, statement)
+
+    Mirrors the filters used by the trade, analytics, order tracking,
+    portfolio, notification and workflow code paths.
+    """
+    since = datetime.utcnow() - timedelta(days=30)
+
+    return [
+        ('trades_by_status', 'trades', db.select(Trade).where(
+            Trade.user_id == 1, Trade.status == 'filled', Trade.timestamp >= since
+        ).order_by(Trade.timestamp)),
+        ('trades_by_symbol', 'trades', db.select(Trade).where(
+            Trade.user_id == 1, Trade.symbol == 'BTC/USDT'
+        ).order_by(Trade.timestamp.desc())),
+        ('trades_page', 'trades', db.select(Trade).where(
+            Trade.user_id == 1
+        ).order_by(Trade.timestamp.desc(), Trade.id.desc()).limit(50)),
+        ('trades_by_workflow', 'trades', db.select(Trade).where(
+            Trade.workflow_id == 1, Trade.status == 'filled'
+        )),
+        ('open_orders', 'trades', db.select(Trade).where(
+            Trade.user_id == 1,
+            Trade.status.in_(['pending', 'partially_filled']),
+            Trade.exchange_order_id.isnot(None)
+        )),
+        ('position_by_symbol', 'positions', db.select(Position).where(
+            Position.user_id == 1, Position.symbol == 'BTC/USDT'
+        )),
+        ('unread_notifications', 'notifications', db.select(Notification).where(
+            Notification.user_id == 1, Notification.is_read.is_(False)
+        ).order_by(Notification.created_at.desc()).limit(50)),
+        ('workflow_executions', 'workflow_executions', db.select(WorkflowExecution).where(
+            WorkflowExecution.workflow_id == 1
+        ).order_by(WorkflowExecution.started_at.desc()).limit(50)),
+    ]
+
+
+def check_query_plans():
+    """
+    EXPLAIN every hot query and report the ones that scan their table
+
+    On PostgreSQL sequential scans are disabled for the check, so a Seq
+    Scan in the plan means no index can serve the query however large the
+    table grows; the result does not depend on how much data is seeded.
+
+    Returns:
+        Dict with the number of queries checked and a list of regressions
+        ({'query', 'table', 'plan'})
+    """
+    dialect = db.session.get_bind().dialect.name
+    regressions = []
+    queries = hot_queries()
+
+    try:
+        for name, table, stmt in queries:
+            plan = _explain(stmt, dialect)
+            if _scans_table(plan, table, dialect):
+                logger.warning(f"Query plan regression: {name} scans {table}")
+                regressions.append({'query': name, 'table': table, 'plan': plan})
+    finally:
+        db.session.rollback()
+
+    return {'dialect': dialect, 'checked': len(queries), 'regressions': regressions}
+
+
+def _explain(stmt, dialect):
+    # Literal values let the planner match partial index predicates
+    compiled = stmt.compile(dialect=db.session.get_bind().dialect, compile_kwargs={'literal_binds': True})
+
+    connection = db.session.connection()
+    if dialect == 'postgresql':
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        row = connection.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {compiled}').scalar()
+        return row if isinstance(row, list) else json.loads(row)
+    if dialect == 'sqlite':
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}')
+        return [row[-1] for row in rows]
+
+    rows = connection.exec_driver_sql(f'EXPLAIN {compiled}').mappings()
+    return [dict(row) for row in rows]
+
+
+def _scans_table(plan, table, dialect):
+    if dialect == 'postgresql':
+        def walk(node):
+            if node.get('Node Type') == 'Seq Scan' and node.get('Relation Name') == table:
+                return True
+            return any(walk(child) for child in node.get('Plans', []))
+        return any(walk(entry['Plan']) for entry in plan)
+
+    if dialect == 'sqlite':
+        # 'SEARCH t USING INDEX ...' is a range seek; any 'SCAN t' reads it all,
+        # and a skip-scan (ANY(col)) only pays off while col has few values
+        return any(
+            detail.startswith(f'SCAN {table}') or (detail.startswith(f'SEARCH {table} ') and 'ANY(' in detail)
+            for detail in plan
+        )
+
+    # MySQL: access type ALL is a full table scan
+    return any(row.get('table') == table and row.get('type') == 'ALL' for row in plan)
@@ -2,6 +2,7 @@ from app.models.position import Position
 from app.models.trade import Trade
 from app.models.user import User
 from app import db
+from app.services.market_feed import market_data_cache
 from datetime import datetime, timedelta
 from sqlalchemy import func
 import logging
@@ -287,9 +288,13 @@ class RiskManager:
     def _calculate_total_equity(self):
         """Calculate total account equity"""
         positions = Position.query.filter_by(user_id=self.user_id).all()
-        positions_value = sum(p.quantity * p.current_price for p in positions)
+        positions_value = sum(p.quantity * self._mark_price(p) for p in positions)
         return self.user.balance + positions_value
     
+    def _mark_price(self, position):
+        """Latest streamed price for a position, falling back to the stored price"""
+        return market_data_cache.get_price(position.symbol, default=position.current_price)
+    
     def _calculate_margin_used(self):
         """Calculate total margin used"""
         positions = Position.query.filter_by(user_id=self.user_id).all()
@@ -0,0 +1,141 @@
+import logging
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import text, union_all
+from app import db
+from app.models.trade import Trade
+from app.models.trade_archive import ArchivedTrade
+
+logger = logging.getLogger(__name__)
+
+# Columns shared by the hot and cold trade tables
+TRADE_COLUMNS = [column.name for column in Trade.__table__.columns]
+
+# Orders OrderTracker still polls; never archived however old
+OPEN_STATUSES = ['pending', 'partially_filled']
+
+
+def hot_retention_days():
+    """Days of trades kept in the hot trades table"""
+    return int(os.getenv('TRADE_HOT_RETENTION_DAYS', 180))
+
+
+def trade_history(since=None):
+    """
+    All trades, hot and archived, as one selectable with the trades columns
+
+    Queries starting inside the hot retention window read the trades table
+    alone; older ranges read a UNION ALL of both tables, whose filters the
+    database pushes down into each side.
+
+    Args:
+        since: Earliest trade timestamp the caller will filter on (optional)
+
+    Returns:
+        Table or subquery; use its .c columns like Trade.__table__.c
+    """
+    trades = Trade.__table__
+    if since is not None and since >= datetime.utcnow() - timedelta(days=hot_retention_days()):
+        return trades
+
+    archive = ArchivedTrade.__table__
+    return union_all(
+        db.select(*[trades.c[name] for name in TRADE_COLUMNS]),
+        db.select(*[archive.c[name] for name in TRADE_COLUMNS])
+    ).subquery('trade_history')
+
+
+def history_row_to_dict(row):
+    """Serialize a trade_history() row like Trade.to_dict"""
+    data = dict(row._mapping)
+    for name in ('timestamp', 'updated_at'):
+        data[name] = data[name].isoformat() if data[name] else None
+    return data
+
+
+def find_trade(trade_id, user_id):
+    """
+    Look up a user's trade in the trades table, then in the archive
+
+    Returns:
+        Trade or ArchivedTrade, or None if the user has no such trade
+    """
+    trade = Trade.query.filter_by(id=trade_id, user_id=user_id).first()
+    if trade is None:
+        trade = ArchivedTrade.query.filter_by(id=trade_id, user_id=user_id).first()
+    return trade
+
+
+class TradeArchiver:
+    """Moves closed trades past the hot retention window to trades_archive"""
+
+    def __init__(self, retention_days=None, batch_size=5000):
+        """
+        Initialize trade archiver
+
+        Args:
+            retention_days: Days kept hot (defaults to TRADE_HOT_RETENTION_DAYS)
+            batch_size: Trades moved per transaction
+        """
+        self.retention_days = retention_days or hot_retention_days()
+        self.batch_size = batch_size
+
+    def archive(self):
+        """
+        Move closed trades older than the retention window, oldest first
+
+        Each batch is copied and deleted in one transaction with Core
+        statements, so the daily rollup (which already counts these trades)
+        and cached analytics (read through trade_history) are unaffected.
+
+        Returns:
+            Number of trades archived
+        """
+        cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+        trades = Trade.__table__
+        archive = ArchivedTrade.__table__
+        postgres = db.session.get_bind().dialect.name == 'postgresql'
+        moved = 0
+
+        while True:
+            rows = db.session.execute(
+                db.select(trades.c.id, trades.c.timestamp).where(
+                    trades.c.timestamp < cutoff,
+                    trades.c.status.notin_(OPEN_STATUSES)
+                ).order_by(trades.c.timestamp, trades.c.id).limit(self.batch_size)
+            ).all()
+            if not rows:
+                break
+
+            ids = [row.id for row in rows]
+            try:
+                if postgres:
+                    self.ensure_partitions(rows[0].timestamp, rows[-1].timestamp)
+                db.session.execute(archive.insert().from_select(
+                    TRADE_COLUMNS,
+                    db.select(*[trades.c[name] for name in TRADE_COLUMNS]).where(trades.c.id.in_(ids))
+                ))
+                db.session.execute(trades.delete().where(trades.c.id.in_(ids)))
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Failed to archive trades: {str(e)}")
+                raise
+
+            moved += len(ids)
+
+        if moved:
+            logger.info(f"Archived {moved} trades older than {cutoff.date()}")
+        return moved
+
+    def ensure_partitions(self, start, end):
+        """Create the monthly trades_archive partitions covering start..end (PostgreSQL)"""
+        month = datetime(start.year, start.month, 1)
+        while month <= end:
+            following = datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+            db.session.execute(text(
+                f"CREATE TABLE IF NOT EXISTS trades_archive_{month:%Y_%m} "
+                f"PARTITION OF trades_archive "
+                f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{following:%Y-%m-%d}')"
+            ))
+            month = following
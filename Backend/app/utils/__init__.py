@@ -2,8 +2,11 @@
 
 from .constant import OrderSide, OrderType, TradeStatus, WorkflowStatus
 from .logger import log, setup_logger
-from .exception import AppException, ValidationError, TradingError
+from .exception import AppException, ValidationError, TradingError, ExchangeException, CircuitOpenException
 from .decorator import handle_exceptions
+from .cache import SingleFlightCache
+from .downsample import lttb
+from .pagination import encode_cursor, decode_cursor, keyset_page, approximate_count
+from .database import configure_database, engine_options, read_replica, RoutingSession
 from .encryption import encrypt_value, decrypt_value
-from .validator import validate_trade_request, validate_user_registration
-from .helper import calculate_portfolio_value, format_datetime, generate_api_key
\ No newline at end of file
+from .validator import validate_trade_request
@@ -0,0 +1,147 @@
+# Backend/app/utils/cache.py
+import json
+import math
+import random
+import time
+import uuid
+import redis
+from .logger import log
+
+# Delete the lock only if we still own it
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlightCache:
+    """
+    Redis cache with single-flight refresh, early probabilistic refresh
+    and stale-while-revalidate.
+
+    Values are stored in an envelope with their logical expiry and the time
+    the loader took. Only the caller holding the refresh lock runs the
+    loader; everyone else serves the current (possibly stale) value or, on a
+    cold miss, waits briefly for the lock holder to fill it.
+    """
+
+    def __init__(self, client, stale_ttl=120, lock_timeout=10, wait_timeout=2, beta=1.0):
+        """
+        Args:
+            client: Redis client
+            stale_ttl: Seconds a value may be served after it expires while
+                a refresh is in flight or failing
+            lock_timeout: Seconds before an abandoned refresh lock expires
+            wait_timeout: Seconds a cold-miss caller waits for another refresh
+            beta: Early refresh aggressiveness (XFetch); 0 disables it
+        """
+        self.client = client
+        self.stale_ttl = stale_ttl
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.beta = beta
+        self._release = client.register_script(RELEASE_LOCK_SCRIPT)
+
+    def get_or_load(self, key, loader, ttl):
+        """
+        Get a cached value, refreshing it through loader when due
+
+        Args:
+            key: Cache key
+            loader: Callable returning a JSON-serializable value
+            ttl: Seconds the value is fresh
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        try:
+            envelope = self._read(key)
+        except redis.RedisError as e:
+            log.warning(f"Cache unavailable for {key}: {str(e)}")
+            return loader()
+
+        now = time.time()
+        if envelope is not None:
+            if now < envelope['expires_at'] and not self._refresh_early(envelope, now):
+                return envelope['value']
+
+            token = self._acquire(key)
+            if token is None:
+                # Another caller is refreshing: serve what we have
+                return envelope['value']
+            try:
+                return self._load(key, loader, ttl)
+            except Exception as e:
+                if now < envelope['expires_at'] + self.stale_ttl:
+                    log.warning(f"Refresh failed for {key}, serving stale value: {str(e)}")
+                    return envelope['value']
+                raise
+            finally:
+                self._release_lock(key, token)
+
+        token = self._acquire(key)
+        if token is not None:
+            try:
+                return self._load(key, loader, ttl)
+            finally:
+                self._release_lock(key, token)
+
+        # Cold miss while another caller loads: wait for its result
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            try:
+                envelope = self._read(key)
+            except redis.RedisError:
+                break
+            if envelope is not None:
+                return envelope['value']
+        return loader()
+
+    def invalidate(self, *keys):
+        """Drop cached values so the next read loads fresh data"""
+        if not keys:
+            return
+        try:
+            self.client.delete(*keys)
+        except redis.RedisError as e:
+            log.warning(f"Cache invalidation failed for {keys}: {str(e)}")
+
+    def _refresh_early(self, envelope, now):
+        """XFetch: refresh before expiry with rising probability"""
+        if not self.beta or not envelope.get('delta'):
+            return False
+        return now - envelope['delta'] * self.beta * math.log(1.0 - random.random()) >= envelope['expires_at']
+
+    def _read(self, key):
+        raw = self.client.get(key)
+        return json.loads(raw) if raw else None
+
+    def _load(self, key, loader, ttl):
+        started = time.time()
+        value = loader()
+        finished = time.time()
+        envelope = {'value': value, 'expires_at': finished + ttl, 'delta': finished - started}
+        try:
+            self.client.setex(key, int(math.ceil(ttl + self.stale_ttl)), json.dumps(envelope))
+        except redis.RedisError as e:
+            log.warning(f"Cache write failed for {key}: {str(e)}")
+        return value
+
+    def _acquire(self, key):
+        token = uuid.uuid4().hex
+        try:
+            if self.client.set(f'lock:{key}', token, nx=True, px=int(self.lock_timeout * 1000)):
+                return token
+        except redis.RedisError as e:
+            log.warning(f"Cache lock unavailable for {key}: {str(e)}")
+            return token
+        return None
+
+    def _release_lock(self, key, token):
+        try:
+            self._release(keys=[f'lock:{key}'], args=[token])
+        except redis.RedisError:
+            pass
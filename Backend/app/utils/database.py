@@ -0,0 +1,210 @@
+# Backend/app/utils/database.py
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.selectable import CompoundSelect, Select
+from .logger import log
+
+# SQLALCHEMY_BINDS key of the read replica
+REPLICA_BIND = 'replica'
+
+# session.info flags: reads routed to the replica / rows written this transaction
+READ_REPLICA_KEY = 'read_replica'
+WROTE_KEY = 'wrote'
+
+# Pool settings per process type; WORKER_DB_* overrides DB_* in Celery workers
+POOL_DEFAULTS = {
+    'web': {'POOL_SIZE': 10, 'MAX_OVERFLOW': 20},
+    'worker': {'POOL_SIZE': 2, 'MAX_OVERFLOW': 5},
+}
+
+
+def _setting(process, name, default):
+    if process == 'worker' and os.getenv(f'WORKER_DB_{name}') is not None:
+        return os.getenv(f'WORKER_DB_{name}')
+    return os.getenv(f'DB_{name}', default)
+
+
+def engine_options(url, process='web'):
+    """
+    SQLAlchemy engine options for a database URL
+
+    Args:
+        url: Database URL
+        process: 'web' or 'worker' (Celery); workers default to a smaller pool
+
+    Returns:
+        Dict for SQLALCHEMY_ENGINE_OPTIONS or a SQLALCHEMY_BINDS entry
+    """
+    options = {
+        # Test connections on checkout so restarts and idle timeouts don't surface as errors
+        'pool_pre_ping': str(_setting(process, 'POOL_PRE_PING', 'true')).lower() == 'true',
+        'pool_recycle': int(_setting(process, 'POOL_RECYCLE', 1800)),
+    }
+
+    # SQLite uses single-connection pools without sizing
+    if make_url(url).get_backend_name() != 'sqlite':
+        defaults = POOL_DEFAULTS.get(process, POOL_DEFAULTS['web'])
+        options.update(
+            pool_size=int(_setting(process, 'POOL_SIZE', defaults['POOL_SIZE'])),
+            max_overflow=int(_setting(process, 'MAX_OVERFLOW', defaults['MAX_OVERFLOW'])),
+            pool_timeout=int(_setting(process, 'POOL_TIMEOUT', 30)),
+        )
+
+    return options
+
+
+def configure_database(app, process='web'):
+    """
+    Apply pool settings and the optional read replica bind to a Flask app.
+    Call before db.init_app(app).
+
+    Args:
+        app: Flask app
+        process: 'web' or 'worker'
+    """
+    url = (app.config.get('SQLALCHEMY_DATABASE_URI') or os.getenv('SQLALCHEMY_DATABASE_URI')
+           or os.getenv('DATABASE_URL'))
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(url, process)
+
+    replica_url = os.getenv('DATABASE_REPLICA_URL')
+    if replica_url:
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds[REPLICA_BIND] = {'url': replica_url, **engine_options(replica_url, process)}
+        app.config['SQLALCHEMY_BINDS'] = binds
+
+    if process == 'worker':
+        # Pooled connections must not be shared across the prefork boundary
+        from celery.signals import worker_process_init
+        worker_process_init.connect(lambda **kwargs: _dispose_engines(app), weak=False)
+
+
+def _dispose_engines(app):
+    from app import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+class ReplicaMonitor:
+    """Replica lag check, cached per process so routing costs no extra query"""
+
+    def __init__(self, max_lag=None, check_interval=None):
+        """
+        Args:
+            max_lag: Seconds of lag above which reads fall back to the primary
+            check_interval: Seconds a lag measurement is reused
+        """
+        self.max_lag = max_lag or float(os.getenv('DB_REPLICA_MAX_LAG', 5))
+        self.check_interval = check_interval or float(os.getenv('DB_REPLICA_LAG_CHECK_INTERVAL', 5))
+        self._healthy = False
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def is_healthy(self, engine):
+        """Whether reads may go to the replica engine"""
+        if self._checked_at is None or time.monotonic() - self._checked_at >= self.check_interval:
+            with self._lock:
+                if self._checked_at is None or time.monotonic() - self._checked_at >= self.check_interval:
+                    self._healthy = self._check(engine)
+                    self._checked_at = time.monotonic()
+        return self._healthy
+
+    def lag(self, engine):
+        """Seconds the replica is behind its primary"""
+        with engine.connect() as connection:
+            dialect = connection.dialect.name
+            if dialect == 'postgresql':
+                # Caught up (or not a standby) counts as no lag even if the primary is idle
+                return float(connection.execute(text(
+                    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+                    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+                )).scalar())
+            if dialect in ('mysql', 'mariadb'):
+                row = connection.execute(text('SHOW REPLICA STATUS')).mappings().first()
+                if row is None:
+                    return 0.0
+                lag = row.get('Seconds_Behind_Source', row.get('Seconds_Behind_Master'))
+                return float('inf') if lag is None else float(lag)
+            return 0.0
+
+    def _check(self, engine):
+        try:
+            lag = self.lag(engine)
+        except Exception as e:
+            log.warning(f"Replica unavailable, reading from primary: {str(e)}")
+            return False
+
+        if lag > self.max_lag:
+            log.warning(f"Replica lag {lag:.1f}s exceeds {self.max_lag}s, reading from primary")
+            return False
+        return True
+
+
+replica_monitor = ReplicaMonitor()
+
+
+class RoutingSession(Session):
+    """
+    db.session class that sends reads inside read_replica() to the replica
+
+    Only plain SELECTs are routed; writes, text() statements, SELECT ... FOR
+    UPDATE, flushes and any statement after the transaction has written
+    stay on the primary. Install with
+    SQLAlchemy(session_options={'class_': RoutingSession}).
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and self.info.get(READ_REPLICA_KEY) and not self.info.get(WROTE_KEY)
+                and not self._flushing and _is_plain_read(clause)):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None and replica_monitor.is_healthy(replica):
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _is_plain_read(clause):
+    # Raw SQL may write, and row locks must be taken on the primary
+    if isinstance(clause, Select):
+        return clause._for_update_arg is None
+    return isinstance(clause, CompoundSelect)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_written(session, flush_context):
+    # Read-your-writes: the replica can't see this transaction's rows
+    session.info[WROTE_KEY] = True
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _clear_written(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(WROTE_KEY, None)
+
+
+@contextmanager
+def read_replica(enabled=True):
+    """
+    Route db.session reads in the block (or decorated function) to the
+    replica bind. Falls back to the primary when no replica is configured
+    or it lags more than DB_REPLICA_MAX_LAG seconds.
+
+    Args:
+        enabled: False keeps reads on the primary, e.g. right after a write
+    """
+    from app import db
+
+    session = db.session()
+    previous = session.info.get(READ_REPLICA_KEY, False)
+    session.info[READ_REPLICA_KEY] = enabled
+    try:
+        yield
+    finally:
+        session.info[READ_REPLICA_KEY] = previous
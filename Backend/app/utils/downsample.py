@@ -0,0 +1,56 @@
+# Backend/app/utils/downsample.py
+
+
+def lttb(points, threshold):
+    """
+    Downsample a time series with Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last points and, from each bucket in between, the
+    point forming the largest triangle with the previously kept point and
+    the next bucket's average, so peaks and drawdowns survive.
+
+    Args:
+        points: List of (x, y, ...) tuples sorted by x (x numeric, e.g. epoch
+            seconds); items after y are carried along untouched
+        threshold: Maximum number of points to return
+
+    Returns:
+        List of at most threshold points taken from the input
+    """
+    length = len(points)
+    if threshold >= length or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (length - 2) / (threshold - 2)
+    previous = 0
+
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        # Average of the next bucket (the last point for the final bucket)
+        next_start = end
+        next_end = min(int((i + 2) * bucket_size) + 1, length)
+        if next_start >= next_end:
+            avg_x, avg_y = points[-1][0], points[-1][1]
+        else:
+            span = next_end - next_start
+            avg_x = sum(p[0] for p in points[next_start:next_end]) / span
+            avg_y = sum(p[1] for p in points[next_start:next_end]) / span
+
+        ax, ay = points[previous][0], points[previous][1]
+        best_area = -1
+        best = start
+        for j in range(start, end):
+            x, y = points[j][0], points[j][1]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best = j
+
+        sampled.append(points[best])
+        previous = best
+
+    sampled.append(points[-1])
+    return sampled
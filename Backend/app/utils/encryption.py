@@ -1,26 +1,40 @@
 # Backend/app/utils/encryption.py
 import os
 import base64
-from cryptography.fernet import Fernet
+from functools import lru_cache
+from cryptography.fernet import Fernet, MultiFernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
-def get_cipher_suite():
+@lru_cache(maxsize=8)
+def derive_key(secret: str) -> bytes:
     """
-    Generates a Fernet cipher suite based on the App Secret.
-    Ensures the key is 32 URL-safe base64-encoded bytes.
+    Derives a Fernet key from a secret.
+    PBKDF2 is deliberately slow, so each secret is derived once per process.
     """
-    secret = os.environ.get('SECRET_KEY', 'default-unsafe-dev-key').encode()
     # Use a static salt for determinism (in prod, handle keys carefully via KMS)
-    salt = b'trading-n8n-salt' 
+    salt = b'trading-n8n-salt'
     kdf = PBKDF2HMAC(
         algorithm=hashes.SHA256(),
         length=32,
         salt=salt,
         iterations=100000,
     )
-    key = base64.urlsafe_b64encode(kdf.derive(secret))
-    return Fernet(key)
+    return base64.urlsafe_b64encode(kdf.derive(secret.encode()))
+
+@lru_cache(maxsize=4)
+def _build_cipher_suite(secret: str, old_secrets: str) -> MultiFernet:
+    keys = [secret] + [s.strip() for s in old_secrets.split(',') if s.strip()]
+    return MultiFernet([Fernet(derive_key(k)) for k in keys])
+
+def get_cipher_suite():
+    """
+    Generates a Fernet cipher suite based on the App Secret.
+    Encrypts with SECRET_KEY and still decrypts values written under any
+    of the comma-separated OLD_SECRET_KEYS, so the secret can be rotated.
+    """
+    secret = os.environ.get('SECRET_KEY', 'default-unsafe-dev-key')
+    return _build_cipher_suite(secret, os.environ.get('OLD_SECRET_KEYS', ''))
 
 def encrypt_value(plaintext: str) -> str:
     """Encrypts a string."""
@@ -34,4 +48,11 @@ def decrypt_value(ciphertext: str) -> str:
     if not ciphertext:
         return None
     f = get_cipher_suite()
-    return f.decrypt(ciphertext.encode()).decode()
\ No newline at end of file
+    return f.decrypt(ciphertext.encode()).decode()
+
+def rotate_value(ciphertext: str) -> str:
+    """Re-encrypts a string under the current SECRET_KEY."""
+    if not ciphertext:
+        return None
+    f = get_cipher_suite()
+    return f.rotate(ciphertext.encode()).decode()
\ No newline at end of file
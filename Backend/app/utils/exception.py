@@ -32,4 +32,15 @@ class ResourceNotFound(AppException):
 class AuthorizationError(AppException):
     """Raised when permission is denied."""
     def __init__(self, message="You are not authorized to perform this action"):
-        super().__init__(message, status_code=403)
\ No newline at end of file
+        super().__init__(message, status_code=403)
+
+class ExchangeException(AppException):
+    """Raised when an exchange call fails or is rejected."""
+    def __init__(self, message="Exchange request failed", payload=None):
+        super().__init__(message, status_code=502, payload=payload)
+
+class CircuitOpenException(ExchangeException):
+    """Raised when calls to a failing exchange endpoint are short-circuited."""
+    def __init__(self, message="Exchange temporarily unavailable", payload=None):
+        super().__init__(message, payload=payload)
+        self.status_code = 503
@@ -0,0 +1,75 @@
+# Backend/app/utils/pagination.py
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import func, select, tuple_
+from .exception import ValidationError
+
+
+def encode_cursor(values):
+    """Opaque URL-safe token for a row's sort key values"""
+    payload = [
+        {'dt': value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Sort key values from a cursor token"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        return tuple(
+            datetime.fromisoformat(value['dt']) if isinstance(value, dict) else value
+            for value in json.loads(raw)
+        )
+    except (ValueError, TypeError, KeyError):
+        raise ValidationError("Invalid pagination cursor")
+
+
+def keyset_page(query, columns, cursor=None, limit=50, descending=True):
+    """
+    Fetch one page of a query ordered by a unique key, seeking past the cursor.
+
+    Unlike OFFSET pagination, every page is an index range scan starting
+    at the cursor, so page N costs the same as page 1.
+
+    Args:
+        query: Filtered SQLAlchemy query of model instances
+        columns: Sort columns ending with a unique one, e.g. (Trade.timestamp, Trade.id)
+        cursor: Token returned as next_cursor by the previous page
+        limit: Page size
+        descending: Newest first
+
+    Returns:
+        Tuple of (items, next_cursor); next_cursor is None on the last page
+    """
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(columns):
+            raise ValidationError("Invalid pagination cursor")
+        key = tuple_(*columns)
+        query = query.filter(key < values if descending else key > values)
+
+    order = [c.desc() if descending else c.asc() for c in columns]
+    items = query.order_by(*order).limit(limit + 1).all()
+
+    if len(items) <= limit:
+        return items, None
+
+    items = items[:limit]
+    last = items[-1]
+    return items, encode_cursor([getattr(last, c.key) for c in columns])
+
+
+def approximate_count(query, cap=10000):
+    """
+    Count rows up to cap
+
+    Returns:
+        Tuple of (count, exact); exact is False when the cap was reached
+    """
+    limited = query.order_by(None).limit(cap + 1).subquery()
+    count = query.session.execute(select(func.count()).select_from(limited)).scalar()
+    return min(count, cap), count <= cap
@@ -0,0 +1,52 @@
+"""Add composite and partial indexes for hot queries
+
+Revision ID: 3f1c2a9b7d41
+Revises:
+Create Date: 2026-10-19 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '3f1c2a9b7d41'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+OPEN_ORDERS = "status IN ('pending', 'partially_filled')"
+
+# (name, table, columns, extra kwargs)
+INDEXES = [
+    ('ix_trades_user_timestamp', 'trades', ['user_id', 'timestamp', 'id'], {}),
+    ('ix_trades_user_status_timestamp', 'trades', ['user_id', 'status', 'timestamp'], {}),
+    ('ix_trades_user_symbol_timestamp', 'trades', ['user_id', 'symbol', 'timestamp'], {}),
+    ('ix_trades_workflow_status', 'trades', ['workflow_id', 'status'], {}),
+    ('ix_trades_open_orders', 'trades', ['user_id', 'exchange'], {
+        'postgresql_where': sa.text(OPEN_ORDERS),
+        'sqlite_where': sa.text(OPEN_ORDERS),
+    }),
+    ('ix_positions_user_symbol', 'positions', ['user_id', 'symbol'], {}),
+    ('ix_notifications_user_created', 'notifications', ['user_id', 'created_at', 'id'], {}),
+    ('ix_notifications_user_unread_created', 'notifications', ['user_id', 'is_read', 'created_at', 'id'], {}),
+    ('ix_workflows_user_created', 'workflows', ['user_id', 'created_at', 'id'], {}),
+    ('ix_workflow_executions_workflow_started', 'workflow_executions', ['workflow_id', 'started_at'], {}),
+]
+
+
+def upgrade():
+    concurrently = op.get_bind().dialect.name == 'postgresql'
+
+    # Build without blocking writes on live tables (CONCURRENTLY cannot run
+    # inside a transaction)
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            if concurrently:
+                kwargs = {**kwargs, 'postgresql_concurrently': True}
+            op.create_index(name, table, columns, if_not_exists=True, **kwargs)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,51 @@
+"""Add trades_archive cold storage table
+
+Revision ID: 8b2e4d6f1a93
+Revises: 3f1c2a9b7d41
+Create Date: 2026-10-19 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '8b2e4d6f1a93'
+down_revision = '3f1c2a9b7d41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Monthly partitions are created on demand by TradeArchiver. The table
+    # may already exist where create_all ran after the model was added
+    op.create_table(
+        'trades_archive',
+        sa.Column('id', sa.Integer(), nullable=False, autoincrement=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('workflow_id', sa.Integer()),
+        sa.Column('symbol', sa.String(20), nullable=False),
+        sa.Column('side', sa.String(10), nullable=False),
+        sa.Column('type', sa.String(20)),
+        sa.Column('quantity', sa.Float(), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('filled_quantity', sa.Float()),
+        sa.Column('average_price', sa.Float()),
+        sa.Column('status', sa.String(20)),
+        sa.Column('exchange', sa.String(50)),
+        sa.Column('exchange_order_id', sa.String(100)),
+        sa.Column('fee', sa.Float()),
+        sa.Column('profit_loss', sa.Float()),
+        sa.Column('updated_at', sa.DateTime()),
+        sa.Column('archived_at', sa.DateTime()),
+        sa.PrimaryKeyConstraint('id', 'timestamp'),
+        postgresql_partition_by='RANGE (timestamp)',
+        if_not_exists=True
+    )
+    op.create_index('ix_trades_archive_user_timestamp', 'trades_archive', ['user_id', 'timestamp', 'id'],
+                    if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_trades_archive_user_timestamp', table_name='trades_archive')
+    op.drop_table('trades_archive')
@@ -0,0 +1,48 @@
+"""Add trade_daily_stats rollup table
+
+Revision ID: c5a1f3e8d240
+Revises: 8b2e4d6f1a93
+Create Date: 2026-10-19 16:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'c5a1f3e8d240'
+down_revision = '8b2e4d6f1a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rows for existing trades are filled by rebuild_trade_daily_stats_task(days=None).
+    # The table may already exist where create_all ran after the model was added
+    op.create_table(
+        'trade_daily_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('symbol', sa.String(20), nullable=False),
+        sa.Column('workflow_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('trades', sa.Integer(), nullable=False),
+        sa.Column('wins', sa.Integer(), nullable=False),
+        sa.Column('losses', sa.Integer(), nullable=False),
+        sa.Column('gross_profit', sa.Float(), nullable=False),
+        sa.Column('gross_loss', sa.Float(), nullable=False),
+        sa.Column('volume', sa.Float(), nullable=False),
+        sa.Column('fees', sa.Float(), nullable=False),
+        sa.Column('largest_win', sa.Float()),
+        sa.Column('largest_loss', sa.Float()),
+        sa.Column('updated_at', sa.DateTime()),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'symbol', 'workflow_id', 'day', name='uq_trade_daily_stats_key'),
+        if_not_exists=True
+    )
+    op.create_index('ix_trade_daily_stats_user_day', 'trade_daily_stats', ['user_id', 'day'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_trade_daily_stats_user_day', table_name='trade_daily_stats')
+    op.drop_table('trade_daily_stats')
@@ -0,0 +1,37 @@
+"""Add portfolio_snapshots equity history table
+
+Revision ID: e2b8c6d4f917
+Revises: c5a1f3e8d240
+Create Date: 2026-10-19 17:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'e2b8c6d4f917'
+down_revision = 'c5a1f3e8d240'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The table may already exist where create_all ran after the model was added
+    op.create_table(
+        'portfolio_snapshots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('cash', sa.Float(), nullable=False),
+        sa.Column('positions_value', sa.Float(), nullable=False),
+        sa.Column('unrealized_pnl', sa.Float(), nullable=False),
+        sa.Column('equity', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'timestamp', name='uq_portfolio_snapshots_user_timestamp'),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('portfolio_snapshots')
@@ -0,0 +1,76 @@
+import os
+
+import fakeredis
+import pytest
+from flask import Flask
+
+os.environ.setdefault('SECRET_KEY', 'test-secret-key-for-encryption-only')
+
+import app as app_package  # noqa: E402
+
+# Services bind the shared Redis client at import time, so swap it first
+app_package.redis_client = fakeredis.FakeRedis(decode_responses=True)
+
+from app import db  # noqa: E402
+
+
+def _import_models():
+    from app.models import (  # noqa: F401
+        api_key, notification, portfolio_snapshot, position, trade, trade_archive,
+        trade_daily_stat, user, workflow, WorkflowExecution
+    )
+
+
+@pytest.fixture
+def app():
+    """Flask app on a fresh database (SQLite in memory unless TEST_DATABASE_URL is set)"""
+    flask_app = Flask(__name__)
+    flask_app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI=os.getenv('TEST_DATABASE_URL', 'sqlite://'),
+    )
+    db.init_app(flask_app)
+    _import_models()
+
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+    app_package.redis_client.flushall()
+
+
+@pytest.fixture
+def redis_client():
+    """The shared fakeredis client, emptied after the test"""
+    yield app_package.redis_client
+    app_package.redis_client.flushall()
+
+
+@pytest.fixture
+def user(app):
+    from app.models.user import User
+
+    user = User(username='trader', email='trader@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def api_key_factory(app):
+    """Create an active ApiKey for a user and exchange"""
+    from app.models.api_key import ApiKey
+    from app.utils.encryption import encrypt_value
+
+    def create(user, exchange='simulator', is_testnet=True, key='key', secret='secret'):
+        api_key = ApiKey(
+            user_id=user.id, exchange=exchange, is_testnet=is_testnet,
+            api_key=encrypt_value(key), api_secret=encrypt_value(secret)
+        )
+        db.session.add(api_key)
+        db.session.commit()
+        return api_key
+
+    return create
@@ -0,0 +1,73 @@
+import pytest
+
+from app import db
+from app.models.position import Position
+from app.models.trade import Trade
+from app.models.workflow import Workflow
+from app.services.analytics_cache import analytics_cache
+
+
+@pytest.fixture
+def trade(user, redis_client):
+    trade = Trade(user_id=user.id, symbol='BTC/USDT', side='buy', type='market', quantity=1, price=100,
+                  status='filled', exchange='simulator')
+    db.session.add(trade)
+    db.session.commit()
+    return trade
+
+
+def test_committed_trade_invalidates_cached_analytics(user, trade):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'trades': Trade.query.filter_by(user_id=user.id).count()}
+
+    version = analytics_cache.version(user.id)
+    assert analytics_cache.get_or_compute(user.id, 'summary', compute) == {'trades': 1}
+    assert analytics_cache.get_or_compute(user.id, 'summary', compute) == {'trades': 1}
+    assert len(calls) == 1
+
+    db.session.add(Trade(user_id=user.id, symbol='ETH/USDT', side='buy', type='market', quantity=1, price=10,
+                         status='filled', exchange='simulator'))
+    db.session.commit()
+
+    assert analytics_cache.version(user.id) == version + 1
+    assert analytics_cache.get_or_compute(user.id, 'summary', compute) == {'trades': 2}
+    assert len(calls) == 2
+
+
+def test_only_tracked_changes_bump_the_version(user, trade):
+    version = analytics_cache.version(user.id)
+
+    trade.exchange_order_id = 'abc'
+    db.session.commit()
+    assert analytics_cache.version(user.id) == version
+
+    trade.profit_loss = 12.5
+    db.session.commit()
+    assert analytics_cache.version(user.id) == version + 1
+
+
+def test_workflow_and_position_commits_bump_the_version(user, redis_client):
+    workflow = Workflow(user_id=user.id, name='grid', nodes=[], connections=[])
+    db.session.add(workflow)
+    db.session.commit()
+    assert analytics_cache.version(user.id) == 1
+
+    workflow.name = 'grid v2'
+    db.session.commit()
+    assert analytics_cache.version(user.id) == 2
+
+    db.session.add(Position(user_id=user.id, symbol='BTC/USDT', quantity=1, entry_price=100, current_price=110))
+    db.session.commit()
+    assert analytics_cache.version(user.id) == 3
+
+
+def test_rolled_back_writes_do_not_bump_the_version(user, redis_client):
+    db.session.add(Trade(user_id=user.id, symbol='BTC/USDT', side='buy', type='market', quantity=1, price=100,
+                         status='filled', exchange='simulator'))
+    db.session.flush()
+    db.session.rollback()
+
+    assert analytics_cache.version(user.id) == 0
@@ -0,0 +1,47 @@
+import pytest
+
+from app import db
+from app.models.api_key import ApiKey, _credential_cache
+from app.services.exchange_gateway import exchange_gateway
+from app.utils.encryption import encrypt_value
+
+
+@pytest.fixture
+def evicted(monkeypatch):
+    keys = []
+    monkeypatch.setattr(exchange_gateway, 'evict', keys.append)
+    return keys
+
+
+def test_rotating_key_evicts_credentials_and_client(user, api_key_factory, evicted):
+    api_key = api_key_factory(user, exchange='binance')
+    assert api_key.get_credentials() == ('key', 'secret')
+    evicted.clear()
+
+    api_key.api_secret = encrypt_value('rotated')
+    db.session.commit()
+
+    assert api_key.id not in _credential_cache
+    assert ('binance', True, user.id) in evicted
+    assert api_key.get_credentials() == ('key', 'rotated')
+
+
+def test_switching_testnet_evicts_both_clients(user, api_key_factory, evicted):
+    api_key = api_key_factory(user, exchange='binance')
+    evicted.clear()
+
+    api_key.is_testnet = False
+    db.session.commit()
+
+    assert set(evicted) == {('binance', True, user.id), ('binance', False, user.id)}
+
+
+def test_deleting_key_evicts_client(user, api_key_factory, evicted):
+    api_key = api_key_factory(user, exchange='bybit')
+    evicted.clear()
+
+    db.session.delete(api_key)
+    db.session.commit()
+
+    assert ('bybit', True, user.id) in evicted
+    assert ApiKey.query.count() == 0
@@ -0,0 +1,76 @@
+import json
+import threading
+import time
+
+import pytest
+
+from app.utils import cache as cache_module
+from app.utils.cache import SingleFlightCache
+
+
+def _store(client, key, value, expires_in, delta=0.01):
+    envelope = {'value': value, 'expires_at': time.time() + expires_in, 'delta': delta}
+    client.set(key, json.dumps(envelope))
+
+
+@pytest.fixture
+def cache(redis_client):
+    return SingleFlightCache(redis_client, wait_timeout=5)
+
+
+def test_concurrent_misses_load_once(cache):
+    calls = []
+    start = threading.Barrier(8)
+    results = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'price': 1}
+
+    def read():
+        start.wait()
+        results.append(cache.get_or_load('ticker', loader, ttl=60))
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{'price': 1}] * 8
+
+
+def test_stale_value_is_served_while_another_caller_refreshes(cache, redis_client):
+    _store(redis_client, 'ticker', 'old', expires_in=-1)
+    redis_client.set('lock:ticker', 'someone-else')
+
+    assert cache.get_or_load('ticker', lambda: pytest.fail('loader must not run'), ttl=60) == 'old'
+
+
+def test_failed_refresh_serves_stale_value(cache, redis_client):
+    _store(redis_client, 'ticker', 'old', expires_in=-1)
+
+    def loader():
+        raise RuntimeError('exchange down')
+
+    assert cache.get_or_load('ticker', loader, ttl=60) == 'old'
+    assert redis_client.get('lock:ticker') is None
+
+
+def test_xfetch_refreshes_slow_values_before_expiry(redis_client, monkeypatch):
+    monkeypatch.setattr(cache_module.random, 'random', lambda: 0.5)
+    # Fresh for another second, but the last load took 10 seconds
+    _store(redis_client, 'ticker', 'old', expires_in=1, delta=10)
+
+    assert SingleFlightCache(redis_client, beta=0).get_or_load('ticker', lambda: 'new', ttl=60) == 'old'
+    assert SingleFlightCache(redis_client).get_or_load('ticker', lambda: 'new', ttl=60) == 'new'
+    assert json.loads(redis_client.get('ticker'))['value'] == 'new'
+
+
+def test_fast_values_are_not_refreshed_early(cache, redis_client, monkeypatch):
+    monkeypatch.setattr(cache_module.random, 'random', lambda: 0.5)
+    _store(redis_client, 'ticker', 'old', expires_in=30, delta=0.01)
+
+    assert cache.get_or_load('ticker', lambda: 'new', ttl=60) == 'old'
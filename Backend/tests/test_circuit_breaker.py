@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+import ccxt
+import pytest
+
+from app.services import circuit_breaker as circuit_breaker_module
+from app.services.circuit_breaker import CircuitBreaker
+from app.utils.exception import CircuitOpenException
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker_module, 'time', SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker('binance:create_order', failure_threshold=0.5, min_requests=4, reset_timeout=15)
+
+
+def _fail(breaker, times, error=None):
+    for _ in range(times):
+        breaker.before_call()
+        breaker.record(error or ccxt.RequestTimeout('timed out'))
+
+
+def test_closed_open_half_open_closed(breaker, clock):
+    breaker.before_call()
+    breaker.record()
+    _fail(breaker, 2)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    _fail(breaker, 1)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenException, match='Circuit open for binance:create_order'):
+        breaker.before_call()
+
+    clock.now += 15
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    breaker.record()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_failed_probe_reopens(breaker, clock):
+    _fail(breaker, 4)
+    clock.now += 15
+
+    _fail(breaker, 1)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenException):
+        breaker.before_call()
+
+
+def test_half_open_admits_limited_probes(clock):
+    breaker = CircuitBreaker('okx:fetch_order', min_requests=2, reset_timeout=5, half_open_max_calls=2)
+    _fail(breaker, 2)
+    clock.now += 5
+
+    breaker.before_call()
+    breaker.before_call()
+    with pytest.raises(CircuitOpenException, match='probe in flight'):
+        breaker.before_call()
+
+    # A probe that never reached the exchange frees its slot
+    breaker.release()
+    breaker.before_call()
+
+
+@pytest.mark.parametrize('error', [
+    ccxt.InvalidOrder('bad price'),
+    ccxt.InsufficientFunds('no balance'),
+])
+def test_user_errors_do_not_open_the_circuit(breaker, error):
+    _fail(breaker, 10, error)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_old_failures_leave_the_window(breaker, clock):
+    _fail(breaker, 3)
+    clock.now += 31
+
+    _fail(breaker, 1)
+
+    assert breaker.state == CircuitBreaker.CLOSED
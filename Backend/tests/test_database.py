@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy import create_engine
+
+from app import db
+from app.models.user import User
+from app.utils.database import REPLICA_BIND, read_replica, replica_monitor
+
+
+@pytest.fixture
+def replica_app(app, monkeypatch):
+    """The test app with a second, separate in-memory database as its replica bind"""
+    replica = create_engine('sqlite://')
+    db.metadata.create_all(replica)
+    with replica.begin() as connection:
+        connection.execute(db.insert(User).values(username='replica', email='r@example.com', password_hash='x'))
+
+    monkeypatch.setitem(db.engines, REPLICA_BIND, replica)
+    monkeypatch.setattr(replica_monitor, 'is_healthy', lambda engine: True)
+    yield app
+    db.session.remove()
+    replica.dispose()
+
+
+def _bind(clause):
+    return db.session.get_bind(clause=clause)
+
+
+def test_only_plain_selects_go_to_the_replica(replica_app):
+    primary, replica = db.engines[None], db.engines[REPLICA_BIND]
+
+    assert _bind(db.select(User)) is primary
+
+    with read_replica():
+        assert _bind(db.select(User)) is replica
+        assert _bind(db.select(User).union_all(db.select(User))) is replica
+        assert _bind(db.select(User).with_for_update()) is primary
+        assert _bind(db.text('SELECT 1')) is primary
+        assert _bind(db.update(User).values(email='x')) is primary
+        assert _bind(db.insert(User)) is primary
+        assert db.session.scalars(db.select(User.username)).all() == ['replica']
+
+    with read_replica(enabled=False):
+        assert _bind(db.select(User)) is primary
+
+
+def test_unhealthy_replica_falls_back_to_primary(replica_app, monkeypatch):
+    monkeypatch.setattr(replica_monitor, 'is_healthy', lambda engine: False)
+
+    with read_replica():
+        assert _bind(db.select(User)) is db.engines[None]
+
+
+def test_reads_after_a_write_stay_on_the_primary(replica_app):
+    with read_replica():
+        db.session.add(User(username='primary', email='p@example.com', password_hash='x'))
+        db.session.flush()
+
+        # The replica can't see this transaction's rows
+        assert _bind(db.select(User)) is db.engines[None]
+        assert db.session.scalars(db.select(User.username)).all() == ['primary']
+
+        db.session.commit()
+        assert _bind(db.select(User)) is db.engines[REPLICA_BIND]
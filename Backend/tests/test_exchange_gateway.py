@@ -0,0 +1,42 @@
+import time
+
+import pytest
+
+from app.services.exchange_gateway import ExchangeGateway
+
+
+@pytest.fixture
+def gateway():
+    gateway = ExchangeGateway(call_timeout=5, client_ttl=60)
+    yield gateway
+    gateway.close()
+
+
+def _client(gateway, key):
+    return gateway._clients[key].result()
+
+
+def test_evict_rebuilds_client_with_current_config(gateway):
+    key = ('simulator', True, 1)
+    configs = iter([{'apiKey': 'old'}, {'apiKey': 'new'}])
+
+    gateway.call(key, 'simulator', 'fetch_balance', config_factory=lambda: next(configs))
+    first = _client(gateway, key)
+    gateway.evict(key)
+    gateway.call(key, 'simulator', 'fetch_balance', config_factory=lambda: next(configs))
+
+    assert _client(gateway, key) is not first
+    assert _client(gateway, key).apiKey == 'new'
+
+
+def test_expired_client_is_rebuilt(gateway):
+    key = ('simulator', True, 1)
+    gateway.call(key, 'simulator', 'fetch_balance', config_factory=dict)
+    first = _client(gateway, key)
+    assert gateway.has_client(key)
+
+    gateway._created_at[key] = time.monotonic() - gateway.client_ttl
+    assert not gateway.has_client(key)
+    gateway.call(key, 'simulator', 'fetch_balance', config_factory=dict)
+
+    assert _client(gateway, key) is not first
@@ -0,0 +1,59 @@
+import pytest
+
+from app.services.exchange_rate_limiter import ExchangeRateLimiter
+from app.utils.exception import ExchangeException
+
+# Buckets that barely refill, so a test sees only the tokens it spends
+LIMITS = {'weight': (10, 0.001), 'order': (100, 0.001), 'account': (100, 0.001), 'market': (100, 0.001)}
+
+
+@pytest.fixture
+def limiter(redis_client, monkeypatch):
+    monkeypatch.setitem(ExchangeRateLimiter.EXCHANGE_LIMITS, 'test', LIMITS)
+    return ExchangeRateLimiter(client=redis_client, enabled=True)
+
+
+def _admitted(limiter, method, account='a', limit=50):
+    """Number of calls admitted before the budget runs out"""
+    for admitted in range(limit):
+        try:
+            limiter.acquire('test', method, account=account, max_wait=0)
+        except ExchangeException:
+            return admitted
+    return limit
+
+
+def test_reserve_keeps_weight_for_order_calls(limiter):
+    # Market data must leave 40% of the weight bucket untouched
+    assert _admitted(limiter, 'fetch_ticker') == 6
+
+    # Orders have no reserve and spend what is left
+    assert _admitted(limiter, 'create_order') == 4
+    with pytest.raises(ExchangeException, match='Rate limit budget exhausted for test'):
+        limiter.acquire('test', 'cancel_order', account='a', max_wait=0)
+
+
+def test_weight_bucket_is_shared_per_account(limiter):
+    assert _admitted(limiter, 'fetch_ticker') == 6
+
+    # Account calls draw on the same weight bucket (reserve 20%, weight 2)
+    assert _admitted(limiter, 'fetch_order') == 1
+    # Another API key has its own budget
+    assert _admitted(limiter, 'fetch_ticker', account='b') == 6
+
+
+def test_batch_order_counts_each_order(limiter, redis_client):
+    limiter.acquire('test', 'create_orders', account='a', count=5, max_wait=0)
+
+    assert float(redis_client.hget('exchange_rl:test:order:a', 'tokens')) == pytest.approx(95, abs=0.01)
+    assert float(redis_client.hget('exchange_rl:test:weight:a', 'tokens')) == pytest.approx(5, abs=0.01)
+
+
+def test_bucket_refills_over_time(limiter, redis_client):
+    assert _admitted(limiter, 'create_order') == 10
+
+    # Move the buckets' last update back by the time 3 tokens take to refill
+    for key in ('exchange_rl:test:weight:a', 'exchange_rl:test:order:a'):
+        redis_client.hset(key, 'ts', int(redis_client.hget(key, 'ts')) - 3 * 1000 * 1000)
+
+    assert _admitted(limiter, 'create_order') == 3
@@ -0,0 +1,87 @@
+import ccxt
+import pytest
+
+from app.services.exchange_simulator import SimulatedExchange, SimulatorVenue, reset_simulator
+
+
+@pytest.fixture
+def venue():
+    return SimulatorVenue(initial_balance={'USDT': 100000.0, 'BTC': 1.0}, volatility=0, fee_rate=0)
+
+
+@pytest.fixture
+def exchange():
+    reset_simulator()
+    yield SimulatedExchange({'options': {'simulator': {
+        'volatility': 0, 'fee_rate': 0, 'initial_balance': {'USDT': 100000.0, 'BTC': 1.0}
+    }}})
+    reset_simulator()
+
+
+def _balance(venue, asset):
+    return dict(venue.balances[asset])
+
+
+def test_limit_order_reserves_and_cancel_releases(venue):
+    order = venue.create_order('BTC/USDT', 'limit', 'buy', 1, 40000)
+    assert _balance(venue, 'USDT') == {'free': 60000.0, 'used': 40000.0}
+
+    venue.cancel_order(order['id'])
+
+    assert order['status'] == 'canceled'
+    assert _balance(venue, 'USDT') == {'free': 100000.0, 'used': 0.0}
+
+
+def test_stop_loss_and_take_profit_reserve_once(venue):
+    stop = venue.create_order('BTC/USDT', 'stop_loss', 'sell', 1, 40000)
+    take = venue.create_order('BTC/USDT', 'take_profit', 'sell', 1, 50000)
+
+    assert stop['status'] == take['status'] == 'open'
+    assert _balance(venue, 'BTC') == {'free': 0.0, 'used': 1.0}
+
+
+def test_filled_oco_leg_cancels_its_partner(venue):
+    stop = venue.create_order('BTC/USDT', 'stop_loss', 'sell', 1, 40000)
+    take = venue.create_order('BTC/USDT', 'take_profit', 'sell', 1, 50000)
+
+    venue.prices['BTC/USDT'] = 51000
+    venue._tick('BTC/USDT')
+
+    assert take['status'] == 'closed'
+    assert stop['status'] == 'canceled'
+    assert _balance(venue, 'BTC') == {'free': 0.0, 'used': 0.0}
+    assert _balance(venue, 'USDT')['free'] == 150000.0
+
+
+def test_cancelled_oco_leg_leaves_partner_reserved(venue):
+    stop = venue.create_order('BTC/USDT', 'stop_loss', 'sell', 1, 40000)
+    take = venue.create_order('BTC/USDT', 'take_profit', 'sell', 1, 50000)
+
+    venue.cancel_order(stop['id'])
+    assert _balance(venue, 'BTC') == {'free': 0.0, 'used': 1.0}
+
+    venue.cancel_order(take['id'])
+    assert _balance(venue, 'BTC') == {'free': 1.0, 'used': 0.0}
+
+
+def test_cancel_orders_reports_each_id(exchange):
+    first = exchange.create_order('BTC/USDT', 'limit', 'buy', 1, 40000)
+    second = exchange.create_order('BTC/USDT', 'limit', 'buy', 1, 40000)
+
+    results = exchange.cancel_orders([first['id'], 'unknown', second['id']], 'BTC/USDT')
+
+    assert [r['status'] for r in results] == ['canceled', 'rejected', 'canceled']
+    assert 'not found' in results[1]['info']['error']
+    assert exchange.fetch_balance()['USDT'] == {'free': 100000.0, 'used': 0.0, 'total': 100000.0}
+
+
+def test_post_commit_failure_applies_the_write(exchange):
+    exchange.post_commit_error_rate = 1
+
+    with pytest.raises(ccxt.RequestTimeout):
+        exchange.create_order('BTC/USDT', 'limit', 'buy', 1, 40000, {'clientOrderId': 'retry-me'})
+
+    # The order exists although the caller saw an error; reads never fail this way
+    order = exchange.fetch_order(None, 'BTC/USDT', {'clientOrderId': 'retry-me'})
+    assert order['status'] == 'open'
+    assert len(exchange.fetch_open_orders('BTC/USDT')) == 1
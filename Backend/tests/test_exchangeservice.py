@@ -0,0 +1,238 @@
+import ccxt
+import pytest
+
+from app.services.exchangeservice import ExchangeService
+
+
+class FakeBinance(ccxt.binance):
+    """Binance client whose order endpoints are scripted in memory"""
+
+    def __init__(self):
+        super().__init__()
+        self.open_ids = set()
+        self.calls = []
+        self.fail_batch_after = None
+
+    def cancel_orders(self, ids, symbol=None, params={}):
+        self.calls.append(('cancel_orders', list(ids)))
+        if self.fail_batch_after is not None:
+            # The exchange applied part of the batch before the request failed
+            for order_id in ids[:self.fail_batch_after]:
+                self.open_ids.discard(order_id)
+            raise ccxt.RequestTimeout('batch timed out')
+        return [self.cancel_order(order_id, symbol) for order_id in ids]
+
+    def cancel_order(self, id, symbol=None, params={}):
+        self.calls.append(('cancel_order', id))
+        if id not in self.open_ids:
+            raise ccxt.OrderNotFound(f'Unknown order {id}')
+        self.open_ids.discard(id)
+        return {'id': id, 'symbol': symbol, 'status': 'canceled'}
+
+    def fetch_order(self, id, symbol=None, params={}):
+        self.calls.append(('fetch_order', id))
+        if id == 'missing':
+            raise ccxt.OrderNotFound(f'Unknown order {id}')
+        return {'id': id, 'symbol': symbol, 'status': 'open' if id in self.open_ids else 'canceled'}
+
+    def create_orders(self, orders, params={}):
+        return [
+            {'id': '1', 'symbol': orders[0]['symbol'], 'status': 'open'},
+            {'info': {'code': -2010, 'msg': 'Account has insufficient balance for requested action.'},
+             'status': 'rejected'},
+        ]
+
+
+@pytest.fixture
+def service(app):
+    service = ExchangeService(user_id=None, use_gateway=False)
+    service.exchanges['binance_True'] = FakeBinance()
+    return service
+
+
+def test_cancel_orders_uses_one_batch_request(service):
+    exchange = service.exchanges['binance_True']
+    exchange.open_ids = {'a', 'b'}
+
+    results = service.cancel_orders([
+        {'id': 'a', 'symbol': 'BTC/USDT:USDT'}, {'id': 'b', 'symbol': 'BTC/USDT:USDT'}, {'symbol': 'BTC/USDT:USDT'}
+    ])
+
+    assert [r['success'] for r in results] == [True, True, False]
+    assert results[2]['error'] == 'Order id required'
+    assert exchange.calls[0] == ('cancel_orders', ['a', 'b'])
+
+
+def test_failed_batch_cancel_is_retried_per_order(service):
+    exchange = service.exchanges['binance_True']
+    exchange.open_ids = {'a', 'b', 'c'}
+    exchange.fail_batch_after = 1
+
+    batch = [{'id': order_id, 'symbol': 'BTC/USDT:USDT'} for order_id in ('a', 'b', 'c', 'missing')]
+    results = service.cancel_orders(batch)
+
+    # 'a' went through with the failed batch, 'b' and 'c' on retry
+    assert [r['success'] for r in results] == [True, True, True, False]
+    assert [r['order']['status'] for r in results[:3]] == ['canceled'] * 3
+    assert 'Unknown order missing' in results[3]['error']
+    assert exchange.open_ids == set()
+
+
+def test_rejected_batch_order_reports_exchange_error(service):
+    batch = [
+        {'symbol': 'BTC/USDT:USDT', 'side': 'buy', 'type': 'limit', 'quantity': 1, 'price': 30000},
+        {'symbol': 'BTC/USDT:USDT', 'side': 'buy', 'type': 'limit', 'quantity': 100, 'price': 30000},
+    ]
+
+    results = service.place_orders(batch)
+
+    assert results[0]['success'] and results[0]['order']['id'] == '1'
+    assert not results[1]['success']
+    assert results[1]['error'] == (
+        'Order rejected by exchange: Account has insufficient balance for requested action. (code -2010)'
+    )
+
+
+def _spot_market(base):
+    return {'id': f'{base}USDT', 'symbol': f'{base}/USDT', 'base': base, 'quote': 'USDT',
+            'baseId': base, 'quoteId': 'USDT', 'type': 'spot', 'spot': True, 'margin': False, 'swap': False,
+            'future': False, 'option': False, 'contract': False, 'linear': None, 'inverse': None,
+            'settle': None, 'active': True, 'precision': {'amount': 0.00001, 'price': 0.01}, 'limits': {},
+            'info': {'orderTypes': ['LIMIT', 'MARKET', 'STOP_LOSS', 'TAKE_PROFIT'], 'filters': []}}
+
+
+def _spot_order(params, order_id):
+    return {'symbol': params['symbol'], 'orderId': order_id, 'clientOrderId': f'c{order_id}',
+            'transactTime': 1700000000000, 'price': params.get('price', '0'), 'origQty': params.get('quantity', '1'),
+            'executedQty': '0', 'cummulativeQuoteQty': '0', 'status': params.get('status', 'NEW'),
+            'type': params.get('type', 'LIMIT'), 'side': params.get('side', 'BUY')}
+
+
+@pytest.fixture
+def spot_binance(app):
+    """Real CCXT binance client on a spot market; only the HTTP endpoints are scripted"""
+    exchange = ccxt.binance({'apiKey': 'key', 'secret': 'secret', 'options': {'defaultType': 'spot'}})
+    exchange.set_markets([_spot_market('BTC')])
+    exchange.requests = []
+
+    def post_order(params={}):
+        exchange.requests.append(('POST', params))
+        if params['type'] == 'TAKE_PROFIT':
+            raise ccxt.InsufficientFunds('binance {"code":-2010,"msg":"Account has insufficient balance"}')
+        return _spot_order(params, len(exchange.requests))
+
+    def delete_order(params={}):
+        exchange.requests.append(('DELETE', params))
+        return _spot_order({**params, 'status': 'CANCELED'}, params['orderId'])
+
+    exchange.privatePostOrder = post_order
+    exchange.privateDeleteOrder = delete_order
+
+    service = ExchangeService(user_id=None, use_gateway=False)
+    service.exchanges['binance_True'] = exchange
+    return service, exchange
+
+
+def test_spot_batch_on_binance_is_placed_order_by_order(spot_binance):
+    service, exchange = spot_binance
+    batch = [
+        {'symbol': 'BTC/USDT', 'side': 'buy', 'type': 'limit', 'quantity': 1, 'price': 30000},
+        {'symbol': 'BTC/USDT', 'side': 'buy', 'type': 'limit', 'quantity': 2, 'price': 29000},
+    ]
+
+    results = service.place_orders(batch)
+
+    assert [r['success'] for r in results] == [True, True]
+    assert [params['quantity'] for _, params in exchange.requests] == ['1', '2']
+
+
+def test_refused_native_batch_falls_back_to_single_orders(spot_binance, monkeypatch):
+    service, exchange = spot_binance
+    # Without the market-type gate CCXT's createOrders refuses spot orders outright
+    monkeypatch.setattr(ExchangeService, 'NATIVE_BATCH_RULES', {})
+    with pytest.raises(ccxt.NotSupported):
+        exchange.create_orders([{'symbol': 'BTC/USDT', 'type': 'limit', 'side': 'buy', 'amount': 1, 'price': 30000}])
+
+    results = service.place_orders([
+        {'symbol': 'BTC/USDT', 'side': 'buy', 'type': 'limit', 'quantity': 1, 'price': 30000},
+    ])
+
+    assert results[0]['success']
+    assert len(exchange.requests) == 1
+
+
+def test_stop_order_failures_are_returned_with_the_order(spot_binance):
+    service, exchange = spot_binance
+
+    order = service.place_order('BTC/USDT', 'buy', 'limit', 1, 30000, stop_loss=28000, take_profit=35000)
+
+    assert order['id'] == '1'
+    stop_orders = {result['type']: result for result in order['stop_orders']}
+    assert stop_orders['stop_loss']['success']
+    assert not stop_orders['take_profit']['success']
+    assert stop_orders['take_profit']['error'] == 'Insufficient funds'
+
+
+def test_spot_cancels_on_binance_skip_the_batch_endpoint(spot_binance):
+    service, exchange = spot_binance
+
+    results = service.cancel_orders([{'id': '7', 'symbol': 'BTC/USDT'}, {'id': '8', 'symbol': 'BTC/USDT'}])
+
+    assert [r['order']['status'] for r in results] == ['canceled', 'canceled']
+    assert sorted(params['orderId'] for _, params in exchange.requests) == ['7', '8']
+
+
+def test_simulator_capabilities_do_not_create_a_venue(app, monkeypatch):
+    from app.services import exchange_simulator
+
+    exchange_simulator.reset_simulator()
+    monkeypatch.setattr(ExchangeService, '_capabilities', {})
+
+    assert ExchangeService(use_gateway=False)._exchange_has('simulator', 'createOrders')
+    assert exchange_simulator._venues == {}
+
+
+@pytest.fixture
+def simulator(app, redis_client):
+    from app.services.exchange_simulator import SimulatedExchange, reset_simulator
+
+    reset_simulator()
+    exchange = SimulatedExchange({'options': {'simulator': {'volatility': 0, 'fee_rate': 0}}})
+    service = ExchangeService(user_id=1, use_gateway=False)
+    service.exchanges['simulator_True'] = exchange
+    yield service, exchange
+    reset_simulator()
+
+
+def test_order_accepted_before_a_timeout_is_not_placed_twice(simulator):
+    service, exchange = simulator
+    client_order_id = ExchangeService.client_order_id('trade', 42)
+    exchange.post_commit_error_rate = 1
+
+    # The exchange applies the order, then the response is lost
+    order = service.place_order('BTC/USDT', 'buy', 'limit', 1, 40000,
+                                exchange_name='simulator', client_order_id=client_order_id)
+
+    # A retry, e.g. by the Celery task, sends the same client order id
+    exchange.post_commit_error_rate = 0
+    retried = service.place_order('BTC/USDT', 'buy', 'limit', 1, 40000,
+                                  exchange_name='simulator', client_order_id=client_order_id)
+
+    assert client_order_id == ExchangeService.client_order_id('trade', 42)
+    assert retried['id'] == order['id']
+    assert len(exchange.fetch_open_orders('BTC/USDT')) == 1
+
+
+def test_retry_after_an_unrecorded_attempt_asks_the_exchange(simulator):
+    service, exchange = simulator
+    client_order_id = ExchangeService.client_order_id('trade', 43)
+
+    # A first attempt marked the id pending and placed the order, then died
+    assert service._find_client_order('simulator', 'BTC/USDT', client_order_id) is None
+    placed = exchange.create_order('BTC/USDT', 'limit', 'buy', 1, 40000, {'clientOrderId': client_order_id})
+
+    order = service.place_order('BTC/USDT', 'buy', 'limit', 1, 40000,
+                                exchange_name='simulator', client_order_id=client_order_id)
+
+    assert order['id'] == placed['id']
+    assert len(exchange.fetch_open_orders('BTC/USDT')) == 1
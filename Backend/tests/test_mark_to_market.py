@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app import db
+from app.models.position import Position
+from app.services.mark_to_market import MarkToMarketService
+
+
+@pytest.fixture
+def positions(user):
+    rows = {
+        symbol: Position(user_id=user.id, symbol=symbol, quantity=quantity, entry_price=entry,
+                         current_price=entry, unrealized_pnl=0)
+        for symbol, quantity, entry in (('BTC/USDT', 2, 100), ('ETH/USDT', 3, 10), ('SOL/USDT', 5, 20))
+    }
+    db.session.add_all(rows.values())
+    db.session.commit()
+    return {symbol: position.id for symbol, position in rows.items()}
+
+
+def _marks(positions):
+    db.session.expire_all()
+    return {
+        symbol: (db.session.get(Position, position_id).current_price,
+                 db.session.get(Position, position_id).unrealized_pnl)
+        for symbol, position_id in positions.items()
+    }
+
+
+def test_positions_are_marked_in_batches(positions):
+    service = MarkToMarketService(batch_size=1)
+
+    updated = service.run({'BTC/USDT': 110, 'ETH/USDT': 8, 'DOGE/USDT': None})
+
+    assert updated == 2
+    assert _marks(positions) == {
+        'BTC/USDT': (110, 20),
+        'ETH/USDT': (8, -6),
+        # Not in the price map: left as it was
+        'SOL/USDT': (20, 0),
+    }
+
+
+def test_unchanged_marks_are_not_rewritten(positions):
+    service = MarkToMarketService()
+    service.run({'BTC/USDT': 110})
+
+    assert service.run({'BTC/USDT': 110, 'SOL/USDT': 20}) == 0
+    assert service.run({}) == 0
+
+
+def test_postgresql_joins_a_values_list(positions, monkeypatch):
+    bind = SimpleNamespace(dialect=SimpleNamespace(name='postgresql'))
+    monkeypatch.setattr(db.session, 'get_bind', lambda *args, **kwargs: bind)
+
+    statement = MarkToMarketService()._update([('BTC/USDT', 110.0)], None)
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+
+    assert 'FROM (VALUES' in sql
+    assert 'positions.symbol = prices.symbol' in sql
+    assert 'CASE' not in sql
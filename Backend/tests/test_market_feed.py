@@ -0,0 +1,57 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.market_feed import MarketDataCache, MarketFeedService, SUBSCRIPTIONS_KEY
+
+
+@pytest.fixture
+def cache(redis_client):
+    cache = MarketDataCache(client=redis_client, subscription_ttl=60, max_subscriptions=2)
+    cache.publish_markets(['BTC/USDT', 'ETH/USDT', 'SOL/USDT'])
+    return cache
+
+
+def test_request_symbol_accepts_listed_markets_only(cache):
+    assert cache.request_symbol('btcusdt') == 'BTC/USDT'
+    assert cache.request_symbol('NOPE/USDT') is None
+    assert cache.requested_symbols() == ['BTC/USDT']
+
+
+def test_request_symbol_caps_active_subscriptions(cache):
+    assert cache.request_symbol('BTC/USDT') == 'BTC/USDT'
+    assert cache.request_symbol('ETH-USDT') == 'ETH/USDT'
+    assert cache.request_symbol('SOL/USDT') is None
+
+    # Renewing an existing subscription is always allowed
+    assert cache.request_symbol('BTC/USDT') == 'BTC/USDT'
+
+
+def test_subscriptions_expire(cache, redis_client):
+    cache.request_symbol('BTC/USDT')
+    cache.request_symbol('ETH/USDT')
+    redis_client.zadd(SUBSCRIPTIONS_KEY, {'BTC/USDT': time.time() - 61})
+
+    assert cache.requested_symbols() == ['ETH/USDT']
+    # The expired slot is free again
+    assert cache.request_symbol('SOL/USDT') == 'SOL/USDT'
+
+
+def test_feed_streams_only_listed_requested_symbols(cache, redis_client):
+    feed = MarketFeedService(exchanges=['local'], symbols=['BTC/USDT'], cache=cache, source='local')
+    asyncio.run(feed._load_markets())
+
+    # A symbol written around the validation is not streamed on a venue that doesn't list it
+    redis_client.zadd(SUBSCRIPTIONS_KEY, {'ETH/USDT': time.time(), 'FAKE/USDT': time.time()})
+    assert feed._wanted() == {'BTC/USDT', 'ETH/USDT', 'FAKE/USDT'}
+
+    async def sync():
+        feed._sync_streams()
+        streams = set(feed._streams)
+        for tasks in feed._streams.values():
+            for task in tasks:
+                task.cancel()
+        return streams
+
+    assert asyncio.run(sync()) == {('local', 'BTC/USDT'), ('local', 'ETH/USDT')}
@@ -0,0 +1,64 @@
+import importlib.util
+import os
+
+import pytest
+from sqlalchemy import inspect
+
+from app import db
+
+flask_migrate = pytest.importorskip('flask_migrate')
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
+
+# Tables created by revisions rather than the initial schema
+NEW_TABLES = ['portfolio_snapshots', 'trade_daily_stats', 'trades_archive']
+
+
+def _load_revision(filename):
+    spec = importlib.util.spec_from_file_location(filename, os.path.join(MIGRATIONS, 'versions', filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _indexes(table):
+    return {index['name'] for index in inspect(db.engine).get_indexes(table)}
+
+
+def test_migrations_upgrade_and_downgrade(app):
+    hot_indexes = _load_revision('3f1c2a9b7d41_add_hot_query_indexes.py').INDEXES
+    flask_migrate.Migrate(app, db, directory=MIGRATIONS)
+
+    # Start from the schema before these revisions: base tables without their indexes
+    with db.engine.begin() as connection:
+        for table in NEW_TABLES:
+            db.metadata.tables[table].drop(connection)
+        for name, table, _, _ in hot_indexes:
+            connection.exec_driver_sql(f'DROP INDEX {name}')
+
+    flask_migrate.upgrade(directory=MIGRATIONS)
+    assert set(NEW_TABLES) <= set(inspect(db.engine).get_table_names())
+    for name, table, _, _ in hot_indexes:
+        assert name in _indexes(table)
+    assert 'ix_trade_daily_stats_user_day' in _indexes('trade_daily_stats')
+    assert [c['column_names'] for c in inspect(db.engine).get_unique_constraints('trade_daily_stats')] == [
+        ['user_id', 'symbol', 'workflow_id', 'day']
+    ]
+    assert [c['column_names'] for c in inspect(db.engine).get_unique_constraints('portfolio_snapshots')] == [
+        ['user_id', 'timestamp']
+    ]
+
+    flask_migrate.downgrade(directory=MIGRATIONS, revision='base')
+    assert not set(NEW_TABLES) & set(inspect(db.engine).get_table_names())
+    assert 'ix_trades_user_timestamp' not in _indexes('trades')
+
+    flask_migrate.upgrade(directory=MIGRATIONS)
+    assert 'ix_trades_archive_user_timestamp' in _indexes('trades_archive')
+
+
+def test_migrations_apply_to_create_all_schema(app):
+    flask_migrate.Migrate(app, db, directory=MIGRATIONS)
+
+    flask_migrate.upgrade(directory=MIGRATIONS)
+
+    assert db.session.execute(db.text('SELECT version_num FROM alembic_version')).scalar() == 'e2b8c6d4f917'
@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.models.notification import Notification
+from app.services.notification import NotificationService
+
+
+def test_notifications_are_paged_newest_first(user):
+    now = datetime.utcnow()
+    db.session.add_all([
+        Notification(user_id=user.id, type='system', title=f'n{i}', message='', is_read=i % 2 == 0,
+                     created_at=now - timedelta(minutes=i))
+        for i in range(5)
+    ])
+    db.session.commit()
+
+    first = NotificationService.get_user_notifications(user.id, limit=2)
+    second = NotificationService.get_user_notifications(user.id, limit=2, cursor=first['next_cursor'])
+    last = NotificationService.get_user_notifications(user.id, limit=2, cursor=second['next_cursor'])
+
+    titles = [n['title'] for page in (first, second, last) for n in page['notifications']]
+    assert titles == ['n0', 'n1', 'n2', 'n3', 'n4']
+    assert first['has_more'] and not last['has_more']
+    assert last['next_cursor'] is None
+
+    unread = NotificationService.get_user_notifications(user.id, unread_only=True)
+    assert [n['title'] for n in unread['notifications']] == ['n1', 'n3']
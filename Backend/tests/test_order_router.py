@@ -0,0 +1,51 @@
+import pytest
+
+from app import db
+from app.models.trade import Trade
+from app.services.exchange_simulator import reset_simulator
+from app.services.exchangeservice import ExchangeService
+from app.services.order_router import SmartOrderRouter
+from app.utils.exception import ValidationError
+
+
+@pytest.fixture
+def router_user(user, api_key_factory):
+    reset_simulator()
+    api_key_factory(user, exchange='simulator')
+    inactive = api_key_factory(user, exchange='bybit', key='inactive')
+    inactive.is_active = False
+    db.session.commit()
+    yield user
+    reset_simulator()
+
+
+def test_requested_exchanges_are_limited_to_active_keys(router_user):
+    assert SmartOrderRouter(router_user.id).connected_exchanges() == ['simulator']
+    assert SmartOrderRouter(router_user.id, exchanges=['simulator']).connected_exchanges() == ['simulator']
+
+    with pytest.raises(ValidationError, match='bybit, kraken'):
+        SmartOrderRouter(router_user.id, exchanges=['simulator', 'kraken', 'bybit']).connected_exchanges()
+
+
+@pytest.mark.parametrize('quantity', [0, -1, '1', None, True, float('nan')])
+def test_quantity_must_be_positive_number(router_user, quantity):
+    with pytest.raises(ValidationError, match='Quantity must be a positive number'):
+        SmartOrderRouter(router_user.id).execute('BTC/USDT', 'buy', quantity)
+
+
+def test_child_orders_carry_route_client_order_ids(router_user):
+    router = SmartOrderRouter(router_user.id)
+
+    report = router.execute('BTC/USDT', 'buy', 0.5, route_id='route-1')
+
+    assert report['route_id'] == 'route-1'
+    assert [c['client_order_id'] for c in report['children']] == [
+        ExchangeService.client_order_id('route', 'route-1', 0)
+    ]
+    assert report['children'][0]['error'] is None
+
+    # Replaying the route finds the child order already placed
+    replay = router.execute('BTC/USDT', 'buy', 0.5, route_id='route-1')
+    order_ids = {t.exchange_order_id for t in Trade.query.filter_by(user_id=router_user.id)}
+    assert replay['children'][0]['trade']['exchange_order_id'] == report['children'][0]['trade']['exchange_order_id']
+    assert len(order_ids) == 1
@@ -0,0 +1,62 @@
+import ccxt
+import pytest
+
+from app import db
+from app.models.trade import Trade
+from app.services.order_tracker import OrderTracker
+
+
+def _binance_order(order_id, executed, status='NEW'):
+    return {
+        'symbol': 'BTCUSDT', 'orderId': order_id, 'clientOrderId': f'c{order_id}',
+        'price': '30000.00', 'origQty': '1.00', 'executedQty': executed,
+        'cummulativeQuoteQty': str(float(executed) * 30000), 'status': status,
+        'type': 'LIMIT', 'side': 'BUY', 'time': 1700000000000, 'updateTime': 1700000000000,
+    }
+
+
+def _market(base):
+    return {'id': f'{base}USDT', 'symbol': f'{base}/USDT', 'base': base, 'quote': 'USDT',
+            'baseId': base, 'quoteId': 'USDT', 'type': 'spot', 'spot': True, 'margin': False, 'swap': False,
+            'future': False, 'option': False, 'contract': False, 'linear': None, 'inverse': None,
+            'settle': None, 'active': True, 'precision': {}, 'limits': {}}
+
+
+@pytest.fixture
+def binance(monkeypatch):
+    """Offline binance client with canned open orders and empty order history"""
+    calls = []
+
+    def load_markets(self, reload=False, params={}):
+        return self.set_markets([_market('BTC'), _market('ETH')])
+
+    def private_get_open_orders(self, params={}):
+        calls.append(params)
+        return [_binance_order(101, '0.40000000', 'PARTIALLY_FILLED'), _binance_order(999, '0.00000000')]
+
+    monkeypatch.setattr(ccxt.binance, 'load_markets', load_markets)
+    monkeypatch.setattr(ccxt.binance, 'privateGetOpenOrders', private_get_open_orders, raising=False)
+    monkeypatch.setattr(ccxt.binance, 'privateGetAllOrders', lambda self, params={}: [], raising=False)
+    return calls
+
+
+def test_reconciles_binance_group_without_symbol(user, api_key_factory, binance):
+    api_key_factory(user, exchange='binance')
+    trades = [
+        Trade(user_id=user.id, symbol='BTC/USDT', side='buy', type='limit', quantity=1, price=30000,
+              status='pending', exchange='binance', exchange_order_id='101'),
+        Trade(user_id=user.id, symbol='ETH/USDT', side='buy', type='limit', quantity=1, price=2000,
+              status='pending', exchange='binance', exchange_order_id='102'),
+    ]
+    db.session.add_all(trades)
+    db.session.commit()
+
+    result = OrderTracker(max_fallback_fetches=0).reconcile(user_id=user.id)
+
+    # One account-wide request covers every symbol in the group
+    assert binance == [{}]
+    assert result == {'groups': 1, 'checked': 2, 'updated': 1}
+    filled = db.session.get(Trade, trades[0].id)
+    assert filled.status == 'partially_filled'
+    assert filled.filled_quantity == pytest.approx(0.4)
+    assert db.session.get(Trade, trades[1].id).status == 'pending'
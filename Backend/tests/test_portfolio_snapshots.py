@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.portfolio_snapshot import PortfolioSnapshot
+from app.services.portfolio_snapshots import PortfolioSnapshotService
+from app.utils.downsample import lttb
+
+
+def test_lttb_passes_short_series_through():
+    points = [(x, x * 2) for x in range(5)]
+
+    assert lttb(points, 10) == points
+    assert lttb(points, 2) == points
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    points = [(x, 0.0) for x in range(100)]
+    points[37] = (37, 50.0, 'peak')
+    points[71] = (71, -40.0)
+
+    sampled = lttb(points, 10)
+
+    assert len(sampled) == 10
+    assert sampled[0] == points[0] and sampled[-1] == points[-1]
+    assert points[37] in sampled and points[71] in sampled
+    assert [p[0] for p in sampled] == sorted(p[0] for p in sampled)
+
+
+@pytest.fixture
+def snapshot_factory(user):
+    def create(timestamp):
+        snapshot = PortfolioSnapshot(user_id=user.id, timestamp=timestamp, cash=1, equity=1)
+        db.session.add(snapshot)
+        db.session.commit()
+        return timestamp
+    return create
+
+
+def test_compact_keeps_first_snapshot_of_each_bucket(user, snapshot_factory):
+    now = datetime(2026, 6, 1, 12, 0)
+    recent = now - timedelta(days=1)
+    week_old = (now - timedelta(days=10)).replace(minute=0)
+    quarter_old = (now - timedelta(days=100)).replace(hour=0, minute=0)
+
+    kept = [
+        # Inside the first week everything stays
+        snapshot_factory(recent.replace(minute=5)),
+        snapshot_factory(recent.replace(minute=10)),
+        # Hourly: the earliest snapshot of the hour, even off the boundary
+        snapshot_factory(week_old + timedelta(minutes=5)),
+        snapshot_factory(week_old + timedelta(hours=1)),
+        # Daily: the earliest snapshot of the day
+        snapshot_factory(quarter_old + timedelta(hours=3, minutes=5)),
+    ]
+    for timestamp in (
+        week_old + timedelta(minutes=10),
+        week_old + timedelta(hours=1, minutes=5),
+        quarter_old + timedelta(hours=3, minutes=10),
+        quarter_old + timedelta(hours=7),
+    ):
+        snapshot_factory(timestamp)
+
+    assert PortfolioSnapshotService().compact(now=now) == 4
+
+    remaining = [s.timestamp for s in PortfolioSnapshot.query.order_by(PortfolioSnapshot.timestamp)]
+    assert remaining == sorted(kept)
+    assert PortfolioSnapshotService().compact(now=now) == 0
+
+
+def test_capture_skips_user_without_balance_or_previous_snapshot(user, api_key_factory, monkeypatch):
+    api_key_factory(user)
+    monkeypatch.setattr(PortfolioSnapshotService, '_cash', lambda self, user_id, exchange_names: None)
+    service = PortfolioSnapshotService(interval=300)
+    now = datetime(2026, 6, 1, 12, 0)
+
+    assert service.capture(now=now) == 0
+    assert PortfolioSnapshot.query.count() == 0
+
+    db.session.add(PortfolioSnapshot(user_id=user.id, timestamp=now - timedelta(hours=1), cash=250, equity=250))
+    db.session.commit()
+
+    assert service.capture(now=now) == 1
+    assert PortfolioSnapshot.query.filter_by(timestamp=now).one().cash == 250
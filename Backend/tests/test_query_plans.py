@@ -0,0 +1,92 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, text
+
+from app import db
+from app.models.notification import Notification
+from app.models.position import Position
+from app.models.trade import Trade
+from app.models.user import User
+from app.models.workflow import Workflow
+from app.models.WorkflowExecution import WorkflowExecution
+from app.services.query_plans import _explain, _scans_table, check_query_plans, hot_queries
+
+USERS = 20
+ROWS = 2000
+SYMBOLS = ['BTC/USDT', 'ETH/USDT', 'SOL/USDT', 'BNB/USDT', 'ADA/USDT']
+STATUSES = ['filled', 'filled', 'filled', 'cancelled', 'pending', 'partially_filled']
+
+
+@pytest.fixture
+def seeded(app):
+    """Enough rows across many users that a table scan is never the cheapest plan"""
+    rng = random.Random(7)
+    now = datetime.utcnow()
+
+    def when(i):
+        return now - timedelta(minutes=i * 7)
+
+    db.session.execute(insert(User), [
+        {'id': u, 'username': f'user{u}', 'email': f'user{u}@example.com', 'password_hash': 'x'}
+        for u in range(1, USERS + 1)
+    ])
+    db.session.execute(insert(Workflow), [
+        {'id': u, 'user_id': u, 'name': f'wf{u}', 'nodes': [], 'connections': [], 'created_at': now}
+        for u in range(1, USERS + 1)
+    ])
+    db.session.execute(insert(Trade), [
+        {'user_id': rng.randint(1, USERS), 'workflow_id': rng.choice([None, rng.randint(1, USERS)]),
+         'symbol': rng.choice(SYMBOLS), 'side': rng.choice(['buy', 'sell']), 'type': 'limit',
+         'quantity': 1.0, 'price': 100.0, 'status': (status := rng.choice(STATUSES)),
+         'exchange': 'simulator', 'exchange_order_id': str(i) if status != 'cancelled' else None,
+         'timestamp': when(i)}
+        for i in range(ROWS)
+    ])
+    db.session.execute(insert(Position), [
+        {'user_id': u, 'symbol': symbol, 'quantity': 1.0, 'entry_price': 100.0, 'current_price': 100.0}
+        for u in range(1, USERS + 1) for symbol in SYMBOLS
+    ])
+    db.session.execute(insert(Notification), [
+        {'user_id': rng.randint(1, USERS), 'type': 'trade', 'title': 't', 'message': 'm',
+         'is_read': rng.random() < 0.8, 'created_at': when(i)}
+        for i in range(ROWS)
+    ])
+    db.session.execute(insert(WorkflowExecution), [
+        {'workflow_id': rng.randint(1, USERS), 'status': 'completed', 'started_at': when(i), 'logs': []}
+        for i in range(ROWS)
+    ])
+    db.session.commit()
+
+    # Planner statistics, as a production database would have them
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+    return app
+
+
+@pytest.mark.parametrize('name', [name for name, _, _ in hot_queries()])
+def test_hot_query_uses_an_index(seeded, name):
+    dialect = db.session.get_bind().dialect.name
+    _, table, stmt = next(query for query in hot_queries() if query[0] == name)
+
+    plan = _explain(stmt, dialect)
+    db.session.rollback()
+
+    assert not _scans_table(plan, table, dialect), plan
+
+
+def test_check_query_plans_reports_no_regressions(seeded):
+    result = check_query_plans()
+
+    assert result['checked'] == len(hot_queries())
+    assert result['regressions'] == []
+
+
+def test_check_query_plans_flags_a_missing_index(seeded):
+    db.session.execute(text('DROP INDEX ix_trades_workflow_status'))
+    db.session.commit()
+
+    regressions = check_query_plans()['regressions']
+
+    assert [r['query'] for r in regressions] == ['trades_by_workflow']
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.trade import Trade
+from app.models.trade_archive import ArchivedTrade
+from app.services.trade_archive import TradeArchiver, find_trade, history_row_to_dict, trade_history
+from app.utils.pagination import keyset_page
+
+
+@pytest.fixture
+def trades(user):
+    now = datetime.utcnow()
+    rows = [
+        Trade(user_id=user.id, symbol='BTC/USDT', side='buy', type='market', quantity=1, price=100,
+              status='filled', exchange='simulator', timestamp=now - timedelta(days=days))
+        for days in (1, 2, 400, 500)
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    ids = [trade.id for trade in rows]
+    assert TradeArchiver(retention_days=180).archive() == 2
+    return ids
+
+
+def test_find_trade_falls_back_to_archive(user, trades):
+    hot = find_trade(trades[0], user.id)
+    archived = find_trade(trades[3], user.id)
+
+    assert isinstance(hot, Trade)
+    assert isinstance(archived, ArchivedTrade)
+    assert set(archived.to_dict()) == set(hot.to_dict())
+    assert archived.to_dict()['id'] == trades[3]
+    assert find_trade(trades[3], user.id + 1) is None
+
+
+def test_keyset_pages_span_hot_and_archived_trades(user, trades):
+    source = trade_history()
+    query = db.session.query(source).filter(source.c.user_id == user.id)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = keyset_page(query, (source.c.timestamp, source.c.id), cursor, limit=3)
+        seen.extend(history_row_to_dict(row) for row in page)
+        if cursor is None:
+            break
+
+    assert [t['id'] for t in seen] == trades
+    assert set(seen[0]) == set(Trade.query.first().to_dict())
+    assert isinstance(seen[-1]['timestamp'], str)
@@ -0,0 +1,63 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.trade import Trade
+from app.services.trade_export import EXPORT_COLUMNS, TradeExporter
+
+
+@pytest.fixture
+def trades(user):
+    now = datetime(2026, 6, 1, 12, 0)
+    rows = [
+        Trade(user_id=user.id, symbol='BTC/USDT' if i % 2 else 'ETH/USDT', side='buy', type='limit',
+              quantity=i + 1, price=100 + i, status='filled', exchange='simulator',
+              timestamp=now + timedelta(minutes=i))
+        for i in range(7)
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    return [trade.id for trade in rows]
+
+
+def _exporter(user, **kwargs):
+    # Small pages and batches so the stream spans several of each
+    return TradeExporter(user.id, batch_size=2, page_size=3, **kwargs)
+
+
+def test_csv_export_streams_every_trade_in_order(user, trades):
+    chunks = list(_exporter(user).stream('csv'))
+
+    rows = list(csv.reader(io.StringIO(b''.join(chunks).decode('utf-8'))))
+    assert len(chunks) > 1
+    assert rows[0] == list(EXPORT_COLUMNS)
+    assert [int(row[EXPORT_COLUMNS.index('id')]) for row in rows[1:]] == trades
+    assert rows[1][EXPORT_COLUMNS.index('timestamp')] == '2026-06-01T12:00:00'
+
+
+def test_ndjson_export_applies_filters(user, trades):
+    body = b''.join(_exporter(user, symbol='BTC/USDT').stream('ndjson')).decode('utf-8')
+
+    records = [json.loads(line) for line in body.splitlines()]
+    assert [r['id'] for r in records] == trades[1::2]
+    assert {r['symbol'] for r in records} == {'BTC/USDT'}
+    assert records[0]['timestamp'] == '2026-06-01T12:01:00'
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'ndjson'])
+def test_gzip_stream_round_trips(user, trades, fmt):
+    plain = b''.join(_exporter(user).stream(fmt))
+    compressed = b''.join(_exporter(user).stream(fmt, compress=True))
+
+    assert compressed[:2] == b'\x1f\x8b'
+    assert gzip.decompress(compressed) == plain
+
+
+def test_empty_export(user):
+    assert b''.join(_exporter(user).stream('ndjson')) == b''
+    assert gzip.decompress(b''.join(_exporter(user).stream('csv', compress=True))).startswith(b'id,')